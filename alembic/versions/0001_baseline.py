@@ -0,0 +1,222 @@
+"""Baseline schema
+
+Creates every table of the current schema. Databases created earlier by
+Base.metadata.create_all and the migrations/ scripts are brought to the same
+state: existing tables are kept, only missing columns and indexes are added.
+So `alembic upgrade head` works both on an empty database and on production.
+It inspects the live database, so it can't be rendered offline with --sql.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _add_missing_columns(table: str, *columns: sa.Column) -> None:
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+    for column in columns:
+        if column.name not in existing:
+            op.add_column(table, column)
+
+
+def _create_missing_indexes(table: str, indexes: list) -> None:
+    """indexes: (name, columns, unique) tuples."""
+    existing = {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+    for name, columns, unique in indexes:
+        if name not in existing:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def upgrade() -> None:
+    if not _has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("role", sa.String(), nullable=False),
+            sa.Column("contact_name", sa.String(), nullable=True),
+            sa.Column("address", sa.String(), nullable=True),
+            sa.Column("photo_url", sa.String(), nullable=True),
+            sa.Column("admin_notes", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    _create_missing_indexes("users", [
+        ("ix_users_id", ["id"], False),
+        ("ix_users_username", ["username"], True),
+    ])
+
+    if not _has_table("flower_batches"):
+        op.create_table(
+            "flower_batches",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("price", sa.Float(), nullable=True),
+            sa.Column("quantity", sa.Integer(), nullable=True),
+            sa.Column("image_url", sa.String(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("sold_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    _add_missing_columns("flower_batches", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    _create_missing_indexes("flower_batches", [
+        ("ix_flower_batches_id", ["id"], False),
+        ("ix_flower_batches_name", ["name"], False),
+        ("ix_flower_batches_created_at", ["created_at"], False),
+        ("ix_flower_batches_status_created_at", ["status", "created_at"], False),
+        ("ix_flower_batches_status_sold_at", ["status", "sold_at"], False),
+    ])
+
+    if not _has_table("orders"):
+        op.create_table(
+            "orders",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("customer_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("customer_comment", sa.String(), nullable=True),
+            sa.Column("customer_name", sa.String(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["customer_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    _add_missing_columns(
+        "orders",
+        sa.Column("customer_name", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    _create_missing_indexes("orders", [
+        ("ix_orders_id", ["id"], False),
+        ("ix_orders_created_at", ["created_at"], False),
+        ("ix_orders_customer_id_created_at", ["customer_id", "created_at"], False),
+    ])
+
+    if not _has_table("order_items"):
+        op.create_table(
+            "order_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=True),
+            sa.Column("flower_batch_id", sa.Integer(), nullable=True),
+            sa.Column("quantity", sa.Integer(), nullable=True),
+            sa.Column("price_at_time_of_order", sa.Float(), nullable=True),
+            sa.Column("flower_name", sa.String(), nullable=True),
+            sa.ForeignKeyConstraint(["flower_batch_id"], ["flower_batches.id"]),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    _add_missing_columns("order_items", sa.Column("flower_name", sa.String(), nullable=True))
+    _create_missing_indexes("order_items", [
+        ("ix_order_items_id", ["id"], False),
+        ("ix_order_items_order_id", ["order_id"], False),
+    ])
+
+    if not _has_table("telegram_subscribers"):
+        op.create_table(
+            "telegram_subscribers",
+            sa.Column("chat_id", sa.BigInteger(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint("chat_id"),
+        )
+    elif op.get_bind().dialect.name != "sqlite":
+        # Older databases have a 32-bit chat_id; Telegram ids don't fit in it.
+        # SQLite stores both as the same 64-bit INTEGER, nothing to change there.
+        chat_id = next(
+            c for c in sa.inspect(op.get_bind()).get_columns("telegram_subscribers")
+            if c["name"] == "chat_id"
+        )
+        if not isinstance(chat_id["type"], sa.BigInteger):
+            op.alter_column("telegram_subscribers", "chat_id",
+                            type_=sa.BigInteger(), existing_nullable=False)
+    _create_missing_indexes("telegram_subscribers", [
+        ("ix_telegram_subscribers_chat_id", ["chat_id"], False),
+    ])
+
+    if not _has_table("refresh_tokens"):
+        op.create_table(
+            "refresh_tokens",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("token", sa.String(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("device_info", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("is_revoked", sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    _create_missing_indexes("refresh_tokens", [
+        ("ix_refresh_tokens_id", ["id"], False),
+        ("ix_refresh_tokens_token", ["token"], True),
+        ("ix_refresh_tokens_user_id_revoked_expires", ["user_id", "is_revoked", "expires_at"], False),
+    ])
+
+    if not _has_table("catalog_version"):
+        op.create_table(
+            "catalog_version",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT COUNT(*) FROM catalog_version WHERE id = 1")).scalar() == 0:
+        op.execute("INSERT INTO catalog_version (id, version) VALUES (1, 0)")
+
+    if not _has_table("idempotency_keys"):
+        op.create_table(
+            "idempotency_keys",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("key", sa.String(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("request_hash", sa.String(), nullable=False),
+            sa.Column("status_code", sa.Integer(), nullable=True),
+            sa.Column("response_body", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),
+        )
+    _create_missing_indexes("idempotency_keys", [
+        ("ix_idempotency_keys_id", ["id"], False),
+        ("ix_idempotency_keys_expires_at", ["expires_at"], False),
+    ])
+
+    if not _has_table("data_migrations"):
+        op.create_table(
+            "data_migrations",
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("last_id", sa.Integer(), nullable=False),
+            sa.Column("rows_updated", sa.Integer(), nullable=False),
+            sa.Column("completed_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("name"),
+        )
+
+
+def downgrade() -> None:
+    for table in (
+        "data_migrations",
+        "idempotency_keys",
+        "catalog_version",
+        "refresh_tokens",
+        "telegram_subscribers",
+        "order_items",
+        "orders",
+        "flower_batches",
+        "users",
+    ):
+        op.drop_table(table)
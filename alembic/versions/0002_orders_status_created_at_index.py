@@ -0,0 +1,24 @@
+"""Index orders by status and creation time
+
+The admin order summary filters by status and sorts newest first. With only
+ix_orders_created_at a rare status is found by scanning the whole index.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_orders_status_created_at", "orders", ["status", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_status_created_at", table_name="orders")
@@ -0,0 +1,38 @@
+"""Cache Telegram file_ids of broadcast photos
+
+A broadcast used to upload its photos to every subscriber. telegram_files
+keeps the file_id Telegram returns for the first upload, so the photos are
+sent by reference from then on.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "telegram_files",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("bot_id", sa.BigInteger(), nullable=False),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("bot_id", "path", "sha256", name="uq_telegram_files_bot_path_sha256"),
+    )
+    op.create_index("ix_telegram_files_id", "telegram_files", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_telegram_files_id", table_name="telegram_files")
+    op.drop_table("telegram_files")
@@ -0,0 +1,59 @@
+"""Persist broadcast jobs and their per-subscriber deliveries
+
+Broadcasts ran as a background task of the web worker: after a restart
+nobody knew who had received the message. Jobs are now queued in
+broadcast_jobs and sent by the bot worker, which records every delivery
+in broadcast_deliveries and resumes unfinished jobs.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "broadcast_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_broadcast_jobs_id", "broadcast_jobs", ["id"], unique=False)
+    op.create_index("ix_broadcast_jobs_status", "broadcast_jobs", ["status"], unique=False)
+
+    op.create_table(
+        "broadcast_deliveries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_id", sa.Integer(), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["job_id"], ["broadcast_jobs.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("job_id", "chat_id", name="uq_broadcast_deliveries_job_chat"),
+    )
+    op.create_index("ix_broadcast_deliveries_id", "broadcast_deliveries", ["id"], unique=False)
+    op.create_index("ix_broadcast_deliveries_job_id_status", "broadcast_deliveries", ["job_id", "status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_broadcast_deliveries_job_id_status", table_name="broadcast_deliveries")
+    op.drop_index("ix_broadcast_deliveries_id", table_name="broadcast_deliveries")
+    op.drop_table("broadcast_deliveries")
+    op.drop_index("ix_broadcast_jobs_status", table_name="broadcast_jobs")
+    op.drop_index("ix_broadcast_jobs_id", table_name="broadcast_jobs")
+    op.drop_table("broadcast_jobs")
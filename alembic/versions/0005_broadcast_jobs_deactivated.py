@@ -0,0 +1,29 @@
+"""Count subscribers deactivated by a broadcast
+
+Chats that blocked the bot, deleted their account or no longer exist are
+deactivated at the end of each broadcast; the job records how many.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "broadcast_jobs",
+        sa.Column("deactivated", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("broadcast_jobs") as batch_op:
+        batch_op.drop_column("deactivated")
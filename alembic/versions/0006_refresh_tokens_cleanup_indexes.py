@@ -0,0 +1,27 @@
+"""Index refresh tokens by expiry and revocation
+
+cleanup_expired_tokens deletes tokens that are expired or revoked. None of
+the existing indexes leads with either column, so the DELETE read the whole
+table; with one index per side of the OR it reads only the matching rows.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"], unique=False)
+    op.create_index("ix_refresh_tokens_is_revoked", "refresh_tokens", ["is_revoked"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_refresh_tokens_is_revoked", table_name="refresh_tokens")
+    op.drop_index("ix_refresh_tokens_expires_at", table_name="refresh_tokens")
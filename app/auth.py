@@ -1,6 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Tuple
+import asyncio
+import os
 import secrets
+import threading
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .config import settings
@@ -21,6 +25,45 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+def password_hash_workers() -> int:
+    """PASSWORD_HASH_WORKERS, or one less than the CPUs this process may run on (at least 1)."""
+    if settings.PASSWORD_HASH_WORKERS:
+        return settings.PASSWORD_HASH_WORKERS
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    return max(1, cpus - 1)
+
+
+def _lower_thread_priority():
+    """Executor initializer: renice the hashing thread. On Linux a thread id renices just that thread."""
+    if settings.PASSWORD_HASH_NICENESS and hasattr(os, "setpriority"):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), settings.PASSWORD_HASH_NICENESS)
+        except OSError:
+            pass  # Not permitted (e.g. the process already runs at a higher nice value)
+
+
+# bcrypt is CPU-bound and deliberately slow. Async endpoints hash on this small
+# dedicated pool so a burst of logins neither blocks the event loop nor takes
+# all of the threadpool slots that sync endpoints run on. With fewer threads
+# than CPUs and a lower priority, hashing also can't take the CPU away from
+# the event loop and the DB threads; logins wait instead.
+_password_executor = ThreadPoolExecutor(
+    max_workers=password_hash_workers(),
+    thread_name_prefix="password-hash",
+    initializer=_lower_thread_priority
+)
+
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a short-lived access token (JWT)."""
     to_encode = data.copy()
@@ -0,0 +1,190 @@
+"""
+Concurrent broadcast sender that stays within Telegram's flood limits.
+
+Broadcaster.run() delivers one message (any `send(chat_id)` coroutine) to
+many chats with a bounded number of requests in flight:
+- a global token bucket paces all requests to BROADCAST_RATE_PER_SECOND
+  (Telegram allows about 30 per second for bulk notifications);
+- one chat gets at most one request per BROADCAST_PER_CHAT_INTERVAL
+  seconds, which matters for retries;
+- RetryAfter (HTTP 429) pauses the whole bucket for the time Telegram asks
+  and lowers its rate by RATE_DECREASE, then the chat is retried, so a
+  too optimistic rate settles just under the real limit;
+- network errors and timeouts are retried with exponential backoff and
+  jitter, up to BROADCAST_MAX_ATTEMPTS attempts per chat;
+- other errors (blocked bot, unknown chat, bad request) are final and are
+  reported in BroadcastResult.failed.
+
+An optional `warm_up()` predicate keeps delivery one chat at a time until it
+returns True; telegram_files.py uses it to upload photos once before the
+other chats are sent their file_ids.
+
+The engine knows nothing about the Bot API client, so it can be driven
+against benchmarks/telegram_stub.py (see benchmarks/broadcast.py).
+"""
+import asyncio
+import datetime
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rate multiplier after a RetryAfter (once per pause)
+RATE_DECREASE = 0.85
+
+
+class TokenBucket:
+    """`rate` tokens per second, at most `burst` saved up. pause() stops handing out tokens."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        # Waiters are served in arrival order
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> bool:
+        """Hand out no tokens for `seconds`. False if a pause was already running."""
+        now = time.monotonic()
+        already_paused = now < self._paused_until
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = max(self._updated, self._paused_until)
+        return not already_paused
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class BroadcastResult:
+    def __init__(self, total: int):
+        self.total = total
+        self.sent = 0
+        self.failed: Dict[int, str] = {}  # chat_id -> last error
+        self.retries = 0
+        self.rate_limited = 0
+        self.final_rate_limit = 0.0  # Requests per second the bucket ended at
+        self.elapsed = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.sent}/{self.total} sent, {len(self.failed)} failed, {self.retries} retries, "
+            f"{self.rate_limited} rate limited, {self.elapsed:.1f} s ({self.rate:.1f}/s)"
+        )
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    value = error.retry_after
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+class Broadcaster:
+    def __init__(
+        self,
+        rate_per_second: float = settings.BROADCAST_RATE_PER_SECOND,
+        per_chat_interval: float = settings.BROADCAST_PER_CHAT_INTERVAL,
+        concurrency: int = settings.BROADCAST_CONCURRENCY,
+        max_attempts: int = settings.BROADCAST_MAX_ATTEMPTS,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+    ):
+        self.rate_per_second = rate_per_second
+        self.per_chat_interval = per_chat_interval
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before attempt `attempt + 1`."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    async def run(
+        self,
+        chat_ids: Iterable[int],
+        send: Callable[[int], Awaitable[object]],
+        warm_up: Optional[Callable[[], bool]] = None,
+    ) -> BroadcastResult:
+        chat_ids = list(chat_ids)
+        result = BroadcastResult(len(chat_ids))
+        bucket = TokenBucket(self.rate_per_second)
+        last_request: Dict[int, float] = {}
+        queue: asyncio.Queue = asyncio.Queue()
+        for chat_id in chat_ids:
+            queue.put_nowait(chat_id)
+
+        async def deliver(chat_id: int):
+            error: Optional[Exception] = None
+            for attempt in range(1, self.max_attempts + 1):
+                since_last = time.monotonic() - last_request.get(chat_id, float("-inf"))
+                if since_last < self.per_chat_interval:
+                    await asyncio.sleep(self.per_chat_interval - since_last)
+                await bucket.acquire()
+                last_request[chat_id] = time.monotonic()
+                try:
+                    await send(chat_id)
+                    result.sent += 1
+                    return
+                except RetryAfter as e:
+                    error = e
+                    result.rate_limited += 1
+                    # Requests in flight during the pause get 429 too; slow down once per pause
+                    if bucket.pause(retry_after_seconds(e)):
+                        bucket.rate = max(1.0, bucket.rate * RATE_DECREASE)
+                    delay = 0.0  # The bucket waits for us
+                except BadRequest as e:
+                    # A NetworkError subclass, but retrying the same request won't help
+                    error = e
+                    break
+                except NetworkError as e:  # Includes TimedOut
+                    error = e
+                    delay = self.backoff(attempt)
+                except Exception as e:
+                    error = e
+                    break
+                if attempt < self.max_attempts:
+                    result.retries += 1
+                    await asyncio.sleep(delay)
+            result.failed[chat_id] = str(error)
+            logger.error(f"Failed to send broadcast to {chat_id}: {error}")
+
+        async def worker():
+            while not queue.empty():
+                await deliver(queue.get_nowait())
+
+        started = time.monotonic()
+        if warm_up is not None:
+            while not queue.empty() and not warm_up():
+                await deliver(queue.get_nowait())
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(chat_ids)))))
+        result.elapsed = time.monotonic() - started
+        result.final_rate_limit = bucket.rate
+        return result
@@ -0,0 +1,144 @@
+"""
+Persisted broadcast jobs, sent by the worker in run_bot.py.
+
+POST /api/notify_new_flowers queues a job (crud.create_broadcast_job) with a
+pending delivery for every active subscriber. run_worker() polls for jobs
+and sends them with Broadcaster, recording each delivery as soon as it is
+known: sent, failed, or blocked when the chat is unreachable for good (the
+bot was blocked, the account deleted or the chat not found). At the end of
+the job the blocked subscribers are deactivated with one UPDATE, so later
+broadcasts don't spend requests and rate-limit slots on them. Deliveries to
+subscribers that unsubscribed or were deactivated after the job was queued
+are skipped.
+
+A job interrupted by a crash or restart stays pending or running and is
+resumed with its pending deliveries only, so subscribers don't get the
+message twice; only the few sends in flight at the moment of the crash may
+be repeated.
+"""
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden
+
+from . import crud, telegram_files
+from .broadcast import Broadcaster, BroadcastResult
+from .config import settings
+from .database import SessionLocal
+from .telegram import new_flowers_caption
+
+logger = logging.getLogger(__name__)
+
+# BadRequest descriptions that mean the chat is gone, in lower case
+UNREACHABLE_CHAT_ERRORS = ("chat not found", "user is deactivated", "peer_id_invalid")
+
+
+def is_unreachable(error: Exception) -> bool:
+    """Whether no later send to the chat can succeed either."""
+    if isinstance(error, Forbidden):  # Blocked by the user, kicked, deactivated account
+        return True
+    return isinstance(error, BadRequest) and any(text in error.message.lower() for text in UNREACHABLE_CHAT_ERRORS)
+
+
+def _call(func, *args, **kwargs):
+    """Run a crud function in its own session (from a worker thread)."""
+    db = SessionLocal()
+    try:
+        return func(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+def _next_job_id() -> Optional[int]:
+    db = SessionLocal()
+    try:
+        job = crud.get_active_broadcast_job(db)
+        return job.id if job else None
+    finally:
+        db.close()
+
+
+def _start_job(job_id: int) -> tuple:
+    """Mark the job running; returns its flower batches and pending chat ids of active subscribers."""
+    db = SessionLocal()
+    try:
+        job = crud.start_broadcast_job(db, job_id)
+        crud.skip_inactive_deliveries(db, job_id)
+        return json.loads(job.payload), crud.get_pending_delivery_chat_ids(db, job_id)
+    finally:
+        db.close()
+
+
+async def _record(job_id: int, chat_ids: list, status: str, error: Optional[str] = None):
+    await asyncio.to_thread(_call, crud.set_delivery_status, job_id, chat_ids, status, error)
+
+
+async def run_job(bot: Bot, job_id: int, broadcaster: Broadcaster) -> Optional[BroadcastResult]:
+    """Send the pending deliveries of a job and mark it completed."""
+    flower_batches_details, chat_ids = await asyncio.to_thread(_start_job, job_id)
+    logger.info(f"Broadcast job {job_id}: {len(chat_ids)} pending subscribers, {len(flower_batches_details)} flower batches.")
+
+    photos = [b for b in flower_batches_details if Path(b['file_path']).is_file()]
+    if len(photos) < len(flower_batches_details):
+        logger.warning(f"{len(flower_batches_details) - len(photos)} flower batches have no photo on disk, skipping them.")
+    if not photos:
+        await asyncio.to_thread(_call, crud.finish_broadcast_job, job_id, "failed", "No photos to send")
+        logger.warning(f"Broadcast job {job_id} has no media to send.")
+        return None
+
+    result = None
+    if chat_ids:
+        # Photos are uploaded with the first delivery only (see telegram_files.py)
+        media_group = await telegram_files.load_media_group(
+            bot.id,
+            [batch['file_path'] for batch in photos[:10]], # Limit to 10 photos
+            caption=new_flowers_caption(flower_batches_details),
+            parse_mode='Markdown'
+        )
+
+        async def send(chat_id: int):
+            try:
+                await telegram_files.send_media_group(bot, media_group, chat_id)
+            except Exception as e:
+                if is_unreachable(e):
+                    await _record(job_id, [chat_id], "blocked", str(e))
+                raise
+            await _record(job_id, [chat_id], "sent")
+
+        result = await broadcaster.run(chat_ids, send, warm_up=lambda: media_group.confirmed)
+        for chat_id, error in result.failed.items():
+            await _record(job_id, [chat_id], "failed", error)  # Blocked ones are not pending any more
+        logger.info(f"Broadcast job {job_id} finished: {result}")
+
+    # Also covers chats found unreachable before an interruption
+    deactivated = await asyncio.to_thread(_call, crud.deactivate_blocked_subscribers, job_id)
+    if deactivated:
+        logger.info(f"Broadcast job {job_id}: {deactivated} unreachable subscribers deactivated.")
+    await asyncio.to_thread(_call, crud.finish_broadcast_job, job_id)
+    return result
+
+
+async def run_worker(bot: Bot, poll_interval: float = settings.BROADCAST_POLL_INTERVAL):
+    """
+    Send queued broadcast jobs one at a time, until cancelled.
+    `bot` must be initialized and have a connection pool of at least
+    BROADCAST_CONCURRENCY (run_bot.py passes the Application's bot).
+    """
+    broadcaster = Broadcaster()
+    logger.info("Broadcast worker started.")
+    while True:
+        job_id = await asyncio.to_thread(_next_job_id)
+        if job_id is None:
+            await asyncio.sleep(poll_interval)
+            continue
+        try:
+            await run_job(bot, job_id, broadcaster)
+        except asyncio.CancelledError:
+            raise  # Shutdown: the job stays running and is resumed on the next start
+        except Exception as e:
+            logger.exception(f"Broadcast job {job_id} failed")
+            await asyncio.to_thread(_call, crud.finish_broadcast_job, job_id, "failed", str(e))
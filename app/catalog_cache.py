@@ -0,0 +1,50 @@
+"""
+In-process cache of pre-serialized catalog responses.
+
+Entries are tagged with the catalog version from the database
+(see crud.get_catalog_version). Every catalog write bumps that version,
+so a worker drops its entries as soon as it sees a newer one, no matter
+which worker made the change.
+"""
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class CatalogCache:
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+    def get(self, version: int, key: Hashable) -> Optional[bytes]:
+        """Return cached JSON body for `key`, or None if missing or stale."""
+        with self._lock:
+            if version != self._version:
+                return None
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, version: int, key: Hashable, body: bytes):
+        """Store JSON body for `key`. Older versions are discarded."""
+        with self._lock:
+            if self._version is not None and version < self._version:
+                return
+            if version != self._version:
+                self._version = version
+                self._entries.clear()
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._entries.clear()
+
+
+catalog_cache = CatalogCache()
@@ -6,6 +6,46 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     TOKEN: Optional[str] = None
     CHAT_ID: Optional[str] = None
+    # Bot API server; point it at a local stub for load tests (benchmarks/telegram_stub.py)
+    TELEGRAM_API_URL: str = "https://api.telegram.org"
+    # Connections the shared bot client keeps open (order notifications during a burst of orders)
+    TELEGRAM_CONNECTION_POOL_SIZE: int = 8
+    # Broadcasts: Bot API requests per second for all chats (Telegram allows about 30)
+    BROADCAST_RATE_PER_SECOND: float = 25
+    # Broadcasts: minimum seconds between two requests to the same chat
+    BROADCAST_PER_CHAT_INTERVAL: float = 1.0
+    # Broadcasts: requests in flight at once; also the size of the bot's connection pool
+    BROADCAST_CONCURRENCY: int = 10
+    # Broadcasts: attempts per chat on RetryAfter and network errors
+    BROADCAST_MAX_ATTEMPTS: int = 5
+    # Broadcasts: seconds between checks for queued jobs in the bot worker (run_bot.py)
+    BROADCAST_POLL_INTERVAL: float = 5.0
+    # Threads reserved for bcrypt hashing, so logins can't starve other requests;
+    # unset: one less than the CPUs (at least 1), leaving a core to the event loop and DB threads
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    # Nice value of the hashing threads (Linux), so the scheduler prefers the other requests
+    PASSWORD_HASH_NICENESS: int = 10
+    # Authenticated user lookups are cached per worker for this many seconds
+    PRINCIPAL_CACHE_TTL: int = 30
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    # Connection pool for server databases (PostgreSQL); ignored for SQLite
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    # SQLite production profile: WAL, tuned pragmas, BEGIN IMMEDIATE for writes
+    SQLITE_PRODUCTION_PROFILE: bool = False
+    SQLITE_BUSY_TIMEOUT_MS: int = 10000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    # Per-route latency, DB and serialization timings, served at /metrics
+    REQUEST_METRICS: bool = True
+    # Also send the timings to clients in the Server-Timing header
+    SERVER_TIMING_HEADER: bool = True
+    # Per-statement statistics and a log of statements slower than the threshold
+    SLOW_QUERY_LOG: bool = False
+    SLOW_QUERY_THRESHOLD_MS: float = 100
+    SLOW_QUERY_MAX_FINGERPRINTS: int = 1000
 
     class Config:
         env_file = ".env"
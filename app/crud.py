@@ -1,13 +1,84 @@
 import os
 from pathlib import Path
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, contains_eager, selectinload
 from typing import Optional
 from . import models, schemas
-from datetime import datetime, timedelta
+from .pagination import keyset_page, cached_total
+from .principal_cache import principal_cache
+from datetime import date, datetime, time, timedelta
+
+# --- Catalog version ---
+
+def get_catalog_version(db: Session) -> int:
+    """Current catalog version (0 if nothing has been written yet)."""
+    version = db.query(models.CatalogVersion.version).filter(models.CatalogVersion.id == 1).scalar()
+    return version or 0
+
+def bump_catalog_version(db: Session):
+    """
+    Increment the catalog version inside the caller's transaction.
+    Must be called by every write that changes what GET /flowers/ returns,
+    before the caller commits.
+    """
+    updated = db.query(models.CatalogVersion).filter(models.CatalogVersion.id == 1).update(
+        {models.CatalogVersion.version: models.CatalogVersion.version + 1},
+        synchronize_session=False
+    )
+    if not updated:
+        db.add(models.CatalogVersion(id=1, version=1))
+
+# --- Flower CRUD ---
 
 def get_flower(db: Session, flower_id: int):
     return db.query(models.FlowerBatch).filter(models.FlowerBatch.id == flower_id).first()
 
+def get_flower_updated_at(db: Session, flower_id: int):
+    """Return (found, updated_at) for a flower without loading the whole row."""
+    row = db.query(models.FlowerBatch.updated_at).filter(models.FlowerBatch.id == flower_id).first()
+    if row is None:
+        return False, None
+    return True, row.updated_at
+
+def get_flowers_by_ids(db: Session, flower_ids, for_update: bool = False):
+    """
+    Load flower batches with a single IN (...) query. Returns {id: FlowerBatch}.
+    With for_update=True the rows are locked with SELECT ... FOR UPDATE until the
+    transaction ends, in id order to avoid deadlocks between concurrent orders.
+    Databases without row locks (SQLite) ignore FOR UPDATE.
+    """
+    ids = set(flower_ids)
+    if not ids:
+        return {}
+    query = db.query(models.FlowerBatch).filter(models.FlowerBatch.id.in_(ids))
+    if for_update:
+        query = query.order_by(models.FlowerBatch.id).with_for_update()
+    return {f.id: f for f in query.all()}
+
+def reserve_stock(db: Session, flower_id: int, quantity: int) -> bool:
+    """
+    Atomically take `quantity` units from a batch inside the caller's transaction.
+    The stock check and the decrement are a single conditional UPDATE, so two
+    concurrent orders cannot both pass the check and oversell the batch.
+    Marks the batch as sold when it reaches zero. Returns False if stock is short.
+    """
+    remaining = models.FlowerBatch.quantity - quantity
+    reserved = db.query(models.FlowerBatch).filter(
+        models.FlowerBatch.id == flower_id,
+        models.FlowerBatch.quantity >= quantity
+    ).update({
+        models.FlowerBatch.quantity: remaining,
+        models.FlowerBatch.status: case((remaining == 0, "sold"), else_=models.FlowerBatch.status),
+        models.FlowerBatch.sold_at: case((remaining == 0, datetime.utcnow()), else_=models.FlowerBatch.sold_at),
+    }, synchronize_session=False)
+    if reserved:
+        # The UPDATE bypassed the identity map; reload on next access
+        flower = db.identity_map.get(db.identity_key(models.FlowerBatch, flower_id))
+        if flower is not None:
+            db.expire(flower)
+    return bool(reserved)
+
 def get_flowers(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.FlowerBatch).offset(skip).limit(limit).all()
 
@@ -27,6 +98,20 @@ def get_flowers_paginated(db: Session, page: int = 1, per_page: int = 20):
     }
 
 
+def get_flowers_keyset(db: Session, cursor: Optional[str] = None, per_page: int = 20, with_total: bool = False):
+    """Get flowers page by cursor, newest first. Raises ValueError on a bad cursor."""
+    query = db.query(models.FlowerBatch)
+    items, next_cursor = keyset_page(
+        query, [models.FlowerBatch.created_at, models.FlowerBatch.id], cursor, per_page
+    )
+    return {
+        "items": items,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total": cached_total("flower_batches", query) if with_total else None
+    }
+
+
 def get_users_paginated(db: Session, page: int = 1, per_page: int = 20):
     """Get users with pagination metadata"""
     query = db.query(models.User)
@@ -42,10 +127,26 @@ def get_users_paginated(db: Session, page: int = 1, per_page: int = 20):
     }
 
 
+def get_users_keyset(db: Session, cursor: Optional[str] = None, per_page: int = 20, with_total: bool = False):
+    """
+    Get users page by cursor, newest first. Raises ValueError on a bad cursor.
+    Users have no created_at, so the cursor is built from the id alone.
+    """
+    query = db.query(models.User)
+    items, next_cursor = keyset_page(query, [models.User.id], cursor, per_page)
+    return {
+        "items": items,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total": cached_total("users", query) if with_total else None
+    }
+
+
 def get_orders_paginated(db: Session, page: int = 1, per_page: int = 20):
     """Get orders with pagination metadata"""
-    query = db.query(models.Order).order_by(models.Order.created_at.desc())
+    query = db.query(models.Order)
     total = query.count()
+    query = _orders_query(db).order_by(models.Order.created_at.desc())
     items = query.offset((page - 1) * per_page).limit(per_page).all()
     pages = (total + per_page - 1) // per_page
     return {
@@ -56,6 +157,62 @@ def get_orders_paginated(db: Session, page: int = 1, per_page: int = 20):
         "pages": pages
     }
 
+
+def get_orders_keyset(db: Session, cursor: Optional[str] = None, per_page: int = 20, with_total: bool = False):
+    """Get orders page by cursor, newest first. Raises ValueError on a bad cursor."""
+    items, next_cursor = keyset_page(
+        _orders_query(db), [models.Order.created_at, models.Order.id], cursor, per_page
+    )
+    return {
+        "items": items,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total": cached_total("orders", db.query(models.Order)) if with_total else None
+    }
+
+
+def get_order_summaries(
+    db: Session,
+    status: Optional[schemas.OrderStatus] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    per_page: int = 50,
+    with_total: bool = False
+):
+    """
+    Orders page for the admin panel, newest first, with the customer's contact
+    fields LEFT JOINed in the same SELECT and items loaded by one IN query.
+    created_from / created_to are inclusive dates. Raises ValueError on a bad cursor.
+    """
+    filters = []
+    if status is not None:
+        filters.append(models.Order.status == status.value)
+    if created_from is not None:
+        filters.append(models.Order.created_at >= datetime.combine(created_from, time.min))
+    if created_to is not None:
+        filters.append(models.Order.created_at < datetime.combine(created_to + timedelta(days=1), time.min))
+
+    query = (
+        _orders_query(db)
+        .outerjoin(models.Order.customer)
+        .options(contains_eager(models.Order.customer).load_only(
+            models.User.username, models.User.contact_name, models.User.address
+        ))
+        .filter(*filters)
+    )
+    items, next_cursor = keyset_page(query, [models.Order.created_at, models.Order.id], cursor, per_page)
+    total = None
+    if with_total:
+        total_key = f"order_summaries:{status and status.value}:{created_from}:{created_to}"
+        total = cached_total(total_key, db.query(models.Order).filter(*filters))
+    return {
+        "items": items,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "total": total
+    }
+
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
@@ -99,6 +256,7 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
             setattr(db_user, key, value)
             
     db.commit()
+    principal_cache.invalidate_user(user_id)
     db.refresh(db_user)
     return db_user
 
@@ -123,6 +281,7 @@ def update_user_self(db: Session, user_id: int, user_update: schemas.UserSelfUpd
         db_user.address = update_data["address"]
             
     db.commit()
+    principal_cache.invalidate_user(user_id)
     db.refresh(db_user)
     return db_user
 
@@ -136,18 +295,39 @@ def delete_user(db: Session, user_id: int):
                 os.remove(file_path)
         db.delete(db_user)
         db.commit()
+        principal_cache.invalidate_user(user_id)
     return db_user
 
 # --- Order CRUD ---
 
+def _orders_query(db: Session):
+    """
+    Base query for orders that are serialized together with their items.
+    Items for the whole result set are loaded with one extra
+    `SELECT ... WHERE order_id IN (...)` instead of one lazy SELECT per order.
+    """
+    return db.query(models.Order).options(selectinload(models.Order.items))
+
 def get_order(db: Session, order_id: int):
-    return db.query(models.Order).filter(models.Order.id == order_id).first()
+    return _orders_query(db).filter(models.Order.id == order_id).first()
 
 def get_orders(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Order).order_by(models.Order.created_at.desc()).offset(skip).limit(limit).all()
+    return _orders_query(db).order_by(models.Order.created_at.desc()).offset(skip).limit(limit).all()
 
 def get_orders_by_customer(db: Session, customer_id: int):
-    return db.query(models.Order).filter(models.Order.customer_id == customer_id).order_by(models.Order.created_at.desc()).all()
+    return _orders_query(db).filter(models.Order.customer_id == customer_id).order_by(models.Order.created_at.desc()).all()
+
+
+def get_customer_orders_state(db: Session, customer_id: int):
+    """
+    Cheap fingerprint of a customer's order history: (count, max id, last update).
+    Changes whenever an order is created, deleted or has its status updated.
+    """
+    return db.query(
+        func.count(models.Order.id),
+        func.max(models.Order.id),
+        func.max(models.Order.updated_at)
+    ).filter(models.Order.customer_id == customer_id).one()
 
 
 def update_order_status(db: Session, order_id: int, new_status: schemas.OrderStatus):
@@ -162,47 +342,75 @@ def update_order_status(db: Session, order_id: int, new_status: schemas.OrderSta
     return db_order
 
 
-def create_order(db: Session, order: schemas.OrderCreate, customer_id: int):
+def create_order(
+    db: Session,
+    order: schemas.OrderCreate,
+    customer_id: int,
+    flower_batches: Optional[dict] = None
+):
+    """
+    Create an order and reserve its stock.
+    `flower_batches` ({id: FlowerBatch}) may be passed in by callers that
+    already loaded them with get_flowers_by_ids(..., for_update=True) in the
+    same transaction; otherwise they are loaded here.
+    Returns the order, or an error message string.
+    """
     # Get customer to denormalize their name
     customer = get_user(db, customer_id)
     customer_name = customer.contact_name if customer else None
-    
-    db_order = models.Order(
-        customer_id=customer_id,
-        customer_comment=order.customer_comment,
-        customer_name=customer_name  # Denormalized: preserves name at time of order
-    )
-    db.add(db_order)
-    
+
+    # All referenced batches in one IN (...) query, row-locked where supported
+    if flower_batches is None:
+        flower_batches = get_flowers_by_ids(
+            db, [item.flower_batch_id for item in order.items], for_update=True
+        )
+
+    # Validate against the loaded snapshot before taking any write lock
     total_amount = 0
     for item in order.items:
-        flower_batch = get_flower(db, item.flower_batch_id)
+        flower_batch = flower_batches.get(item.flower_batch_id)
         if not flower_batch:
             db.rollback()
             return f"Товар с ID {item.flower_batch_id} не найден."
+        if item.quantity <= 0:
+            db.rollback()
+            return f"Некорректное количество товара '{flower_batch.name}': {item.quantity}."
         if flower_batch.quantity < item.quantity:
-            # Not enough stock, rollback transaction
             db.rollback()
             return f"Недостаточно товара '{flower_batch.name}'. В наличии: {flower_batch.quantity}, запрошено: {item.quantity}."
-
-        db_order_item = models.OrderItem(
-            order=db_order,
-            flower_batch_id=item.flower_batch_id,
-            quantity=item.quantity,
-            price_at_time_of_order=flower_batch.price,
-            flower_name=flower_batch.name  # Denormalized: preserves name at time of order
-        )
-        flower_batch.quantity -= item.quantity
-        if flower_batch.quantity == 0:
-            flower_batch.status = "sold"
-            flower_batch.sold_at = datetime.utcnow()
-        db.add(db_order_item)
         total_amount += flower_batch.price * item.quantity
 
     if total_amount < 5000:
         db.rollback()
         return f"Минимальная сумма заказа - 5000 руб. Ваша сумма: {int(total_amount)} руб."
 
+    db_order = models.Order(
+        customer_id=customer_id,
+        customer_comment=order.customer_comment,
+        customer_name=customer_name  # Denormalized: preserves name at time of order
+    )
+    db.add(db_order)
+
+    for item in order.items:
+        flower_batch = flower_batches[item.flower_batch_id]
+        # Capture before a possible rollback expires the instance
+        name, price = flower_batch.name, flower_batch.price
+        if not reserve_stock(db, item.flower_batch_id, item.quantity):
+            # Another order took the stock after our snapshot was read
+            db.rollback()
+            current = get_flower(db, item.flower_batch_id)
+            available = current.quantity if current else 0
+            return f"Недостаточно товара '{name}'. В наличии: {available}, запрошено: {item.quantity}."
+
+        db.add(models.OrderItem(
+            order=db_order,
+            flower_batch_id=item.flower_batch_id,
+            quantity=item.quantity,
+            price_at_time_of_order=price,
+            flower_name=name  # Denormalized: preserves name at time of order
+        ))
+
+    bump_catalog_version(db)
     db.commit()
     db.refresh(db_order)
     return db_order
@@ -216,6 +424,7 @@ def create_flower_batch(db: Session, flower: schemas.FlowerBatchCreate):
         image_url=flower.image_url
     )
     db.add(db_flower)
+    bump_catalog_version(db)
     db.commit()
     db.refresh(db_flower)
     return db_flower
@@ -228,18 +437,15 @@ def update_flower(db: Session, flower_id: int, flower_update: schemas.FlowerBatc
     update_data = flower_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_flower, key, value)
-    
+    bump_catalog_version(db)
     db.commit()
     db.refresh(db_flower)
     return db_flower
 
 def sell_flowers(db: Session, flower_id: int, quantity_to_sell: int):
     db_flower = get_flower(db=db, flower_id=flower_id)
-    if db_flower and db_flower.quantity >= quantity_to_sell:
-        db_flower.quantity -= quantity_to_sell
-        if db_flower.quantity == 0:
-            db_flower.status = "sold"
-            db_flower.sold_at = datetime.utcnow()
+    if db_flower and reserve_stock(db, flower_id, quantity_to_sell):
+        bump_catalog_version(db)
         db.commit()
         db.refresh(db_flower)
     return db_flower
@@ -253,6 +459,7 @@ def delete_flower(db: Session, flower_id: int):
             if os.path.exists(file_path):
                 os.remove(file_path)
         db.delete(db_flower)
+        bump_catalog_version(db)
         db.commit()
     return db_flower
 
@@ -264,6 +471,7 @@ def add_quantity(db: Session, flower_id: int, quantity_to_add: int):
         if db_flower.status == "sold":
             db_flower.status = "available"
             db_flower.sold_at = None
+        bump_catalog_version(db)
         db.commit()
         db.refresh(db_flower)
     return db_flower
@@ -297,8 +505,91 @@ def delete_old_flowers(db: Session):
                 os.remove(file_path)
         db.delete(flower)
 
+    # A cleanup that deleted nothing must not invalidate the catalog caches and ETags
+    if sold_flowers_to_delete or available_flowers_to_delete:
+        bump_catalog_version(db)
     db.commit()
 
+# --- Idempotency Key CRUD ---
+
+def get_idempotency_key(db: Session, user_id: int, key: str) -> Optional[models.IdempotencyKey]:
+    return db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.user_id == user_id,
+        models.IdempotencyKey.key == key
+    ).first()
+
+
+def claim_idempotency_key(
+    db: Session,
+    user_id: int,
+    key: str,
+    request_hash: str,
+    expires_at: datetime,
+    stale_before: datetime,
+    retry: bool = True
+):
+    """
+    Claim a key for a new request. Returns (record, claimed).
+    claimed is False if another request already owns the key; the caller then
+    replays or rejects based on the returned record. Expired records and
+    in-progress claims created before `stale_before` are taken over.
+    The record is None if the key changed hands too fast to be read back;
+    the caller should treat it as still in progress.
+    """
+    existing = get_idempotency_key(db, user_id, key)
+    if existing:
+        abandoned = existing.status_code is None and existing.created_at < stale_before
+        if existing.expires_at > datetime.utcnow() and not abandoned:
+            return existing, False
+        db.delete(existing)
+        db.flush()
+
+    record = models.IdempotencyKey(
+        key=key,
+        user_id=user_id,
+        request_hash=request_hash,
+        expires_at=expires_at
+    )
+    db.add(record)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent retry claimed the key first
+        db.rollback()
+        winner = get_idempotency_key(db, user_id, key)
+        if winner is None and retry:
+            # ...and already released it (its order failed): the key is free again
+            return claim_idempotency_key(
+                db, user_id, key, request_hash, expires_at, stale_before, retry=False
+            )
+        return winner, False
+    db.refresh(record)
+    return record, True
+
+
+def complete_idempotency_key(db: Session, record_id: int, status_code: int, response_body: str):
+    """Store the response of the request that owns the key."""
+    db.query(models.IdempotencyKey).filter(models.IdempotencyKey.id == record_id).update({
+        "status_code": status_code,
+        "response_body": response_body
+    })
+    db.commit()
+
+
+def release_idempotency_key(db: Session, record_id: int):
+    """Drop a claim whose request failed without side effects, so it can be retried."""
+    db.query(models.IdempotencyKey).filter(models.IdempotencyKey.id == record_id).delete()
+    db.commit()
+
+
+def cleanup_expired_idempotency_keys(db: Session) -> int:
+    """Delete all expired idempotency keys. Returns number deleted."""
+    result = db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.expires_at < datetime.utcnow()
+    ).delete()
+    db.commit()
+    return result
+
 # --- Telegram Subscriber CRUD ---
 
 def get_subscriber(db: Session, chat_id: int):
@@ -319,6 +610,164 @@ def get_active_subscribers(db: Session):
     return db.query(models.TelegramSubscriber).filter(models.TelegramSubscriber.is_active == True).all()
 
 
+# --- Telegram file_id CRUD ---
+
+def get_telegram_file_ids(db: Session, bot_id: int, keys: list) -> dict:
+    """Cached file_ids for (path, sha256) keys: {(path, sha256): file_id}."""
+    paths = {path for path, _ in keys}
+    if not paths:
+        return {}
+    rows = db.query(models.TelegramFile).filter(
+        models.TelegramFile.bot_id == bot_id,
+        models.TelegramFile.path.in_(paths)
+    ).all()
+    wanted = set(keys)
+    return {(row.path, row.sha256): row.file_id for row in rows if (row.path, row.sha256) in wanted}
+
+
+def save_telegram_file_ids(db: Session, bot_id: int, file_ids: dict):
+    """Store {(path, sha256): file_id}, replacing file_ids already cached for those keys."""
+    for (path, sha256), file_id in file_ids.items():
+        db_file = db.query(models.TelegramFile).filter(
+            models.TelegramFile.bot_id == bot_id,
+            models.TelegramFile.path == path,
+            models.TelegramFile.sha256 == sha256
+        ).first()
+        if db_file:
+            db_file.file_id = file_id
+        else:
+            db.add(models.TelegramFile(bot_id=bot_id, path=path, sha256=sha256, file_id=file_id))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent broadcast cached the same photo first; its file_id is as good
+        db.rollback()
+
+
+# --- Broadcast Job CRUD ---
+
+def get_active_broadcast_job(db: Session) -> Optional[models.BroadcastJob]:
+    """Oldest job not finished yet: pending, or running when the worker was interrupted."""
+    return db.query(models.BroadcastJob).filter(
+        models.BroadcastJob.status.in_(("pending", "running"))
+    ).order_by(models.BroadcastJob.id).first()
+
+
+def get_broadcast_job(db: Session, job_id: int) -> Optional[models.BroadcastJob]:
+    return db.query(models.BroadcastJob).filter(models.BroadcastJob.id == job_id).first()
+
+
+def get_latest_broadcast_job(db: Session) -> Optional[models.BroadcastJob]:
+    return db.query(models.BroadcastJob).order_by(models.BroadcastJob.id.desc()).first()
+
+
+def create_broadcast_job(db: Session, payload: str) -> models.BroadcastJob:
+    """Queue a broadcast with a pending delivery for every active subscriber."""
+    db_job = models.BroadcastJob(payload=payload, status="pending")
+    db.add(db_job)
+    db.flush()
+    # One INSERT ... SELECT instead of loading every subscriber
+    db.execute(insert(models.BroadcastDelivery).from_select(
+        ["job_id", "chat_id", "status", "updated_at"],
+        select(
+            literal(db_job.id), models.TelegramSubscriber.chat_id, literal("pending"), literal(datetime.utcnow())
+        ).where(models.TelegramSubscriber.is_active == True)
+    ))
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+
+def get_broadcast_delivery_counts(db: Session, job_id: int) -> dict:
+    """Deliveries of a job by status: {"pending": 10, "sent": 90, ...}."""
+    rows = db.query(models.BroadcastDelivery.status, func.count()).filter(
+        models.BroadcastDelivery.job_id == job_id
+    ).group_by(models.BroadcastDelivery.status).all()
+    return dict(rows)
+
+
+def get_pending_delivery_chat_ids(db: Session, job_id: int) -> list:
+    rows = db.query(models.BroadcastDelivery.chat_id).filter(
+        models.BroadcastDelivery.job_id == job_id,
+        models.BroadcastDelivery.status == "pending"
+    ).order_by(models.BroadcastDelivery.id).all()
+    return [chat_id for chat_id, in rows]
+
+
+def set_delivery_status(db: Session, job_id: int, chat_ids: list, status: str, error: Optional[str] = None) -> int:
+    """Record the outcome for pending deliveries of a job. Returns number updated."""
+    updated = 0
+    for start in range(0, len(chat_ids), 500):  # Stay under SQLite's bound parameter limit
+        updated += db.query(models.BroadcastDelivery).filter(
+            models.BroadcastDelivery.job_id == job_id,
+            models.BroadcastDelivery.chat_id.in_(chat_ids[start:start + 500]),
+            models.BroadcastDelivery.status == "pending"
+        ).update(
+            {"status": status, "error": error, "updated_at": datetime.utcnow()},
+            synchronize_session=False
+        )
+    db.commit()
+    return updated
+
+
+def skip_inactive_deliveries(db: Session, job_id: int) -> int:
+    """Skip pending deliveries to subscribers deactivated since the job was queued. Returns number skipped."""
+    inactive = select(models.TelegramSubscriber.chat_id).where(models.TelegramSubscriber.is_active == False)
+    skipped = db.query(models.BroadcastDelivery).filter(
+        models.BroadcastDelivery.job_id == job_id,
+        models.BroadcastDelivery.status == "pending",
+        models.BroadcastDelivery.chat_id.in_(inactive)
+    ).update({"status": "skipped", "updated_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    return skipped
+
+
+def deactivate_blocked_subscribers(db: Session, job_id: int) -> int:
+    """
+    Deactivate every subscriber the job found unreachable (one UPDATE) and
+    add them to the job's count. Returns number deactivated.
+    """
+    blocked = select(models.BroadcastDelivery.chat_id).where(
+        models.BroadcastDelivery.job_id == job_id,
+        models.BroadcastDelivery.status == "blocked"
+    )
+    deactivated = db.query(models.TelegramSubscriber).filter(
+        models.TelegramSubscriber.chat_id.in_(blocked),
+        models.TelegramSubscriber.is_active == True
+    ).update({"is_active": False}, synchronize_session=False)
+    db.query(models.BroadcastJob).filter(models.BroadcastJob.id == job_id).update(
+        {"deactivated": models.BroadcastJob.deactivated + deactivated}, synchronize_session=False
+    )
+    db.commit()
+    return deactivated
+
+
+def start_broadcast_job(db: Session, job_id: int) -> Optional[models.BroadcastJob]:
+    db_job = get_broadcast_job(db, job_id)
+    if db_job:
+        db_job.status = "running"
+        if db_job.started_at is None:  # Resumed jobs keep their first start
+            db_job.started_at = datetime.utcnow()
+        db.commit()
+        db.refresh(db_job)
+    return db_job
+
+
+def finish_broadcast_job(db: Session, job_id: int, status: str = "completed", error: Optional[str] = None):
+    """A failed job is never resumed, so its pending deliveries fail with it (same error, same transaction)."""
+    now = datetime.utcnow()
+    db.query(models.BroadcastJob).filter(models.BroadcastJob.id == job_id).update(
+        {"status": status, "error": error, "finished_at": now},
+        synchronize_session=False
+    )
+    if status == "failed":
+        db.query(models.BroadcastDelivery).filter(
+            models.BroadcastDelivery.job_id == job_id,
+            models.BroadcastDelivery.status == "pending"
+        ).update({"status": "failed", "error": error, "updated_at": now}, synchronize_session=False)
+    db.commit()
+
+
 # --- Refresh Token CRUD ---
 
 def create_refresh_token(
@@ -374,6 +823,7 @@ def revoke_all_user_tokens(db: Session, user_id: int) -> int:
         models.RefreshToken.is_revoked == False
     ).update({"is_revoked": True})
     db.commit()
+    principal_cache.invalidate_user(user_id)
     return result
 
 
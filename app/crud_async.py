@@ -0,0 +1,47 @@
+"""
+Async versions of the hot CRUD functions, used when DATABASE_URL names an
+async driver (see database.ASYNC_MODE).
+
+Reads are written directly against AsyncSession. Write paths reuse the sync
+functions from crud.py through AsyncSession.run_sync, which runs them on the
+async connection without a worker thread, so the logic lives in one place.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from . import models
+
+
+async def get_catalog_version(db: AsyncSession) -> int:
+    result = await db.execute(
+        select(models.CatalogVersion.version).where(models.CatalogVersion.id == 1)
+    )
+    return result.scalar() or 0
+
+
+async def get_flowers(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(select(models.FlowerBatch).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+async def get_orders_by_customer(db: AsyncSession, customer_id: int):
+    result = await db.execute(
+        select(models.Order)
+        .options(selectinload(models.Order.items))
+        .where(models.Order.customer_id == customer_id)
+        .order_by(models.Order.created_at.desc())
+    )
+    return result.scalars().all()
+
+
+async def get_customer_orders_state(db: AsyncSession, customer_id: int):
+    """See crud.get_customer_orders_state."""
+    result = await db.execute(
+        select(
+            func.count(models.Order.id),
+            func.max(models.Order.id),
+            func.max(models.Order.updated_at)
+        ).where(models.Order.customer_id == customer_id)
+    )
+    return result.one()
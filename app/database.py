@@ -1,15 +1,87 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from .config import settings
+from .slow_query_log import slow_query_log
 
-# The `connect_args` is needed only for SQLite.
-# It's to prevent "ProgrammingError: SQLite objects created in a thread can only be used in that same thread."
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
+# An async driver in DATABASE_URL (e.g. "sqlite+aiosqlite:///./flowers.db")
+# switches the hot endpoints to an AsyncSession. Everything else keeps using
+# the sync engine, built from the same URL with the matching sync driver.
+ASYNC_DRIVERS = {
+    "sqlite+aiosqlite": "sqlite",
+    "postgresql+asyncpg": "postgresql+psycopg2",
+}
+
+database_url = make_url(settings.DATABASE_URL)
+ASYNC_MODE = database_url.drivername in ASYNC_DRIVERS
+sync_database_url = (
+    database_url.set(drivername=ASYNC_DRIVERS[database_url.drivername])
+    if ASYNC_MODE else database_url
 )
 
+IS_SQLITE = sync_database_url.get_backend_name() == "sqlite"
+
+
+def engine_options(url=sync_database_url) -> dict:
+    """Engine arguments for a (sync) database URL, from the pool settings."""
+    if url.get_backend_name() == "sqlite":
+        # The `connect_args` is needed only for SQLite.
+        # It's to prevent "ProgrammingError: SQLite objects created in a thread can only be used in that same thread."
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+engine = create_engine(sync_database_url, **engine_options())
+
+
+def configure_sqlite_profile(sync_engine):
+    """
+    Production SQLite profile.
+    WAL lets readers of the catalog run while an order is being written;
+    busy_timeout makes writers wait for the lock instead of failing with
+    "database is locked". Connections of write sessions (WriteSessionLocal)
+    start with BEGIN IMMEDIATE, taking the write lock before their first read:
+    concurrent checkouts then queue one after another, instead of reading a
+    snapshot and failing with SQLITE_BUSY when upgrading it to a write.
+    Other sessions keep pysqlite's default of beginning only before the first write.
+    """
+    @event.listens_for(sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    @event.listens_for(sync_engine, "begin")
+    def _begin_immediate(conn):
+        if conn.get_execution_options().get("sqlite_immediate"):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+SQLITE_PROFILE = settings.SQLITE_PRODUCTION_PROFILE and IS_SQLITE
+if SQLITE_PROFILE:
+    configure_sqlite_profile(engine)
+
+if settings.SLOW_QUERY_LOG:
+    slow_query_log.instrument(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sessions for write-heavy requests (order checkout). With the SQLite profile
+# they take the write lock up front, so concurrent commits queue on busy_timeout.
+WriteSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine.execution_options(sqlite_immediate=True)
+)
 
 Base = declarative_base()
 
@@ -19,4 +91,49 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Dependency to get a DB session for a write transaction
+def get_write_db():
+    db = WriteSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async_engine = None
+AsyncSessionLocal = None
+AsyncWriteSessionLocal = None
+
+if ASYNC_MODE:
+    # Requires the async driver (aiosqlite / asyncpg) and greenlet
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(
+        database_url, **({} if IS_SQLITE else engine_options())
+    )
+    if SQLITE_PROFILE:
+        configure_sqlite_profile(async_engine.sync_engine)
+    if settings.SLOW_QUERY_LOG:
+        slow_query_log.instrument(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    AsyncWriteSessionLocal = async_sessionmaker(
+        async_engine.execution_options(sqlite_immediate=True),
+        autoflush=False, expire_on_commit=False
+    )
+
+
+# Dependency to get an async DB session (only in async mode)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency to get an async DB session for a write transaction (only in async mode)
+async def get_async_write_db():
+    async with AsyncWriteSessionLocal() as db:
+        yield db
@@ -0,0 +1,58 @@
+"""
+Idempotency-Key support for retry-safe POST requests.
+
+The first request with a given key stores its response; retries with the
+same key and body get that response back without running the handler again.
+"""
+import hashlib
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from . import crud
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+# An unfinished claim older than this is treated as abandoned (worker crashed)
+IN_PROGRESS_TIMEOUT = timedelta(minutes=5)
+# How often a worker deletes expired keys, in seconds
+SWEEP_INTERVAL = 600
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+def request_fingerprint(body: str) -> str:
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def claim(db: Session, user_id: int, key: str, request_hash: str):
+    """Claim `key` for this user. Returns (record, claimed); see crud.claim_idempotency_key."""
+    now = datetime.utcnow()
+    maybe_sweep(db)
+    return crud.claim_idempotency_key(
+        db,
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        expires_at=now + IDEMPOTENCY_KEY_TTL,
+        stale_before=now - IN_PROGRESS_TIMEOUT
+    )
+
+
+def maybe_sweep(db: Session):
+    """Delete expired keys at most once per SWEEP_INTERVAL per process."""
+    global _last_sweep
+    now = time.monotonic()
+    with _sweep_lock:
+        if now - _last_sweep < SWEEP_INTERVAL:
+            return
+        _last_sweep = now
+    deleted = crud.cleanup_expired_idempotency_keys(db)
+    if deleted:
+        logger.info(f"Deleted {deleted} expired idempotency keys")
@@ -1,24 +1,52 @@
 """
 Главный модуль FastAPI приложения
 """
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
-from . import models
-from .database import engine
-from .routers import auth_router, flowers, users, orders, notifications, pages
+from . import metrics
+from .telegram import shared_bot
+from .config import settings
+from .database import ASYNC_MODE, async_engine, engine
+from .routers import auth_router, flowers, users, orders, notifications, pages, monitoring
+
+# Схемой БД управляет Alembic (alembic upgrade head), при старте таблицы не создаются
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Один клиент Telegram на процесс: уведомления о заказах используют его
+    пул соединений вместо нового подключения к Bot API на каждое сообщение
+    """
+    await shared_bot.start()
+    try:
+        yield
+    finally:
+        await shared_bot.stop()
 
-# Создание таблиц в БД
-models.Base.metadata.create_all(bind=engine)
 
 # Создание приложения FastAPI
 app = FastAPI(
     title="Romantic Flower Farm",
     description="API для интернет-магазина оптовой продажи цветов",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# --- Метрики запросов (Server-Timing и /metrics) ---
+if settings.REQUEST_METRICS:
+    metrics.instrument_engine(engine)
+    if async_engine is not None:
+        metrics.instrument_engine(async_engine.sync_engine)
+    app.add_middleware(
+        metrics.RequestMetricsMiddleware,
+        registry=metrics.registry,
+        server_timing_header=settings.SERVER_TIMING_HEADER,
+    )
+
 # --- Path Configuration ---
 BASE_DIR = Path(__file__).resolve().parent
 UPLOADS_DIR = BASE_DIR / "static" / "uploads"
@@ -36,9 +64,16 @@ app.mount(
 )
 
 # --- Подключение роутеров ---
+if ASYNC_MODE:
+    # Асинхронные версии горячих эндпоинтов регистрируются первыми и
+    # перекрывают синхронные с теми же путями
+    from .routers import async_routes
+    app.include_router(async_routes.router)
+
 app.include_router(auth_router.router)
 app.include_router(flowers.router)
 app.include_router(users.router)
 app.include_router(orders.router)
 app.include_router(notifications.router)
 app.include_router(pages.router)
+app.include_router(monitoring.router)
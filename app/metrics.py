@@ -0,0 +1,296 @@
+"""
+Request timing: latency, DB time and serialization time per route.
+
+RequestMetricsMiddleware is a plain ASGI middleware (no BaseHTTPMiddleware,
+which copies every response through a stream). For each request it records:
+- the total time, up to the last byte of the response body
+  (background tasks that run afterwards are not counted);
+- the time and number of SQL statements, from engine events
+  (instrument_engine); the per-request counters live in a contextvar,
+  which follows the request into the threadpool;
+- the serialization time: from the moment the endpoint returned
+  (marked by TimedRoute) to the start of the response, i.e. response
+  model validation and JSON encoding.
+
+The timings are sent in the Server-Timing header and accumulated per route
+for the Prometheus endpoint /metrics, together with the latency of Telegram
+notifications (observe_notification, from telegram.py). Everything is updated on the event loop
+thread, so the registry needs no locks.
+
+Metrics are kept per worker process: with several gunicorn workers each
+scrape sees only the worker that answered it.
+"""
+import inspect
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Requests that matched no route share one label, so scanners can't blow up the series count
+UNMATCHED_ROUTE = "unmatched"
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+_QUERY_STARTED = "metrics_query_started"
+
+
+class RequestTimings:
+    __slots__ = ("started", "db_time", "db_queries", "endpoint_done")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.endpoint_done: Optional[float] = None
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def instrument_engine(sync_engine):
+    """Count statements and their time for the current request. For async engines pass .sync_engine."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_timings.get() is not None:
+            conn.info.setdefault(_QUERY_STARTED, []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        timings = _current_timings.get()
+        started = conn.info.get(_QUERY_STARTED)
+        if timings is not None and started:
+            timings.db_time += time.perf_counter() - started.pop()
+            timings.db_queries += 1
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get(_QUERY_STARTED):
+            conn.info[_QUERY_STARTED].pop()
+
+
+def _mark_endpoint_done():
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.endpoint_done = time.perf_counter()
+
+
+def _timed_endpoint(endpoint):
+    if inspect.iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    else:
+        @wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that marks when its endpoint returns; the rest until the response starts is serialization."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+class RouteStats:
+    __slots__ = ("bucket_counts", "count", "total_time", "db_time", "db_queries", "serialize_time")
+
+    def __init__(self):
+        # The last slot counts requests slower than the largest bucket (+Inf)
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total_time = 0.0
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.serialize_time = 0.0
+
+
+class LatencyHistogram:
+    __slots__ = ("bucket_counts", "count", "total_time")
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total_time = 0.0
+
+    def observe(self, duration: float):
+        self.bucket_counts[bisect_left(LATENCY_BUCKETS, duration)] += 1
+        self.count += 1
+        self.total_time += duration
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+        self.notifications: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def observe(self, method: str, route: str, status: int, duration: float,
+                timings: RequestTimings, serialize_time: float):
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.bucket_counts[bisect_left(LATENCY_BUCKETS, duration)] += 1
+        stats.count += 1
+        stats.total_time += duration
+        stats.db_time += timings.db_time
+        stats.db_queries += timings.db_queries
+        stats.serialize_time += serialize_time
+        key = (method, route, status)
+        self.responses[key] = self.responses.get(key, 0) + 1
+
+    def observe_notification(self, kind: str, outcome: str, duration: float):
+        """Time of one Telegram notification ("order"), outcome "sent" or "failed"."""
+        histogram = self.notifications.get((kind, outcome))
+        if histogram is None:
+            histogram = self.notifications[(kind, outcome)] = LatencyHistogram()
+        histogram.observe(duration)
+
+    def clear(self):
+        self.routes.clear()
+        self.responses.clear()
+        self.notifications.clear()
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP http_request_duration_seconds Time to the last byte of the response.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), stats in sorted(self.routes.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.total_time:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {stats.count}")
+
+        for name, kind, help_text, attr in (
+            ("http_request_db_seconds_total", "counter", "Time spent in SQL statements.", "db_time"),
+            ("http_request_db_queries_total", "counter", "SQL statements executed.", "db_queries"),
+            ("http_request_serialization_seconds_total", "counter",
+             "Time from the endpoint's return to the start of the response.", "serialize_time"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (method, route), stats in sorted(self.routes.items()):
+                value = getattr(stats, attr)
+                value = f"{value:.6f}" if isinstance(value, float) else value
+                lines.append(f'{name}{{method="{method}",route="{_escape(route)}"}} {value}')
+
+        lines.append("# HELP http_responses_total Responses by status code.")
+        lines.append("# TYPE http_responses_total counter")
+        for (method, route, status), count in sorted(self.responses.items()):
+            lines.append(f'http_responses_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+        lines.append("# HELP telegram_notification_duration_seconds Time to send a Telegram notification.")
+        lines.append("# TYPE telegram_notification_duration_seconds histogram")
+        for (kind, outcome), histogram in sorted(self.notifications.items()):
+            labels = f'kind="{kind}",outcome="{outcome}"'
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'telegram_notification_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'telegram_notification_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"telegram_notification_duration_seconds_sum{{{labels}}} {histogram.total_time:.6f}")
+            lines.append(f"telegram_notification_duration_seconds_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def route_label(scope) -> str:
+    """Route template of the request ("/flowers/{flower_id}"), "/static/{path}" for mounted apps."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path_format
+    if "app_root_path" in scope:
+        # Set by a Mount, which extends root_path with its prefix
+        return scope["root_path"][len(scope["app_root_path"]):] + "/{path}"
+    return UNMATCHED_ROUTE
+
+
+def server_timing(total: float, timings: RequestTimings, serialize_time: Optional[float]) -> str:
+    parts = [
+        f"app;dur={total * 1000:.1f}",
+        f'db;dur={timings.db_time * 1000:.1f};desc="{timings.db_queries} queries"',
+    ]
+    if serialize_time is not None:
+        parts.append(f"serialize;dur={serialize_time * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app, registry: MetricsRegistry, server_timing_header: bool = True):
+        self.app = app
+        self.registry = registry
+        self.server_timing_header = server_timing_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        status = 500
+        serialize_time = 0.0
+        observed = False
+
+        def observe():
+            nonlocal observed
+            observed = True
+            self.registry.observe(
+                scope["method"] if scope["method"] in HTTP_METHODS else "other", route_label(scope), status, time.perf_counter() - timings.started,
+                timings, serialize_time
+            )
+
+        async def send_with_timing(message):
+            nonlocal status, serialize_time
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                status = message["status"]
+                if timings.endpoint_done is not None:
+                    serialize_time = now - timings.endpoint_done
+                if self.server_timing_header:
+                    header = server_timing(
+                        now - timings.started, timings,
+                        serialize_time if timings.endpoint_done is not None else None
+                    )
+                    message = {**message, "headers": [
+                        *message.get("headers", []), (b"server-timing", header.encode("latin-1"))
+                    ]}
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                await send(message)
+                if not observed:
+                    observe()
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timings.reset(token)
+            if not observed:
+                observe()
+
+
+registry = MetricsRegistry()
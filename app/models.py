@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, func
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index, UniqueConstraint, func, event, DDL
 from .database import Base
 import datetime
 
 class FlowerBatch(Base):
     __tablename__ = "flower_batches"
+    __table_args__ = (
+        # delete_old_flowers: sold batches by sold_at, available ones by created_at
+        Index("ix_flower_batches_status_sold_at", "status", "sold_at"),
+        Index("ix_flower_batches_status_created_at", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -12,8 +17,9 @@ class FlowerBatch(Base):
     quantity = Column(Integer)
     image_url = Column(String)
     status = Column(String, default="available") # available or sold
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     sold_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)  # ETag source
 
 from sqlalchemy.orm import relationship
 from sqlalchemy import ForeignKey
@@ -38,13 +44,20 @@ class User(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # get_orders_by_customer: filter by customer, newest first
+        Index("ix_orders_customer_id_created_at", "customer_id", "created_at"),
+        # get_order_summaries: filter by status, newest first
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("users.id"))
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     status = Column(String, default="new") # e.g., 'new', 'completed', 'cancelled'
     customer_comment = Column(String, nullable=True)
     customer_name = Column(String, nullable=True)  # Denormalized: preserves name at time of order
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)  # ETag source
     
     customer = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
@@ -54,7 +67,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     flower_batch_id = Column(Integer, ForeignKey("flower_batches.id"), nullable=True)
     quantity = Column(Integer)
     price_at_time_of_order = Column(Float)
@@ -64,21 +77,85 @@ class OrderItem(Base):
     flower_batch = relationship("FlowerBatch")
 
 
-from sqlalchemy import Boolean
+from sqlalchemy import Boolean, BigInteger
 
 class TelegramSubscriber(Base):
     __tablename__ = "telegram_subscribers"
 
-    chat_id = Column(Integer, primary_key=True, index=True)
+    chat_id = Column(BigInteger, primary_key=True, index=True)  # Telegram ids exceed 32 bits
     is_active = Column(Boolean, default=True)
 
 
+class TelegramFile(Base):
+    """
+    file_id Telegram gave an uploaded image (see telegram_files.py).
+    Keyed by content hash too, so a replaced file is uploaded again;
+    file_ids only work for the bot that uploaded them.
+    """
+    __tablename__ = "telegram_files"
+    __table_args__ = (UniqueConstraint("bot_id", "path", "sha256", name="uq_telegram_files_bot_path_sha256"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    bot_id = Column(BigInteger, nullable=False)
+    path = Column(String, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    file_id = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class BroadcastJob(Base):
+    """
+    Broadcast about new flowers, sent by the worker in run_bot.py.
+    payload holds the flower batches as JSON; who got the message is tracked
+    per subscriber in broadcast_deliveries, so an interrupted job resumes
+    with the pending ones only.
+    """
+    __tablename__ = "broadcast_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="pending", index=True)  # pending, running, completed, failed
+    payload = Column(Text, nullable=False)
+    error = Column(String, nullable=True)
+    deactivated = Column(Integer, nullable=False, default=0, server_default="0")  # Unreachable subscribers switched off
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    deliveries = relationship("BroadcastDelivery", back_populates="job", cascade="all, delete-orphan")
+
+
+class BroadcastDelivery(Base):
+    __tablename__ = "broadcast_deliveries"
+    __table_args__ = (
+        UniqueConstraint("job_id", "chat_id", name="uq_broadcast_deliveries_job_chat"),
+        # Pending deliveries of a job and its progress by status
+        Index("ix_broadcast_deliveries_job_id_status", "job_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("broadcast_jobs.id"), nullable=False)
+    chat_id = Column(BigInteger, nullable=False)
+    # pending, sent, failed, blocked (chat unreachable) or skipped (unsubscribed before the send)
+    status = Column(String, nullable=False, default="pending")
+    error = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    job = relationship("BroadcastJob", back_populates="deliveries")
+
+
 class RefreshToken(Base):
     """
     Stores refresh tokens for long-term sessions.
     Each token allows getting a new access token without re-login.
     """
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # Active tokens of a user: user_id + not revoked + not expired
+        Index("ix_refresh_tokens_user_id_revoked_expires", "user_id", "is_revoked", "expires_at"),
+        # cleanup_expired_tokens: expired OR revoked, one index per side of the OR
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+        Index("ix_refresh_tokens_is_revoked", "is_revoked"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     token = Column(String, unique=True, index=True, nullable=False)
@@ -89,3 +166,55 @@ class RefreshToken(Base):
     is_revoked = Column(Boolean, default=False)
 
     user = relationship("User")
+
+
+class CatalogVersion(Base):
+    """
+    Single-row counter bumped by every write that changes the catalog.
+    Shared by all workers through the database, so each worker can tell
+    whether its in-process catalog cache is still current.
+    """
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+event.listen(
+    CatalogVersion.__table__,
+    "after_create",
+    DDL("INSERT INTO catalog_version (id, version) VALUES (1, 0)")
+)
+
+
+class IdempotencyKey(Base):
+    """
+    First response to a POST /orders/ request sent with an Idempotency-Key header.
+    Retries with the same key are answered from here without re-running the order.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    request_hash = Column(String, nullable=False)  # Same key with a different body is rejected
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is in progress
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class DataMigration(Base):
+    """
+    Progress of a batched data backfill (see migrations/backfill.py).
+    last_id is the highest primary key already processed, so an interrupted
+    backfill resumes from there instead of starting over.
+    """
+    __tablename__ = "data_migrations"
+
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    rows_updated = Column(Integer, nullable=False, default=0)
+    completed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
@@ -0,0 +1,100 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token holding the sort key of the last row
+on the previous page. The next page is fetched with
+`WHERE (created_at, id) < (:created_at, :id)`, which walks the index
+and costs the same for page 1 and page 1000 - unlike OFFSET.
+"""
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, tuple_
+from sqlalchemy.orm import Query
+
+# Approximate totals are cached for this long (seconds) per key
+TOTAL_CACHE_TTL = 60
+# At most this many keys; filter combinations of the admin summary each get one
+TOTAL_CACHE_MAX_KEYS = 256
+
+_total_cache: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+_total_cache_lock = threading.Lock()
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode sort key values of a row into an opaque cursor string."""
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(raw, list) or len(raw) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    values = []
+    for column, value in zip(columns, raw):
+        if isinstance(column.type, DateTime):
+            if not isinstance(value, str):
+                raise ValueError("Invalid cursor")
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, int):
+            raise ValueError("Invalid cursor")
+        values.append(value)
+    return values
+
+
+def keyset_page(query: Query, columns: Sequence, cursor: Optional[str], per_page: int):
+    """
+    Fetch one page of `query` ordered by `columns` descending.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    Raises ValueError if per_page is less than 1.
+    """
+    if per_page < 1:
+        raise ValueError("per_page must be at least 1")
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        query = query.filter(tuple_(*columns) < tuple_(*values))
+
+    rows = query.order_by(*[c.desc() for c in columns]).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return items, next_cursor
+
+
+def cached_total(key: str, query: Query) -> int:
+    """
+    Row count of `query`, cached for TOTAL_CACHE_TTL seconds per key.
+    The value may be slightly stale; it is meant for "about N items" UI hints.
+    Expired keys are dropped on every write, and the least recently used
+    ones beyond TOTAL_CACHE_MAX_KEYS.
+    """
+    now = time.monotonic()
+    with _total_cache_lock:
+        cached = _total_cache.get(key)
+        if cached and now - cached[0] < TOTAL_CACHE_TTL:
+            _total_cache.move_to_end(key)
+            return cached[1]
+
+    total = query.count()
+    with _total_cache_lock:
+        _total_cache[key] = (now, total)
+        _total_cache.move_to_end(key)
+        for expired in [k for k, (counted_at, _) in _total_cache.items() if now - counted_at >= TOTAL_CACHE_TTL]:
+            del _total_cache[expired]
+        while len(_total_cache) > TOTAL_CACHE_MAX_KEYS:
+            _total_cache.popitem(last=False)
+    return total
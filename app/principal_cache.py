@@ -0,0 +1,65 @@
+"""
+Short-lived in-process cache of authenticated users.
+
+get_current_user runs on every authenticated request; caching the user for a
+few seconds saves a SELECT per request. Writes that change a user
+(crud.update_user, update_user_self, delete_user, revoke_all_user_tokens)
+invalidate the entry in this worker; other workers catch up within the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from . import schemas
+from .config import settings
+
+
+class PrincipalCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, schemas.User]]" = OrderedDict()
+        # Bumped on every invalidation so a lookup that raced with a write
+        # does not put the pre-write user back into the cache
+        self._generation = 0
+
+    def get(self, username: str) -> Tuple[Optional[schemas.User], int]:
+        """Return (user or None, generation). Pass the generation to put()."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None:
+                expires_at, user = entry
+                if expires_at > now:
+                    self._entries.move_to_end(username)
+                    return user, self._generation
+                del self._entries[username]
+            return None, self._generation
+
+    def put(self, user: schemas.User, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[user.username] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user.username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._generation += 1
+            for username in [u for u, (_, user) in self._entries.items() if user.id == user_id]:
+                del self._entries[username]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL
+)
@@ -0,0 +1,94 @@
+"""
+Асинхронные версии самых нагруженных эндпоинтов.
+
+Подключаются в main.py раньше обычных роутеров, только если DATABASE_URL
+указывает асинхронный драйвер (database.ASYNC_MODE). Пути и ответы те же,
+что у синхронных версий в flowers.py и orders.py.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import crud_async, idempotency, schemas
+from ..catalog_cache import catalog_cache
+from ..database import get_async_db, get_async_write_db
+from ..etag import conditional_response
+from ..metrics import TimedRoute
+from .dependencies import get_current_user
+from . import flowers, orders
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/flowers/", response_model=List[schemas.FlowerBatch], tags=["flowers"])
+async def read_flowers_async(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Получить список всех цветов (асинхронный режим БД)
+    """
+    version = await crud_async.get_catalog_version(db)
+    etag = flowers.catalog_etag(version, skip, limit)
+    not_modified = conditional_response(request, etag)
+    if not_modified:
+        return not_modified
+
+    body = catalog_cache.get(version, (skip, limit))
+    if body is None:
+        body = flowers.serialize_flowers(await crud_async.get_flowers(db, skip=skip, limit=limit))
+        catalog_cache.put(version, (skip, limit), body)
+    return flowers.catalog_response(body, etag)
+
+
+@router.get("/orders/me/", response_model=List[schemas.Order], tags=["orders"])
+async def read_my_orders_async(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(get_current_user)
+):
+    """
+    Получить заказы текущего пользователя (асинхронный режим БД)
+    """
+    if current_user.role != 'customer':
+        raise HTTPException(status_code=403, detail="Admins cannot have order history.")
+
+    state = await crud_async.get_customer_orders_state(db, customer_id=current_user.id)
+    etag = orders.my_orders_etag(current_user.id, state)
+    not_modified = conditional_response(request, etag, cache_control=orders.MY_ORDERS_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
+    return orders.order_list.response(
+        await crud_async.get_orders_by_customer(db, customer_id=current_user.id),
+        headers={"ETag": etag, "Cache-Control": orders.MY_ORDERS_CACHE_CONTROL}
+    )
+
+
+@router.post("/orders/", response_model=schemas.Order, tags=["orders"])
+async def create_order_endpoint_async(
+    order: schemas.OrderCreate,
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(
+        None, alias=idempotency.IDEMPOTENCY_KEY_HEADER, max_length=255
+    ),
+    db: AsyncSession = Depends(get_async_write_db),
+    current_user: schemas.User = Depends(get_current_user)
+):
+    """
+    Создать новый заказ (асинхронный режим БД).
+    Логика та же, что в orders.place_order, выполняется на асинхронном соединении.
+    """
+    result = await db.run_sync(
+        orders.place_order, order, background_tasks, idempotency_key, current_user
+    )
+    if isinstance(result, Response):
+        return result
+    # Сериализуем здесь: после выхода из run_sync ленивая загрузка недоступна
+    return Response(
+        content=schemas.Order.model_validate(result).model_dump_json(),
+        media_type="application/json"
+    )
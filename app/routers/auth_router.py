@@ -4,14 +4,16 @@
 from datetime import timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from .. import crud, schemas, auth
 from ..database import get_db
+from ..metrics import TimedRoute
 from .dependencies import get_current_user
 
-router = APIRouter(tags=["auth"])
+router = APIRouter(tags=["auth"], route_class=TimedRoute)
 
 # Cookie settings for refresh token
 REFRESH_TOKEN_COOKIE_NAME = "refresh_token"
@@ -49,9 +51,11 @@ async def login_for_access_token(
     """
     Получить токен доступа и refresh токен.
     Refresh токен также устанавливается в HttpOnly cookie.
+    Запросы к БД выполняются в пуле потоков, проверка bcrypt - в отдельном
+    ограниченном пуле, чтобы не блокировать цикл событий.
     """
-    user = crud.get_user_by_username(db, username=form_data.username)
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(crud.get_user_by_username, db, username=form_data.username)
+    if not user or not await auth.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -65,7 +69,8 @@ async def login_for_access_token(
     device_info = request.headers.get("User-Agent", "Unknown")[:200]  # Limit length
     
     # Store refresh token in database
-    crud.create_refresh_token(
+    await run_in_threadpool(
+        crud.create_refresh_token,
         db=db,
         token=refresh_token,
         user_id=user.id,
@@ -85,7 +90,7 @@ async def login_for_access_token(
 
 
 @router.post("/token/refresh", response_model=schemas.TokenWithRefresh)
-async def refresh_access_token(
+def refresh_access_token(
     response: Response,
     request: Request,
     db: Session = Depends(get_db),
@@ -151,7 +156,7 @@ async def refresh_access_token(
 
 
 @router.post("/token/logout")
-async def logout(
+def logout(
     response: Response,
     request: Request,
     db: Session = Depends(get_db),
@@ -176,7 +181,7 @@ async def logout(
 
 
 @router.post("/token/logout-all")
-async def logout_all_devices(
+def logout_all_devices(
     response: Response,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
@@ -195,7 +200,7 @@ async def logout_all_devices(
 
 
 @router.get("/token/sessions")
-async def get_active_sessions(
+def get_active_sessions(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
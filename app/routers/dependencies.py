@@ -8,16 +8,19 @@ from jose import JWTError, jwt
 
 from .. import crud, schemas, auth
 from ..database import get_db
+from ..principal_cache import principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-async def get_current_user(
+def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> schemas.User:
     """
-    Получить текущего пользователя по токену
+    Получить текущего пользователя по токену.
+    Пользователь кэшируется на PRINCIPAL_CACHE_TTL секунд, чтобы не делать
+    SELECT на каждый запрос.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,9 +36,15 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = crud.get_user_by_username(db, username=token_data.username)
-    if user is None:
+    user, generation = principal_cache.get(token_data.username)
+    if user is not None:
+        return user
+
+    db_user = crud.get_user_by_username(db, username=token_data.username)
+    if db_user is None:
         raise credentials_exception
+    user = schemas.User.model_validate(db_user)
+    principal_cache.put(user, generation)
     return user
 
 
@@ -3,21 +3,39 @@
 """
 import shutil
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from .. import crud, schemas
+from ..catalog_cache import catalog_cache
 from ..database import get_db
+from ..etag import make_etag, conditional_response
+from ..metrics import TimedRoute
+from ..serialization import ListSerializer, json_response
 from .dependencies import get_current_admin_user
 
-router = APIRouter(prefix="/flowers", tags=["flowers"])
+router = APIRouter(prefix="/flowers", tags=["flowers"], route_class=TimedRoute)
 
 # Путь для загрузки файлов
 BASE_DIR = Path(__file__).resolve().parent.parent
 UPLOADS_DIR = BASE_DIR / "static" / "uploads"
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
+flower_list = ListSerializer(schemas.FlowerBatch)
+
+
+def serialize_flowers(flowers) -> bytes:
+    return flower_list.dump(flowers)
+
+
+def catalog_etag(version: int, skip: int, limit: int) -> str:
+    return make_etag("flowers", version, skip, limit)
+
+
+def catalog_response(body: bytes, etag: str) -> Response:
+    return json_response(body, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
 
 @router.post("/", response_model=schemas.FlowerBatch)
 def create_flower(
@@ -50,40 +68,77 @@ def create_flower(
 
 @router.get("/", response_model=List[schemas.FlowerBatch])
 def read_flowers(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
     """
-    Получить список всех цветов
+    Получить список всех цветов.
+    Ответ берётся из кэша каталога, пока версия каталога в БД не изменилась.
+    ETag строится из версии каталога, поэтому 304 отдаётся без запроса списка.
     """
-    flowers = crud.get_flowers(db, skip=skip, limit=limit)
-    return flowers
+    version = crud.get_catalog_version(db)
+    etag = catalog_etag(version, skip, limit)
+    not_modified = conditional_response(request, etag)
+    if not_modified:
+        return not_modified
+
+    body = catalog_cache.get(version, (skip, limit))
+    if body is None:
+        flowers = crud.get_flowers(db, skip=skip, limit=limit)
+        body = serialize_flowers(flowers)
+        catalog_cache.put(version, (skip, limit), body)
+    return catalog_response(body, etag)
 
 
 @router.get("/paginated/", response_model=schemas.PaginatedResponse[schemas.FlowerBatch])
 def read_flowers_paginated(
-    page: int = 1,
-    per_page: int = 20,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    keyset: bool = False,
+    with_total: bool = False,
     db: Session = Depends(get_db)
 ):
     """
-    Получить список цветов с пагинацией
+    Получить список цветов с пагинацией.
+    Режим курсора (keyset=true или cursor=...) не выполняет OFFSET и COUNT:
+    следующая страница запрашивается по next_cursor, with_total=true
+    добавляет приблизительное общее количество.
     """
+    if keyset or cursor:
+        try:
+            return crud.get_flowers_keyset(db, cursor=cursor, per_page=per_page, with_total=with_total)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     return crud.get_flowers_paginated(db, page=page, per_page=per_page)
 
 
 @router.get("/{flower_id}", response_model=schemas.FlowerBatch)
 def read_flower(
     flower_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Получить цветок по ID
     """
+    found, updated_at = crud.get_flower_updated_at(db, flower_id=flower_id)
+    if not found:
+        raise HTTPException(status_code=404, detail="Flower not found")
+
+    etag = make_etag("flower", flower_id, updated_at)
+    not_modified = conditional_response(request, etag)
+    if not_modified:
+        return not_modified
+
     db_flower = crud.get_flower(db, flower_id=flower_id)
     if db_flower is None:
         raise HTTPException(status_code=404, detail="Flower not found")
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
     return db_flower
 
 
@@ -0,0 +1,57 @@
+"""
+Роутер для мониторинга
+"""
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from .. import schemas
+from ..metrics import TimedRoute, registry
+from ..slow_query_log import slow_query_log
+from .dependencies import get_current_admin_user
+
+router = APIRouter(tags=["monitoring"], route_class=TimedRoute)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics():
+    """
+    Метрики запросов в формате Prometheus: гистограммы времени ответа,
+    время и число SQL-запросов, время сериализации по каждому маршруту
+    """
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def slow_query_report(limit: int) -> schemas.SlowQueryReport:
+    return schemas.SlowQueryReport(
+        enabled=slow_query_log.enabled,
+        threshold_ms=slow_query_log.threshold * 1000,
+        since=slow_query_log.since,
+        dropped_fingerprints=slow_query_log.dropped,
+        queries=slow_query_log.top(limit),
+    )
+
+
+@router.get("/monitoring/slow-queries", response_model=schemas.SlowQueryReport)
+async def read_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    admin_user: schemas.User = Depends(get_current_admin_user)
+):
+    """
+    Самые затратные SQL-запросы этого воркера (только для админа).
+    Запросы сгруппированы по отпечатку (SQL без значений параметров) и
+    отсортированы по суммарному времени. Работает при SLOW_QUERY_LOG=true.
+    """
+    return slow_query_report(limit)
+
+
+@router.delete("/monitoring/slow-queries", response_model=schemas.SlowQueryReport)
+async def reset_slow_queries(
+    admin_user: schemas.User = Depends(get_current_admin_user)
+):
+    """
+    Сбросить статистику запросов, например перед воспроизведением проблемы (только для админа)
+    """
+    slow_query_log.reset()
+    return slow_query_report(0)
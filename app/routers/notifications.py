@@ -1,31 +1,56 @@
 """
 Роутер для уведомлений и рассылок
 """
+import json
 from datetime import datetime, timedelta
 from pathlib import Path
-from fastapi import APIRouter, Depends, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from .. import models, schemas, telegram
+from .. import crud, models, schemas
 from ..database import get_db
+from ..metrics import TimedRoute
 from .dependencies import get_current_admin_user
 
-router = APIRouter(prefix="/api", tags=["notifications"])
+router = APIRouter(prefix="/api", tags=["notifications"], route_class=TimedRoute)
 
 # Путь для загрузки файлов
 BASE_DIR = Path(__file__).resolve().parent.parent
 UPLOADS_DIR = BASE_DIR / "static" / "uploads"
 
 
-@router.post("/notify_new_flowers")
-async def notify_new_flowers(
-    background_tasks: BackgroundTasks,
+def job_progress(db: Session, job: models.BroadcastJob) -> schemas.BroadcastJob:
+    """Задание рассылки с количеством доставок по статусам"""
+    counts = crud.get_broadcast_delivery_counts(db, job.id)
+    return schemas.BroadcastJob(
+        id=job.id,
+        status=job.status,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        deactivated=job.deactivated,
+        total=sum(counts.values()),
+        **counts
+    )
+
+
+@router.post("/notify_new_flowers", response_model=schemas.BroadcastJobResponse)
+def notify_new_flowers(
     db: Session = Depends(get_db),
     admin_user: schemas.User = Depends(get_current_admin_user)
 ):
     """
-    Уведомить подписчиков о новых партиях цветов за последние 3 часа
+    Уведомить подписчиков о новых партиях цветов за последние 3 часа.
+    Рассылка ставится в очередь и отправляется ботом (run_bot.py), который
+    отмечает доставку каждому подписчику и после перезапуска продолжает
+    с неотправленных. Пока предыдущая рассылка не закончена, новая не
+    создаётся - возвращается текущая.
     """
+    active_job = crud.get_active_broadcast_job(db)
+    if active_job:
+        return {"message": "Предыдущая рассылка ещё не закончена.", "job": job_progress(db, active_job)}
+
     three_hours_ago = datetime.utcnow() - timedelta(hours=3)
     new_flowers = db.query(models.FlowerBatch).filter(
         models.FlowerBatch.created_at >= three_hours_ago
@@ -45,6 +70,40 @@ async def notify_new_flowers(
         for f in new_flowers
     ]
 
-    background_tasks.add_task(telegram.broadcast_new_flowers, flower_details_list)
-    
-    return {"message": f"Рассылка о {len(new_flowers)} новых партиях запущена!"}
+    job = crud.create_broadcast_job(db, json.dumps(flower_details_list, ensure_ascii=False))
+
+    return {
+        "message": f"Рассылка о {len(new_flowers)} новых партиях запущена!",
+        "job": job_progress(db, job)
+    }
+
+
+@router.get("/notify_new_flowers", response_model=schemas.BroadcastJobResponse)
+def read_latest_broadcast(
+    db: Session = Depends(get_db),
+    admin_user: schemas.User = Depends(get_current_admin_user)
+):
+    """
+    Последняя рассылка и её ход (только для админа)
+    """
+    job = crud.get_latest_broadcast_job(db)
+    if job is None:
+        return {"message": "Рассылок ещё не было."}
+    return {"message": "", "job": job_progress(db, job)}
+
+
+@router.get("/notify_new_flowers/{job_id}", response_model=schemas.BroadcastJob)
+def read_broadcast(
+    job_id: int,
+    db: Session = Depends(get_db),
+    admin_user: schemas.User = Depends(get_current_admin_user)
+):
+    """
+    Ход рассылки: сколько подписчиков получили сообщение, сколько ждут
+    отправки, не получили, недоступны (заблокировали бота, удалили аккаунт)
+    или пропущены, и сколько недоступных подписчиков отключено (только для админа)
+    """
+    job = crud.get_broadcast_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return job_progress(db, job)
@@ -1,44 +1,151 @@
 """
 Роутер для работы с заказами
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from .. import crud, schemas, telegram
-from ..database import get_db
+from .. import crud, schemas, telegram, idempotency
+from ..database import get_db, get_write_db
+from ..etag import make_etag, conditional_response
+from ..metrics import TimedRoute
+from ..serialization import ListSerializer
 from .dependencies import get_current_user, get_current_admin_user
 
-router = APIRouter(prefix="/orders", tags=["orders"])
+router = APIRouter(prefix="/orders", tags=["orders"], route_class=TimedRoute)
+
+MY_ORDERS_CACHE_CONTROL = "private, no-cache"
+
+order_list = ListSerializer(schemas.Order)
 
 
 @router.get("/me/", response_model=List[schemas.Order])
 def read_my_orders(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
     """
-    Получить заказы текущего пользователя
+    Получить заказы текущего пользователя.
+    Поддерживает If-None-Match: при неизменной истории заказов возвращает 304.
     """
     if current_user.role != 'customer':
         raise HTTPException(status_code=403, detail="Admins cannot have order history.")
-    return crud.get_orders_by_customer(db, customer_id=current_user.id)
+
+    etag = my_orders_etag(current_user.id, crud.get_customer_orders_state(db, customer_id=current_user.id))
+    not_modified = conditional_response(request, etag, cache_control=MY_ORDERS_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
+    return order_list.response(
+        crud.get_orders_by_customer(db, customer_id=current_user.id),
+        headers={"ETag": etag, "Cache-Control": MY_ORDERS_CACHE_CONTROL}
+    )
+
+
+def my_orders_etag(customer_id: int, orders_state) -> str:
+    count, last_id, last_update = orders_state
+    return make_etag("orders", customer_id, count, last_id, last_update)
 
 
 @router.post("/", response_model=schemas.Order)
 def create_order_endpoint(
     order: schemas.OrderCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(
+        None, alias=idempotency.IDEMPOTENCY_KEY_HEADER, max_length=255
+    ),
+    db: Session = Depends(get_write_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
     """
-    Создать новый заказ
+    Создать новый заказ.
+    С заголовком Idempotency-Key повторный запрос с тем же ключом и телом
+    возвращает сохранённый ответ первого запроса, не создавая новый заказ.
+    """
+    return place_order(db, order, background_tasks, idempotency_key, current_user)
+
+
+def place_order(
+    db: Session,
+    order: schemas.OrderCreate,
+    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str],
+    current_user: schemas.User
+):
+    """
+    Оформление заказа с учётом Idempotency-Key.
+    Синхронная функция: в асинхронном режиме БД вызывается через AsyncSession.run_sync.
     """
     if current_user.role != 'customer':
         raise HTTPException(status_code=403, detail="Only customers can create orders.")
 
-    result = crud.create_order(db=db, order=order, customer_id=current_user.id)
+    if not idempotency_key:
+        return _create_order(order, background_tasks, db, current_user)
+
+    request_hash = idempotency.request_fingerprint(order.model_dump_json())
+    record, claimed = idempotency.claim(db, current_user.id, idempotency_key, request_hash)
+    if not claimed:
+        if record is None:
+            # Ключ освобождён и сразу занят снова - клиент повторит запрос
+            raise HTTPException(
+                status_code=409,
+                detail="Заказ с этим Idempotency-Key ещё обрабатывается."
+            )
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key уже использован для другого заказа."
+            )
+        if record.status_code is None:
+            raise HTTPException(
+                status_code=409,
+                detail="Заказ с этим Idempotency-Key ещё обрабатывается."
+            )
+        return Response(
+            content=record.response_body,
+            status_code=record.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    record_id = record.id
+    try:
+        db_order = _create_order(order, background_tasks, db, current_user)
+    except Exception:
+        # Заказ не создан - ключ можно использовать повторно
+        db.rollback()
+        crud.release_idempotency_key(db, record_id)
+        raise
+
+    body = schemas.Order.model_validate(db_order).model_dump_json()
+    crud.complete_idempotency_key(db, record_id, status_code=200, response_body=body)
+    return Response(content=body, media_type="application/json")
+
+
+def _create_order(
+    order: schemas.OrderCreate,
+    background_tasks: BackgroundTasks,
+    db: Session,
+    current_user: schemas.User
+):
+    """
+    Создать заказ и поставить в очередь уведомление в Telegram
+    """
+    # Партии загружаются одним запросом и используются и для заказа, и для уведомления
+    flower_batches = crud.get_flowers_by_ids(
+        db, [item.flower_batch_id for item in order.items], for_update=True
+    )
+    # Снимок полей до commit: после него объекты истекают и перечитывались бы по одному
+    flower_info = {
+        flower_id: (flower.name, flower.description)
+        for flower_id, flower in flower_batches.items()
+    }
+
+    result = crud.create_order(
+        db=db, order=order, customer_id=current_user.id, flower_batches=flower_batches
+    )
     if isinstance(result, str):  # Error message returned
         raise HTTPException(status_code=400, detail=result)
     db_order = result
@@ -46,12 +153,12 @@ def create_order_endpoint(
     # Подготовка данных для Telegram уведомления
     items_details = []
     for item in db_order.items:
-        flower_batch = crud.get_flower(db, item.flower_batch_id)
+        name, description = flower_info.get(item.flower_batch_id, ("Неизвестный цветок", ""))
         items_details.append({
             "flower_batch_id": item.flower_batch_id,
             "quantity": item.quantity,
-            "name": flower_batch.name if flower_batch else "Неизвестный цветок",
-            "description": flower_batch.description if flower_batch else ""
+            "name": name,
+            "description": description or ""
         })
 
     order_details = {
@@ -80,25 +187,62 @@ def read_orders(
     admin_user: schemas.User = Depends(get_current_admin_user)
 ):
     """
-    Получить все заказы (только для админа)
+    Получить все заказы (только для админа).
+    Список сериализуется сразу в JSON, без обработки response_model.
     """
     orders = crud.get_orders(db, skip=skip, limit=limit)
-    return orders
+    return order_list.response(orders)
 
 
 @router.get("/paginated/", response_model=schemas.PaginatedResponse[schemas.Order])
 def read_orders_paginated(
-    page: int = 1,
-    per_page: int = 20,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    keyset: bool = False,
+    with_total: bool = False,
     db: Session = Depends(get_db),
     admin_user: schemas.User = Depends(get_current_admin_user)
 ):
     """
-    Получить все заказы с пагинацией (только для админа)
+    Получить все заказы с пагинацией (только для админа).
+    Режим курсора (keyset=true или cursor=...) не выполняет OFFSET и COUNT:
+    следующая страница запрашивается по next_cursor, with_total=true
+    добавляет приблизительное общее количество.
     """
+    if keyset or cursor:
+        try:
+            return crud.get_orders_keyset(db, cursor=cursor, per_page=per_page, with_total=with_total)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     return crud.get_orders_paginated(db, page=page, per_page=per_page)
 
 
+@router.get("/summary/", response_model=schemas.PaginatedResponse[schemas.OrderSummary])
+def read_order_summaries(
+    status: Optional[schemas.OrderStatus] = None,
+    created_from: Optional[date] = None,
+    created_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    per_page: int = Query(50, ge=1, le=200),
+    with_total: bool = False,
+    db: Session = Depends(get_db),
+    admin_user: schemas.User = Depends(get_current_admin_user)
+):
+    """
+    Заказы для админ-панели (только для админа): новые сверху, с контактами
+    клиента, подгруженными тем же SQL-запросом. Фильтры по статусу и датам
+    создания (включительно); следующая страница запрашивается по next_cursor.
+    """
+    try:
+        return crud.get_order_summaries(
+            db, status=status, created_from=created_from, created_to=created_to,
+            cursor=cursor, per_page=per_page, with_total=with_total
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/statuses/list")
 def get_order_statuses(
     admin_user: schemas.User = Depends(get_current_admin_user)
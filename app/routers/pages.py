@@ -4,7 +4,9 @@
 from fastapi import APIRouter
 from fastapi.responses import HTMLResponse, FileResponse
 
-router = APIRouter(tags=["pages"])
+from ..metrics import TimedRoute
+
+router = APIRouter(tags=["pages"], route_class=TimedRoute)
 
 
 @router.get("/", response_class=FileResponse)
@@ -3,21 +3,25 @@
 """
 import shutil
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from .. import crud, schemas
 from ..database import get_db
+from ..metrics import TimedRoute
+from ..serialization import ListSerializer
 from .dependencies import get_current_user, get_current_admin_user
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=TimedRoute)
 
 # Путь для загрузки файлов
 BASE_DIR = Path(__file__).resolve().parent.parent
 UPLOADS_DIR = BASE_DIR / "static" / "uploads"
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
+user_list = ListSerializer(schemas.User)
+
 
 @router.post("/", response_model=schemas.User)
 def create_user_endpoint(
@@ -63,22 +67,34 @@ def read_users(
     admin_user: schemas.User = Depends(get_current_admin_user)
 ):
     """
-    Получить список пользователей (только для админа)
+    Получить список пользователей (только для админа).
+    Список сериализуется сразу в JSON, без обработки response_model.
     """
     users = crud.get_users(db, skip=skip, limit=limit)
-    return users
+    return user_list.response(users)
 
 
 @router.get("/paginated/", response_model=schemas.PaginatedResponse[schemas.User])
 def read_users_paginated(
-    page: int = 1,
-    per_page: int = 20,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    keyset: bool = False,
+    with_total: bool = False,
     db: Session = Depends(get_db),
     admin_user: schemas.User = Depends(get_current_admin_user)
 ):
     """
-    Получить список пользователей с пагинацией (только для админа)
+    Получить список пользователей с пагинацией (только для админа).
+    Режим курсора (keyset=true или cursor=...) не выполняет OFFSET и COUNT:
+    следующая страница запрашивается по next_cursor, with_total=true
+    добавляет приблизительное общее количество.
     """
+    if keyset or cursor:
+        try:
+            return crud.get_users_keyset(db, cursor=cursor, per_page=per_page, with_total=with_total)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     return crud.get_users_paginated(db, page=page, per_page=per_page)
 
 
@@ -93,7 +109,7 @@ async def read_users_me(
 
 
 @router.patch("/me/", response_model=schemas.User)
-async def update_users_me(
+def update_users_me(
     user_update: schemas.UserSelfUpdate,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_user)
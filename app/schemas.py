@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from enum import Enum
 import datetime
 
@@ -19,11 +19,16 @@ from typing import TypeVar, Generic
 T = TypeVar('T')
 
 class PaginatedResponse(BaseModel, Generic[T]):
+    """
+    Page of items. Offset mode fills total/page/pages;
+    cursor (keyset) mode fills next_cursor and, on request, an approximate total.
+    """
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     per_page: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 # --- Flower Schemas ---
 class FlowerBatchBase(BaseModel):
@@ -133,10 +138,23 @@ class Order(OrderBase):
     status: OrderStatus
     customer_name: Optional[str] = None  # Denormalized: preserves name at time of order
     items: List[OrderItem] = []
-    
+
     class Config:
         from_attributes = True
 
+class OrderCustomer(BaseModel):
+    """Customer contact fields shown next to an order in the admin panel"""
+    id: int
+    username: str
+    contact_name: Optional[str] = None
+    address: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class OrderSummary(Order):
+    customer: Optional[OrderCustomer] = None  # None if the customer was deleted
+
 # --- Telegram Subscriber Schemas ---
 class TelegramSubscriberBase(BaseModel):
     chat_id: int
@@ -148,4 +166,59 @@ class TelegramSubscriber(TelegramSubscriberBase):
     is_active: bool
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# --- Broadcast Schemas ---
+class BroadcastJobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class BroadcastJob(BaseModel):
+    id: int
+    status: BroadcastJobStatus
+    error: Optional[str] = None
+    created_at: datetime.datetime
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    # Deliveries by status
+    total: int = 0
+    pending: int = 0
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0  # Unreachable: the bot was blocked, the account deleted or the chat not found
+    skipped: int = 0  # Unsubscribed or deactivated before the send
+    deactivated: int = 0  # Subscribers deactivated after this broadcast
+
+    class Config:
+        from_attributes = True
+
+class BroadcastJobResponse(BaseModel):
+    message: str
+    job: Optional[BroadcastJob] = None
+
+# --- Monitoring Schemas ---
+class SlowQuerySample(BaseModel):
+    duration_ms: float
+    caller: str
+    parameters: Any  # Redacted: strings and bytes are reduced to their length
+    at: str
+
+class QueryFingerprint(BaseModel):
+    fingerprint: str
+    statement: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    slow_calls: int
+    callers: Dict[str, int]
+    last_slow: Optional[SlowQuerySample] = None
+
+class SlowQueryReport(BaseModel):
+    enabled: bool
+    threshold_ms: float
+    since: datetime.datetime
+    dropped_fingerprints: int
+    queries: List[QueryFingerprint]
@@ -0,0 +1,35 @@
+"""
+Fast JSON serialization for list endpoints.
+
+With a response_model FastAPI validates the returned ORM rows in the
+threadpool and, depending on its version, encodes them through
+jsonable_encoder and the stdlib json module. For lists of hundreds of rows
+that is most of the request's CPU time.
+
+ListSerializer does the same work in pydantic-core: the rows are validated
+from their attributes into the response schema and written straight to JSON
+bytes, without building intermediate dicts. Endpoints return the bytes in a
+Response, which FastAPI sends as is; keep response_model on the route for
+the OpenAPI schema.
+"""
+from typing import Iterable, List, Mapping, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+class ListSerializer:
+    def __init__(self, model: Type[BaseModel]):
+        self._adapter = TypeAdapter(List[model])
+
+    def dump(self, rows: Iterable) -> bytes:
+        """JSON array of `rows` (ORM objects or dicts), as the response model would return it."""
+        return self._adapter.dump_json(self._adapter.validate_python(rows, from_attributes=True))
+
+    def response(self, rows: Iterable, headers: Optional[Mapping[str, str]] = None) -> Response:
+        return json_response(self.dump(rows), headers)
+
+
+def json_response(body: bytes, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Response with an already serialized JSON body."""
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,226 @@
+"""
+Slow-query log and per-statement statistics (opt-in: SLOW_QUERY_LOG=true).
+
+database.py attaches the log to the engines. Every statement is reduced to
+a fingerprint - the SQL with literals, bound parameters and IN lists replaced
+by placeholders - and counted under it together with its time and the app
+function that issued it (usually a crud function). Statements slower than
+SLOW_QUERY_THRESHOLD_MS are also written to the "app.slow_queries" logger
+with their parameters, redacted: strings and bytes are reduced to their
+length, numbers, dates and NULLs are kept.
+
+top() returns the fingerprints with the largest total time, served to
+admins at GET /monitoring/slow-queries. Statistics are kept per worker process.
+"""
+import datetime
+import hashlib
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from .config import settings
+
+try:
+    import greenlet
+except ImportError:  # Only installed for the async mode
+    greenlet = None
+
+logger = logging.getLogger("app.slow_queries")
+
+APP_DIR = str(Path(__file__).resolve().parent)
+# Frames of these modules are never reported as the caller of a statement
+_SKIPPED_FILES = {
+    str(Path(__file__).resolve()),
+    str(Path(APP_DIR) / "database.py"),
+    str(Path(APP_DIR) / "metrics.py"),
+}
+_MAX_STACK_DEPTH = 80
+# Longer parameter lists (selectinload IN lists) are cut in samples
+_MAX_LOGGED_PARAMETERS = 20
+_QUERY_STARTED = "slow_query_log_started"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_BIND_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Normalized SQL: the same statement with other parameters gets the same fingerprint."""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _BIND_PARAMETER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint_id(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def redact_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, str):
+        return f"<str len={len(value)}>"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<bytes len={len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any, executemany: bool) -> Any:
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "first": redact_parameters(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        redacted = [redact_value(value) for value in parameters[:_MAX_LOGGED_PARAMETERS]]
+        if len(parameters) > _MAX_LOGGED_PARAMETERS:
+            redacted.append(f"<{len(parameters) - _MAX_LOGGED_PARAMETERS} more>")
+        return redacted
+    return redact_value(parameters)
+
+
+def _frame_name(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    if module.startswith("app."):
+        module = module[len("app."):]
+    return f"{module}.{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}"
+
+
+def calling_function() -> str:
+    """Innermost app function on the stack, e.g. "crud.get_orders"."""
+    frame = sys._getframe(2)
+    current = greenlet.getcurrent() if greenlet is not None else None
+    depth = 0
+    while depth < _MAX_STACK_DEPTH:
+        while frame is not None and depth < _MAX_STACK_DEPTH:
+            filename = frame.f_code.co_filename
+            if filename.startswith(APP_DIR) and filename not in _SKIPPED_FILES:
+                return _frame_name(frame)
+            frame = frame.f_back
+            depth += 1
+        # AsyncSession runs the sync ORM in a child greenlet: continue in the
+        # parent greenlet, where the awaiting crud_async function is suspended
+        current = current.parent if current is not None else None
+        if current is None:
+            break
+        frame = current.gr_frame
+    return "unknown"
+
+
+class FingerprintStats:
+    __slots__ = ("statement", "calls", "total_time", "max_time", "slow_calls", "callers", "last_slow")
+
+    def __init__(self, statement: str):
+        self.statement = statement
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.slow_calls = 0
+        self.callers: Counter = Counter()
+        self.last_slow: Optional[dict] = None
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = 100, max_fingerprints: int = 1000):
+        self.threshold = threshold_ms / 1000
+        self.max_fingerprints = max_fingerprints
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._stats: Dict[str, FingerprintStats] = {}
+        self.dropped = 0
+        self.since = datetime.datetime.utcnow()
+
+    def instrument(self, sync_engine):
+        """Start timing the statements of an engine. For async engines pass .sync_engine."""
+        self.enabled = True
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault(_QUERY_STARTED, []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.get(_QUERY_STARTED)
+            if started:
+                self.record(statement, parameters, executemany, time.perf_counter() - started.pop())
+
+        @event.listens_for(sync_engine, "handle_error")
+        def _handle_error(exception_context):
+            conn = exception_context.connection
+            if conn is not None and conn.info.get(_QUERY_STARTED):
+                conn.info[_QUERY_STARTED].pop()
+
+    def record(self, statement: str, parameters: Any, executemany: bool, duration: float):
+        normalized = fingerprint(statement)
+        caller = calling_function()
+        slow = duration >= self.threshold
+        sample = None
+        if slow:
+            sample = {
+                "duration_ms": round(duration * 1000, 2),
+                "caller": caller,
+                "parameters": redact_parameters(parameters, executemany),
+                "at": datetime.datetime.utcnow().isoformat(timespec="seconds"),
+            }
+            logger.warning(
+                "Slow query %.1f ms [%s] %s: %s params=%s",
+                duration * 1000, fingerprint_id(normalized), caller, normalized, sample["parameters"]
+            )
+
+        with self._lock:
+            stats = self._stats.get(normalized)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    self.dropped += 1
+                    return
+                stats = self._stats[normalized] = FingerprintStats(normalized)
+            stats.calls += 1
+            stats.total_time += duration
+            stats.max_time = max(stats.max_time, duration)
+            stats.callers[caller] += 1
+            if slow:
+                stats.slow_calls += 1
+                stats.last_slow = sample
+
+    def top(self, limit: int = 20) -> List[dict]:
+        """Fingerprints with the largest total time."""
+        with self._lock:
+            ranked = sorted(self._stats.values(), key=lambda s: s.total_time, reverse=True)[:limit]
+            return [{
+                "fingerprint": fingerprint_id(s.statement),
+                "statement": s.statement,
+                "calls": s.calls,
+                "total_ms": round(s.total_time * 1000, 2),
+                "mean_ms": round(s.total_time * 1000 / s.calls, 3),
+                "max_ms": round(s.max_time * 1000, 2),
+                "slow_calls": s.slow_calls,
+                "callers": dict(s.callers.most_common(5)),
+                "last_slow": s.last_slow,
+            } for s in ranked]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.dropped = 0
+            self.since = datetime.datetime.utcnow()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    max_fingerprints=settings.SLOW_QUERY_MAX_FINGERPRINTS
+)
@@ -4,6 +4,70 @@
 
 import { apiFetch } from './api.js';
 
+// Интервал опроса хода рассылки, мс
+const PROGRESS_POLL_INTERVAL = 2000;
+
+const JOB_STATUS_LABELS = {
+    pending: 'в очереди',
+    running: 'отправляется',
+    completed: 'завершена',
+    failed: 'прервана'
+};
+
+let pollTimer = null;
+
+/**
+ * Текст о ходе рассылки
+ * @param {Object} job - Задание рассылки
+ * @returns {string}
+ */
+function formatProgress(job) {
+    let text = `Рассылка #${job.id} ${JOB_STATUS_LABELS[job.status] || job.status}: ` +
+        `доставлено ${job.sent} из ${job.total}`;
+    if (job.failed) text += `, ошибок ${job.failed}`;
+    if (job.blocked) text += `, недоступны ${job.blocked}`;
+    if (job.skipped) text += `, пропущено ${job.skipped}`;
+    if (job.deactivated) text += `, отключено подписчиков ${job.deactivated}`;
+    if (job.error) text += ` (${job.error})`;
+    return text;
+}
+
+/**
+ * Показывать ход рассылки, пока она не закончится
+ * @param {Object} job - Задание рассылки
+ * @param {Function} [onUnauthorized] - Callback при ошибке авторизации
+ * @param {string} [message] - Сообщение сервера, показывается перед ходом рассылки
+ */
+function trackJob(job, onUnauthorized, message = '') {
+    const statusEl = document.getElementById('broadcast-status');
+    if (!statusEl) return;
+
+    clearTimeout(pollTimer);
+    statusEl.textContent = message ? `${message} ${formatProgress(job)}` : formatProgress(job);
+    if (job.status !== 'pending' && job.status !== 'running') return;
+
+    pollTimer = setTimeout(async () => {
+        try {
+            trackJob(await apiFetch(`/api/notify_new_flowers/${job.id}`, {}, onUnauthorized), onUnauthorized);
+        } catch (error) {
+            statusEl.textContent = `Ошибка: ${error.message}`;
+        }
+    }, PROGRESS_POLL_INTERVAL);
+}
+
+/**
+ * Показать последнюю рассылку (и следить за ней, если она ещё идёт)
+ * @param {Function} [onUnauthorized] - Callback при ошибке авторизации
+ */
+export async function initBroadcastModule(onUnauthorized) {
+    try {
+        const response = await apiFetch('/api/notify_new_flowers', {}, onUnauthorized);
+        if (response.job) trackJob(response.job, onUnauthorized);
+    } catch (error) {
+        console.error('Failed to load broadcast status:', error);
+    }
+}
+
 /**
  * Отправить рассылку о новых цветах
  * @param {Function} [onUnauthorized] - Callback при ошибке авторизации
@@ -11,15 +75,19 @@ import { apiFetch } from './api.js';
 export async function sendBroadcast(onUnauthorized) {
     const btn = document.getElementById('broadcast-btn');
     const statusEl = document.getElementById('broadcast-status');
-    
+
     if (!btn || !statusEl) return;
-    
+
     btn.disabled = true;
     statusEl.textContent = 'Отправка...';
-    
+
     try {
         const response = await apiFetch('/api/notify_new_flowers', { method: 'POST' }, onUnauthorized);
-        statusEl.textContent = response.message;
+        if (response.job) {
+            trackJob(response.job, onUnauthorized, response.message);
+        } else {
+            statusEl.textContent = response.message;
+        }
     } catch (error) {
         statusEl.textContent = `Ошибка: ${error.message}`;
     } finally {
@@ -6,7 +6,7 @@ import { getAuthToken, apiFetch, login, logout as apiLogout } from './api.js';
 import { initFlowersModule, fetchFlowers, deleteFlower, sellFlowers, addFlowerQuantity, openEditModal, getFlowerById } from './flowers.js';
 import { initCustomersModule, fetchCustomers, deleteCustomer, openEditCustomerModal, getCustomerById } from './customers.js';
 import { initOrdersModule, fetchOrders } from './orders.js';
-import { sendBroadcast } from './broadcast.js';
+import { initBroadcastModule, sendBroadcast } from './broadcast.js';
 
 // DOM элементы
 let loginView = null;
@@ -127,6 +127,7 @@ async function updateLoginView() {
     try {
         await apiFetch('/users/me/admin/', {}, logout);
         showAdminView();
+        initBroadcastModule(logout);
         
         // Если нет активной вкладки, открываем "Товары"
         if (!document.querySelector('.nav-btn.active')) {
@@ -3,10 +3,21 @@
  */
 
 import { apiFetch } from './api.js';
-import { showContainerSpinner } from '../loading.js';
+import { showContainerSpinner, setButtonLoading } from '../loading.js';
 
 // DOM элементы
 let orderList = null;
+let orderTotal = null;
+let loadMoreBtn = null;
+let statusFilter = null;
+let dateFromFilter = null;
+let dateToFilter = null;
+
+// Заказов на странице и курсор следующей страницы
+const ORDERS_PER_PAGE = 50;
+let nextCursor = null;
+// Номер текущей загрузки: ответы на устаревшие фильтры отбрасываются
+let loadGeneration = 0;
 
 // Доступные статусы заказов
 let availableStatuses = ['new', 'processing', 'ready', 'completed', 'cancelled'];
@@ -28,10 +39,35 @@ let unauthorizedCallback = null;
  */
 export function initOrdersModule() {
     orderList = document.getElementById('order-list');
+    orderTotal = document.getElementById('order-total');
+    loadMoreBtn = document.getElementById('order-load-more');
+    statusFilter = document.getElementById('order-filter-status');
+    dateFromFilter = document.getElementById('order-filter-from');
+    dateToFilter = document.getElementById('order-filter-to');
+
+    // Любое изменение фильтра загружает первую страницу заново
+    [statusFilter, dateFromFilter, dateToFilter].forEach(input => {
+        input.addEventListener('change', () => fetchOrders(unauthorizedCallback));
+    });
+    document.getElementById('order-filters').addEventListener('submit', (e) => e.preventDefault());
+    loadMoreBtn.addEventListener('click', loadMoreOrders);
+
+    fillStatusFilter();
     // Загружаем доступные статусы с сервера
     loadStatuses();
 }
 
+/**
+ * Заполнить фильтр по статусу
+ */
+function fillStatusFilter() {
+    const current = statusFilter.value;
+    statusFilter.innerHTML = '<option value="">Все статусы</option>' + availableStatuses.map(status =>
+        `<option value="${status}">${statusLabels[status] || status}</option>`
+    ).join('');
+    statusFilter.value = current;
+}
+
 /**
  * Загрузить доступные статусы с сервера
  */
@@ -40,6 +76,7 @@ async function loadStatuses() {
         const statuses = await apiFetch('/orders/statuses/list');
         if (Array.isArray(statuses)) {
             availableStatuses = statuses;
+            fillStatusFilter();
         }
     } catch (error) {
         console.error("Failed to load statuses:", error);
@@ -57,12 +94,11 @@ async function updateOrderStatus(orderId, newStatus) {
             method: 'PATCH',
             body: JSON.stringify({ status: newStatus })
         }, unauthorizedCallback);
-        
-        // Перезагружаем список заказов
-        fetchOrders(unauthorizedCallback);
     } catch (error) {
         console.error("Failed to update order status:", error);
         alert(`Ошибка при обновлении статуса: ${error.message}`);
+        // Возвращаем список к состоянию на сервере
+        fetchOrders(unauthorizedCallback);
     }
 }
 
@@ -87,79 +123,110 @@ function createStatusSelect(orderId, currentStatus) {
 }
 
 /**
- * Загрузить список заказов
+ * Адрес страницы сводки заказов с учётом фильтров
+ * @param {string|null} cursor - Курсор следующей страницы
+ * @returns {string}
+ */
+function summaryUrl(cursor) {
+    const params = new URLSearchParams({ per_page: ORDERS_PER_PAGE });
+    if (statusFilter.value) params.set('status', statusFilter.value);
+    if (dateFromFilter.value) params.set('created_from', dateFromFilter.value);
+    if (dateToFilter.value) params.set('created_to', dateToFilter.value);
+    if (cursor) {
+        params.set('cursor', cursor);
+    } else {
+        params.set('with_total', 'true');
+    }
+    return `/orders/summary/?${params}`;
+}
+
+/**
+ * Создать карточку заказа
+ * @param {Object} order - Заказ с контактами клиента
+ * @returns {HTMLElement}
+ */
+function renderOrder(order) {
+    const orderDiv = document.createElement('div');
+    orderDiv.className = 'order-item';
+    orderDiv.dataset.status = order.status;
+
+    const itemsHtml = order.items.map(item => {
+        // Use denormalized flower_name from order_item
+        const name = item.flower_name || `Удалённый цветок (ID: ${item.flower_batch_id})`;
+        const total = (item.quantity * item.price_at_time_of_order).toFixed(2);
+        return `<li><b>${name}</b> × ${item.quantity} — ${total} ₽</li>`;
+    }).join('');
+
+    const statusSelect = createStatusSelect(order.id, order.status);
+
+    // Denormalized customer_name first, then the customer's current contact fields
+    const customer = order.customer;
+    const customerDisplay = order.customer_name
+        || (customer && (customer.contact_name || customer.username))
+        || `Удалённый клиент (ID: ${order.customer_id})`;
+    const addressHtml = customer && customer.address
+        ? `<p><strong>Адрес:</strong> ${customer.address}</p>`
+        : '';
+
+    orderDiv.innerHTML = `
+        <h4>Заказ #${order.id} от ${new Date(order.created_at).toLocaleString()}</h4>
+        <p><strong>Клиент:</strong> ${customerDisplay}</p>
+        ${addressHtml}
+        <p><strong>Статус:</strong> ${statusSelect}</p>
+        <p><strong>Комментарий:</strong> ${order.customer_comment || 'Нет'}</p>
+        <p><strong>Состав:</strong></p>
+        <ul>${itemsHtml}</ul>
+    `;
+
+    orderDiv.querySelector('.order-status-select').addEventListener('change', (e) => {
+        const newStatus = e.target.value;
+        updateOrderStatus(order.id, newStatus);
+        // Update color coding
+        e.target.dataset.status = newStatus;
+        orderDiv.dataset.status = newStatus;
+    });
+    return orderDiv;
+}
+
+/**
+ * Загрузить страницу заказов и добавить её в конец списка
+ * @param {string|null} cursor - Курсор страницы (null - первая страница)
+ */
+async function loadOrdersPage(cursor) {
+    const generation = loadGeneration;
+    const page = await apiFetch(summaryUrl(cursor), {}, unauthorizedCallback);
+    if (generation !== loadGeneration) return;
+
+    if (!cursor) {
+        orderList.innerHTML = '';
+        orderTotal.textContent = page.total ? `Найдено заказов: ${page.total}` : '';
+        if (page.items.length === 0) {
+            orderList.innerHTML = '<p>Заказов не найдено.</p>';
+        }
+    }
+    page.items.forEach(order => orderList.appendChild(renderOrder(order)));
+
+    nextCursor = page.next_cursor;
+    loadMoreBtn.classList.toggle('hidden', !nextCursor);
+}
+
+/**
+ * Загрузить список заказов (первую страницу с учётом фильтров)
  * @param {Function} [onUnauthorized] - Callback при ошибке авторизации
  */
 export async function fetchOrders(onUnauthorized) {
     if (!orderList) return;
     unauthorizedCallback = onUnauthorized;
-    
+
+    loadGeneration++;
+    nextCursor = null;
+    loadMoreBtn.classList.add('hidden');
+    orderTotal.textContent = '';
     showContainerSpinner(orderList);
-    
-    try {
-        // No longer need to fetch flowers - names are stored in order_items
-        const [orders, users] = await Promise.all([
-            apiFetch('/orders/', {}, onUnauthorized),
-            apiFetch('/users/', {}, onUnauthorized)
-        ]);
-        
-        orderList.innerHTML = '';
-        
-        if (orders.length === 0) {
-            orderList.innerHTML = '<p>Пока не было ни одного заказа.</p>';
-            return;
-        }
 
-        // Создаём карту имён клиентов
-        const customerNames = users.reduce((acc, user) => {
-            acc[user.id] = user.contact_name || user.username;
-            return acc;
-        }, {});
-
-        // Сортируем заказы по дате (новые сверху)
-        orders.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
-
-        orders.forEach(order => {
-            const orderDiv = document.createElement('div');
-            orderDiv.className = 'order-item';
-            orderDiv.dataset.status = order.status;
-            
-            const itemsHtml = order.items.map(item => {
-                // Use denormalized flower_name from order_item
-                const name = item.flower_name || `Удалённый цветок (ID: ${item.flower_batch_id})`;
-                const total = (item.quantity * item.price_at_time_of_order).toFixed(2);
-                return `<li><b>${name}</b> × ${item.quantity} — ${total} ₽</li>`;
-            }).join('');
-
-            const statusSelect = createStatusSelect(order.id, order.status);
-
-            // Use denormalized customer_name, fallback to customerNames map, then to ID
-            const customerDisplay = order.customer_name
-                || customerNames[order.customer_id]
-                || `Удалённый клиент (ID: ${order.customer_id})`;
-
-            orderDiv.innerHTML = `
-                <h4>Заказ #${order.id} от ${new Date(order.created_at).toLocaleString()}</h4>
-                <p><strong>Клиент:</strong> ${customerDisplay}</p>
-                <p><strong>Статус:</strong> ${statusSelect}</p>
-                <p><strong>Комментарий:</strong> ${order.customer_comment || 'Нет'}</p>
-                <p><strong>Состав:</strong></p>
-                <ul>${itemsHtml}</ul>
-            `;
-            orderList.appendChild(orderDiv);
-        });
-        
-        // Добавляем обработчики для изменения статуса
-        orderList.querySelectorAll('.order-status-select').forEach(select => {
-            select.addEventListener('change', (e) => {
-                const orderId = e.target.dataset.orderId;
-                const newStatus = e.target.value;
-                updateOrderStatus(orderId, newStatus);
-                // Update color coding
-                e.target.dataset.status = newStatus;
-                e.target.closest('.order-item').dataset.status = newStatus;
-            });
-        });
+    try {
+        // Customer fields come joined from the server; no need to fetch /users/
+        await loadOrdersPage(null);
     } catch (error) {
         console.error("Failed to fetch orders:", error);
         if (orderList) {
@@ -167,3 +234,19 @@ export async function fetchOrders(onUnauthorized) {
         }
     }
 }
+
+/**
+ * Загрузить следующую страницу заказов
+ */
+async function loadMoreOrders() {
+    if (!nextCursor) return;
+    setButtonLoading(loadMoreBtn, true);
+    try {
+        await loadOrdersPage(nextCursor);
+    } catch (error) {
+        console.error("Failed to load more orders:", error);
+        alert(`Ошибка при загрузке заказов: ${error.message}`);
+    } finally {
+        setButtonLoading(loadMoreBtn, false);
+    }
+}
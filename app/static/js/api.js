@@ -204,12 +204,57 @@ export async function apiFetch(endpoint, options = {}, onUnauthorized = null) {
     
     if (!response.ok) {
         const err = await response.json().catch(() => ({ detail: `Ошибка сервера: ${response.status}` }));
-        throw new Error(err.detail);
+        const error = new Error(err.detail);
+        error.status = response.status;
+        throw error;
     }
     
     return response.status === 204 ? null : response.json();
 }
 
+/**
+ * Сгенерировать ключ идемпотентности
+ * @returns {string}
+ */
+export function generateIdempotencyKey() {
+    if (window.crypto && typeof window.crypto.randomUUID === 'function') {
+        return window.crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+/**
+ * POST-запрос с заголовком Idempotency-Key и автоматическими повторами.
+ * Повторяет запрос с тем же ключом при сетевой ошибке, 409 или 5xx -
+ * сервер вернёт сохранённый ответ вместо повторного выполнения.
+ * @param {string} endpoint - API endpoint
+ * @param {Object} body - Тело запроса
+ * @param {string} idempotencyKey - Ключ идемпотентности
+ * @param {Function} onUnauthorized - Callback при 401 ошибке
+ * @param {number} retries - Количество повторов
+ * @returns {Promise<any>}
+ */
+export async function apiPostIdempotent(endpoint, body, idempotencyKey, onUnauthorized = null, retries = 3) {
+    for (let attempt = 0; ; attempt++) {
+        try {
+            return await apiFetch(endpoint, {
+                method: 'POST',
+                body: JSON.stringify(body),
+                headers: { 'Idempotency-Key': idempotencyKey }
+            }, onUnauthorized);
+        } catch (error) {
+            // TypeError - запрос не дошёл до сервера или ответ потерян
+            const retryable = error instanceof TypeError
+                || error.status === 409
+                || (error.status >= 500 && error.status < 600);
+            if (!retryable || attempt >= retries) {
+                throw error;
+            }
+            await new Promise(resolve => setTimeout(resolve, 500 * 2 ** attempt));
+        }
+    }
+}
+
 /**
  * Авторизация пользователя
  * @param {string} username
@@ -3,10 +3,28 @@
  */
 
 import { getElement, getCart, saveCart, formatCurrency } from './utils.js';
-import { apiFetch, getAuthToken } from './api.js';
+import { apiPostIdempotent, generateIdempotencyKey, getAuthToken } from './api.js';
 import { updateNav, logout } from './navigation.js';
 
 const MINIMUM_ORDER_VALUE = 5000;
+const CHECKOUT_KEY_STORAGE = 'checkoutIdempotency';
+
+/**
+ * Получить ключ идемпотентности для оформления заказа.
+ * Для того же состава заказа возвращается прежний ключ, чтобы повторное
+ * нажатие после обрыва связи не создало дубликат.
+ * @param {string} payload - Тело запроса в виде JSON
+ * @returns {string}
+ */
+function getCheckoutIdempotencyKey(payload) {
+    const saved = JSON.parse(sessionStorage.getItem(CHECKOUT_KEY_STORAGE) || 'null');
+    if (saved && saved.payload === payload) {
+        return saved.key;
+    }
+    const key = generateIdempotencyKey();
+    sessionStorage.setItem(CHECKOUT_KEY_STORAGE, JSON.stringify({ key, payload }));
+    return key;
+}
 
 /**
  * Обновить количество товара в корзине
@@ -121,12 +139,13 @@ export async function handlePlaceOrder(e) {
     }));
     const customerComment = getElement('customer-comment')?.value || '';
 
+    const body = { items, customer_comment: customerComment };
+    const idempotencyKey = getCheckoutIdempotencyKey(JSON.stringify(body));
+
     try {
-        await apiFetch('/orders/', {
-            method: 'POST',
-            body: JSON.stringify({ items, customer_comment: customerComment })
-        }, logout);
+        await apiPostIdempotent('/orders/', body, idempotencyKey, logout);
         alert('Заказ успешно оформлен!');
+        sessionStorage.removeItem(CHECKOUT_KEY_STORAGE);
         localStorage.removeItem('cart');
         window.location.href = '/';
     } catch(error) {
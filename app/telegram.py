@@ -1,13 +1,14 @@
-import asyncio
 import logging
-from telegram import Bot, Update, InputMediaPhoto
+import time
+from typing import Optional
+from telegram import Bot, Update
+from telegram.error import TelegramError
 from telegram.ext import Application, CommandHandler, ContextTypes
-from pathlib import Path
-import httpx
+from telegram.request import HTTPXRequest
 
 
 from .config import settings
-from . import crud, models
+from . import crud, metrics
 from .database import SessionLocal
 
 # Configure logging
@@ -17,12 +18,63 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def make_bot(token: str, connection_pool_size: int = 1) -> Bot:
+    """
+    Bot client for the Bot API server from settings.TELEGRAM_API_URL.
+    Concurrent senders need a pool with a connection per request in flight.
+    """
+    api_url = settings.TELEGRAM_API_URL.rstrip("/")
+    return Bot(
+        token=token,
+        base_url=f"{api_url}/bot",
+        base_file_url=f"{api_url}/file/bot",
+        request=HTTPXRequest(connection_pool_size=connection_pool_size)
+    )
+
+
+class SharedBot:
+    """
+    One Bot client per process, opened and closed with the application
+    lifespan (main.py). Its pooled httpx client keeps connections to the Bot
+    API alive, so a notification doesn't pay for a new client, TCP and TLS
+    handshake every time.
+    """
+
+    def __init__(self):
+        self.bot: Optional[Bot] = None
+
+    async def start(
+        self,
+        token: Optional[str] = None,
+        connection_pool_size: int = settings.TELEGRAM_CONNECTION_POOL_SIZE
+    ) -> Optional[Bot]:
+        token = token or settings.TOKEN
+        if not token:
+            logger.warning("Telegram token not configured. Shared bot client not started.")
+            return None
+        bot = make_bot(token, connection_pool_size=connection_pool_size)
+        try:
+            # Opens the connection and checks the token with getMe
+            await bot.initialize()
+        except TelegramError as e:
+            # Don't let a Telegram outage stop the app; requests will connect when needed
+            logger.warning(f"Telegram is unavailable at startup: {e}")
+        self.bot = bot
+        return bot
+
+    async def stop(self):
+        bot, self.bot = self.bot, None
+        if bot is not None:
+            await bot.shutdown()
+
+
+shared_bot = SharedBot()
+
 # =================================================================
 # NOTIFICATION LOGIC (for admin orders)
 # =================================================================
 
 async def send_new_order_notification(order_details: dict):
-    # ... (this function remains the same)
     token = settings.TOKEN
     chat_id = settings.CHAT_ID
 
@@ -30,7 +82,6 @@ async def send_new_order_notification(order_details: dict):
         logger.warning("Telegram token or chat_id for admin not configured. Skipping order notification.")
         return
 
-    bot = Bot(token=token)
     message = f"🎉 *Новый заказ!* 🎉\n\n"
     message += f"*ID Заказа:* `{order_details['order_id']}`\n"
     message += f"*Клиент:* {order_details['customer_name']} (`{order_details['customer_username']}`)\n"
@@ -49,10 +100,20 @@ async def send_new_order_notification(order_details: dict):
     if order_details['comment']:
         message += f"\n*Комментарий клиента:*\n_{order_details['comment']}_"
     
+    started = time.perf_counter()
+    outcome = "failed"
     try:
-        await bot.send_message(chat_id=chat_id, text=message, parse_mode='Markdown')
+        if shared_bot.bot is not None:
+            await shared_bot.bot.send_message(chat_id=chat_id, text=message, parse_mode='Markdown')
+        else:
+            # Outside the app lifespan (scripts): a client for this message only
+            async with make_bot(token) as bot:
+                await bot.send_message(chat_id=chat_id, text=message, parse_mode='Markdown')
+        outcome = "sent"
     except Exception as e:
         logger.error(f"Failed to send Telegram order notification: {e}")
+    finally:
+        metrics.registry.observe_notification("order", outcome, time.perf_counter() - started)
 
 # =================================================================
 # SUBSCRIBER BOT LOGIC
@@ -83,65 +144,12 @@ async def stop_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     finally:
         db.close()
 
-async def broadcast_new_flowers(flower_batches_details: list):
-    """
-    Sends a single, elegant media group message to all subscribers.
-    """
-    token = settings.TOKEN
-    if not token:
-        logger.warning("Telegram token not configured. Skipping broadcast.")
-        return
-
-    bot = Bot(token=token)
-    db = SessionLocal()
-    try:
-        subscribers = crud.get_active_subscribers(db)
-        if not subscribers:
-            logger.info("No active subscribers to notify.")
-            return
-
-        logger.info(f"Starting broadcast to {len(subscribers)} subscribers for {len(flower_batches_details)} flower batches.")
-
-        # 1. Prepare the caption for the media group. This will be shown under the first photo.
-        caption = "*Свежая поставка в Romantic Flower Farm!* 🌸\n\n"
-        for batch in flower_batches_details:
-            caption += f"• *{batch['name']}* ({batch['price']} руб.)\n"
-
-        # 2. Prepare the media group with InputMediaPhoto objects
-        media_group = []
-        for i, batch in enumerate(flower_batches_details[:10]): # Limit to 10 photos
-            # The caption is only attached to the first photo in the group
-            photo_caption = caption if i == 0 else ""
-            media_group.append(
-                InputMediaPhoto(media=open(batch['file_path'], 'rb'), caption=photo_caption, parse_mode='Markdown')
-            )
-        
-        if not media_group:
-            logger.warning("Broadcast triggered, but no media to send.")
-            return
-
-        # 3. Send to all subscribers
-        for sub in subscribers:
-            try:
-                await bot.send_media_group(
-                    chat_id=sub.chat_id,
-                    media=media_group
-                )
-                await asyncio.sleep(0.1)  # Avoid hitting Telegram's rate limits
-            except Exception as e:
-                logger.error(f"Failed to send broadcast to {sub.chat_id}: {e}")
-            finally:
-                 # Important: Files are opened when creating InputMediaPhoto. We must close them after sending.
-                 # This is tricky because the library might keep the reference. 
-                 # A safer approach would be to reopen for each user, but let's try this first.
-                 pass # The library should handle closing the files.
-
-    finally:
-        # We must re-close all files to be safe
-        for item in media_group:
-             if hasattr(item.media, 'close'):
-                 item.media.close()
-        db.close()
+def new_flowers_caption(flower_batches_details: list) -> str:
+    """Caption of the broadcast media group, shown under the first photo."""
+    caption = "*Свежая поставка в Romantic Flower Farm!* 🌸\n\n"
+    for batch in flower_batches_details:
+        caption += f"• *{batch['name']}* ({batch['price']} руб.)\n"
+    return caption
 
 
 # =================================================================
@@ -154,7 +162,16 @@ def initialize_bot() -> Application:
         logger.error("Telegram token not configured. Bot cannot be initialized.")
         raise ValueError("Telegram token not set in .env file")
 
-    application = Application.builder().token(token).build()
+    api_url = settings.TELEGRAM_API_URL.rstrip("/")
+    application = (
+        Application.builder()
+        .token(token)
+        .base_url(f"{api_url}/bot")
+        .base_file_url(f"{api_url}/file/bot")
+        # The broadcast worker sends through this bot, BROADCAST_CONCURRENCY requests at once
+        .connection_pool_size(max(settings.BROADCAST_CONCURRENCY, settings.TELEGRAM_CONNECTION_POOL_SIZE))
+        .build()
+    )
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("stop", stop_command))
     logger.info("Telegram bot application initialized.")
@@ -0,0 +1,144 @@
+"""
+Broadcast photos sent by Telegram file_id instead of being uploaded again.
+
+Telegram keeps every uploaded file and answers with a file_id that can be
+sent in place of the bytes. A broadcast therefore uploads its photos with
+the first delivery only and sends the returned file_ids to everyone else,
+so its bandwidth and duration hardly depend on the photo size.
+
+The file_ids are stored in telegram_files keyed by bot, image path and
+SHA-256 of the content: the next broadcast of the same photo uploads
+nothing, and a file replaced on disk gets a new hash and is uploaded again.
+"""
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from telegram import Bot, InputMediaPhoto, Message
+from telegram.error import BadRequest
+
+from . import crud
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Photo:
+    path: str
+    content: bytes
+    sha256: str
+    file_id: Optional[str] = None  # Set once Telegram has the file
+
+    @property
+    def key(self) -> tuple:
+        return self.path, self.sha256
+
+
+class MediaGroup:
+    """
+    Photos of one media group; the caption goes under the first one.
+    media() gives the file_id of every photo Telegram already has and the
+    bytes of the others; remember() takes the file_ids from a successful send.
+    """
+
+    def __init__(self, bot_id: int, photos: List[Photo], caption: str = "", parse_mode: Optional[str] = None):
+        self.bot_id = bot_id
+        self.photos = photos
+        self.caption = caption
+        self.parse_mode = parse_mode
+        # Whether media() has been delivered once; until then the file_ids may be stale
+        self.confirmed = False
+        self._media: Optional[List[InputMediaPhoto]] = None
+
+    @property
+    def uploaded(self) -> bool:
+        return all(photo.file_id for photo in self.photos)
+
+    def media(self) -> List[InputMediaPhoto]:
+        if self._media is None:
+            self._media = [
+                InputMediaPhoto(
+                    media=photo.file_id or photo.content,
+                    caption=self.caption if i == 0 else "",
+                    parse_mode=self.parse_mode
+                )
+                for i, photo in enumerate(self.photos)
+            ]
+        return self._media
+
+    def remember(self, messages: Sequence[Message]) -> Dict[tuple, str]:
+        """Take file_ids of the uploaded photos from the sent messages. Returns the new ones."""
+        self.confirmed = True
+        learned = {}
+        for photo, message in zip(self.photos, messages):
+            # Telegram answers with several sizes; the last one is the original
+            if photo.file_id is None and message.photo:
+                photo.file_id = message.photo[-1].file_id
+                learned[photo.key] = photo.file_id
+        if learned:
+            self._media = None
+        return learned
+
+    def forget(self):
+        """Upload every photo again with the next send."""
+        for photo in self.photos:
+            photo.file_id = None
+        self.confirmed = False
+        self._media = None
+
+
+def _read_photo(path: str) -> Photo:
+    content = Path(path).read_bytes()
+    return Photo(path=path, content=content, sha256=hashlib.sha256(content).hexdigest())
+
+
+def _load_file_ids(bot_id: int, keys: list) -> dict:
+    db = SessionLocal()
+    try:
+        return crud.get_telegram_file_ids(db, bot_id, keys)
+    finally:
+        db.close()
+
+
+def _save_file_ids(bot_id: int, file_ids: dict):
+    db = SessionLocal()
+    try:
+        crud.save_telegram_file_ids(db, bot_id, file_ids)
+    finally:
+        db.close()
+
+
+async def load_media_group(
+    bot_id: int, paths: List[str], caption: str = "", parse_mode: Optional[str] = None
+) -> MediaGroup:
+    """Read and hash the photos in a worker thread and fill in the cached file_ids."""
+    photos = await asyncio.to_thread(lambda: [_read_photo(path) for path in paths])
+    cached = await asyncio.to_thread(_load_file_ids, bot_id, [photo.key for photo in photos])
+    for photo in photos:
+        photo.file_id = cached.get(photo.key)
+    if photos:
+        logger.info(f"{sum(1 for p in photos if p.file_id)}/{len(photos)} broadcast photos cached on Telegram.")
+    return MediaGroup(bot_id, photos, caption=caption, parse_mode=parse_mode)
+
+
+async def send_media_group(bot: Bot, group: MediaGroup, chat_id: int):
+    """
+    Send the group to one chat and cache the file_ids Telegram returns.
+    If Telegram rejects cached file_ids the photos are uploaded again.
+    """
+    try:
+        messages = await bot.send_media_group(chat_id=chat_id, media=group.media())
+    except BadRequest as e:
+        if group.confirmed or not any(photo.file_id for photo in group.photos) or "file" not in e.message.lower():
+            raise
+        logger.warning(f"Cached file_ids were rejected ({e.message}), uploading the photos again.")
+        group.forget()
+        messages = await bot.send_media_group(chat_id=chat_id, media=group.media())
+    learned = group.remember(messages)
+    if learned:
+        await asyncio.to_thread(_save_file_ids, group.bot_id, learned)
+    return messages
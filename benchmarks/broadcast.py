@@ -0,0 +1,186 @@
+"""
+Broadcast throughput against the local Telegram Bot API stub.
+
+Sends one media group to N fake subscribers through app.broadcast.Broadcaster
+and the real python-telegram-bot client, with the stub
+(benchmarks.telegram_stub) enforcing Telegram's flood limits. Reports the
+delivery rate, retries, 429 answers and the bytes sent to the stub.
+
+Photos are uploaded once and then sent by file_id (app.telegram_files), which
+caches the file_ids in the telegram_files table: DATABASE_URL must point to a
+database upgraded with `alembic upgrade head`. The benchmark's photos are
+random, so every run starts with an empty cache, and their rows are deleted
+at the end. --runs 2 repeats the broadcast to show a cache hit.
+
+--no-file-cache uploads the photos to every subscriber instead, and --legacy
+runs the old loop (one send at a time and a fixed 0.1 s pause), for comparison.
+
+Run with:
+    python -m benchmarks.broadcast --subscribers 1000
+    python -m benchmarks.broadcast --subscribers 1000 --rate 60 --stub-rate-limit 20   # provoke 429s
+    python -m benchmarks.broadcast --subscribers 300 --photo-kb 500 --runs 2
+    python -m benchmarks.broadcast --subscribers 300 --photo-kb 500 --no-file-cache
+    python -m benchmarks.broadcast --subscribers 200 --legacy
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import InputMediaPhoto
+
+from app import models, telegram, telegram_files
+from app.broadcast import Broadcaster
+from app.config import settings
+from app.database import SessionLocal
+from benchmarks.telegram_stub import TelegramStubServer
+
+# Smallest valid PNG
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure broadcast throughput against the Bot API stub.")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--photos", type=int, default=3, help="photos in the media group (default 3)")
+    parser.add_argument("--photo-kb", type=int, default=0,
+                        help="size of each photo in KB (default: a 70-byte PNG)")
+    parser.add_argument("--runs", type=int, default=1, help="broadcasts in a row (default 1)")
+    parser.add_argument("--rate", type=float, default=settings.BROADCAST_RATE_PER_SECOND,
+                        help="sender's requests per second")
+    parser.add_argument("--concurrency", type=int, default=settings.BROADCAST_CONCURRENCY)
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0, help="stub delay per request (default 50)")
+    parser.add_argument("--stub-rate-limit", type=int, default=30,
+                        help="stub answers 429 above this many requests per second (default 30)")
+    parser.add_argument("--no-file-cache", action="store_true", help="upload the photos to every subscriber")
+    parser.add_argument("--legacy", action="store_true", help="sequential sends with a 0.1 s pause")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    return parser.parse_args()
+
+
+def write_photos(directory: str, count: int, size_kb: int) -> list:
+    """Photos with random content, so their hashes are not in the file_id cache."""
+    paths = []
+    for i in range(count):
+        path = Path(directory) / f"bench_{i}.png"
+        path.write_bytes(PNG_BYTES + os.urandom(size_kb * 1024))
+        paths.append(str(path))
+    return paths
+
+
+def delete_cached_file_ids(paths: list):
+    db = SessionLocal()
+    try:
+        db.query(models.TelegramFile).filter(models.TelegramFile.path.in_(paths)).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run(args: argparse.Namespace, paths: list) -> dict:
+    chat_ids = range(1, args.subscribers + 1)
+
+    if args.legacy:
+        media = [InputMediaPhoto(media=Path(path).read_bytes(), caption="Bench" if i == 0 else "")
+                 for i, path in enumerate(paths)]
+        bot = telegram.make_bot("bench-token")
+        async with bot:
+            started = time.monotonic()
+            sent = 0
+            for chat_id in chat_ids:
+                try:
+                    await bot.send_media_group(chat_id=chat_id, media=media)
+                    sent += 1
+                    await asyncio.sleep(0.1)
+                except Exception as e:
+                    logging.error(f"Failed to send broadcast to {chat_id}: {e}")
+            elapsed = time.monotonic() - started
+        return {"mode": "legacy", "sent": sent, "failed": args.subscribers - sent,
+                "elapsed_s": round(elapsed, 2), "rate_per_s": round(sent / elapsed, 2)}
+
+    broadcaster = Broadcaster(rate_per_second=args.rate, concurrency=args.concurrency)
+    bot = telegram.make_bot("bench-token", connection_pool_size=broadcaster.concurrency)
+    async with bot:
+        if args.no_file_cache:
+            media = [InputMediaPhoto(media=Path(path).read_bytes(), caption="Bench" if i == 0 else "")
+                     for i, path in enumerate(paths)]
+            result = await broadcaster.run(
+                chat_ids, lambda chat_id: bot.send_media_group(chat_id=chat_id, media=media)
+            )
+        else:
+            group = await telegram_files.load_media_group(bot.id, paths, caption="Bench")
+            result = await broadcaster.run(
+                chat_ids,
+                lambda chat_id: telegram_files.send_media_group(bot, group, chat_id),
+                warm_up=lambda: group.confirmed
+            )
+    return {"mode": "no file cache" if args.no_file_cache else "engine",
+            "sent": result.sent, "failed": len(result.failed),
+            "retries": result.retries, "rate_limited": result.rate_limited,
+            "final_rate_limit": round(result.final_rate_limit, 2),
+            "elapsed_s": round(result.elapsed, 2), "rate_per_s": round(result.rate, 2)}
+
+
+def main():
+    args = parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    stub = TelegramStubServer(latency_ms=args.stub_latency_ms, rate_limit=args.stub_rate_limit)
+    stub.start_in_thread()
+    settings.TELEGRAM_API_URL = stub.url
+
+    if args.legacy:
+        mode = "legacy loop"
+    elif args.no_file_cache:
+        mode = "Broadcaster, no file_id cache"
+    else:
+        mode = "Broadcaster"
+    print("=" * 60)
+    print(f"Broadcast to {args.subscribers} subscribers ({mode})")
+    print(f"{args.photos} photos of {args.photo_kb or 0.07:g} KB")
+    print(f"Stub: {args.stub_latency_ms:g} ms latency, {args.stub_rate_limit} requests/s limit")
+    print("=" * 60)
+
+    reports = []
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_photos(directory, args.photos, args.photo_kb)
+        try:
+            for number in range(1, args.runs + 1):
+                bytes_before = stub.stats.snapshot()["bytes_received"]
+                report = asyncio.run(run(args, paths))
+                report["uploaded_mb"] = round((stub.stats.snapshot()["bytes_received"] - bytes_before) / 1e6, 2)
+                reports.append(report)
+
+                print(f"\nRun {number}")
+                for key in ("sent", "failed", "retries", "rate_limited", "final_rate_limit",
+                            "elapsed_s", "rate_per_s", "uploaded_mb"):
+                    if key in report:
+                        print(f"  {key:<16} {report[key]}")
+        finally:
+            stub.shutdown()
+            if not args.legacy and not args.no_file_cache:
+                delete_cached_file_ids(paths)
+
+    stats = stub.stats.snapshot()
+    print(f"\n  {'stub peak/s':<16} {stats['peak_calls_per_second']}")
+    print(f"  {'stub 429s':<16} {stats['rate_limited']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"runs": reports, "stub": stats}, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,616 @@
+"""
+HTTP load test for the running application.
+
+Starts the app with uvicorn, the bot with its broadcast worker (run_bot.py)
+and a local Telegram Bot API stub (benchmarks.telegram_stub), then drives
+them with concurrent virtual users
+for a fixed time. Each user repeatedly picks a scenario from a weighted mix:
+
+    browse    - catalog, a flower card, a catalog page (with ETags, like the site)
+    auth      - login and refresh token rotation
+    checkout  - an order of the stock flower with an Idempotency-Key, then "my orders"
+    admin     - the admin panel polling the orders page
+
+Every few seconds the admin also triggers a broadcast about new flowers
+(POST /api/notify_new_flowers). That queues a broadcast job, which the worker
+sends to every active subscriber while the load goes on; a call made while a
+job is still queued or sending returns that job. Order notifications and
+broadcasts go to the stub, so the test runs offline and the Telegram code is
+exercised under load.
+
+Reports p50/p95/p99/max latency, throughput and errors per endpoint, plus the
+number of calls the stub received per Bot API method (sendMediaGroup for the
+broadcasts, sendMessage for the order notifications).
+
+--compare-async runs the same workload twice, on a server with the sync
+database driver from DATABASE_URL and on one with the matching async driver
+(database.ASYNC_MODE: aiosqlite or asyncpg), and compares throughput and
+latency per endpoint. Its default mix is the endpoints that have async
+versions: the catalog (browse) and POST /orders/ with "my orders" (checkout).
+The second run sees the orders placed by the first.
+
+--login-storm N checks that logins don't slow down the catalog: the browse
+users run alone for --duration seconds, then again with N more users that
+log in back to back (bcrypt on every request). It fails when the p95 of
+GET /flowers/ during the logins is more than --max-p95-increase above its
+p95 without them.
+
+The test writes to the database (orders, refresh tokens, a flower batch):
+run it against a copy filled by benchmarks.seed, never against production.
+
+Run with:
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.load
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.load --users 50 --duration 60 --output load.json
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.load --compare-async --users 50
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.load --login-storm 10
+    python -m benchmarks.load --url http://127.0.0.1:8000   # already running server
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy.engine import make_url
+
+from app.database import ASYNC_DRIVERS
+from benchmarks.seed import ADMIN_USERNAME, BENCH_PASSWORD, CUSTOMER_PREFIX, STOCK_FLOWER_NAME
+from benchmarks.telegram_stub import TelegramStubServer
+
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MIX = "browse=60,auth=10,checkout=15,admin=15"
+# --compare-async: only endpoints that have async versions (routers/async_routes.py)
+ASYNC_MIX = "browse=50,checkout=50"
+# Units of the stock flower per order: enough to pass the minimum order sum
+CHECKOUT_QUANTITY = 5
+ORDER_STATUSES = ("new", "processing", "ready", "completed", "cancelled")
+LOAD_TOKEN = "load-test-token"
+# Seconds between the worker's checks for queued broadcasts, so a job starts within the run
+BOT_POLL_INTERVAL = 1.0
+UPLOAD_NAME = "load-test-broadcast.png"
+# Smallest valid PNG, for the broadcast photo
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run an HTTP load test against the application.")
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users (default 20)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load (default 30)")
+    parser.add_argument("--mix", help=f"scenario weights (default {DEFAULT_MIX}, "
+                                      f"with --compare-async {ASYNC_MIX})")
+    parser.add_argument("--ramp-up", type=float, default=5.0,
+                        help="seconds over which the users start, evenly spaced (default 5)")
+    parser.add_argument("--think-ms", type=float, default=100.0,
+                        help="mean pause between a user's scenarios, ms (default 100)")
+    parser.add_argument("--broadcast-every", type=float, default=15.0,
+                        help="seconds between new-flower broadcasts, 0 disables (default 15)")
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0,
+                        help="simulated Bot API round trip, ms (default 50)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (default 1)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for the users' choices")
+    parser.add_argument("--compare-async", action="store_true",
+                        help="run the workload with the sync and then the async database driver and compare")
+    parser.add_argument("--login-storm", type=int, default=0, metavar="N",
+                        help="browse without and then with N users logging in nonstop, compare catalog p95")
+    parser.add_argument("--max-p95-increase", type=float, default=0.25,
+                        help="--login-storm: allowed catalog p95 increase, as a fraction (default 0.25)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    if args.compare_async and args.url:
+        parser.error("--compare-async starts its own servers; it can't be used with --url")
+    if args.compare_async and args.login_storm:
+        parser.error("--compare-async and --login-storm are separate tests")
+    args.mix = args.mix or (ASYNC_MIX if args.compare_async else DEFAULT_MIX)
+    return args
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}', expected one of: {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class Recorder:
+    """Latencies and errors per endpoint label."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+
+    def add(self, label: str, seconds: float, error: Optional[str] = None):
+        self.latencies[label].append(seconds)
+        if error:
+            self.errors[label] += 1
+            self.error_samples.setdefault(label, error)
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label in sorted(self.latencies):
+            samples = sorted(self.latencies[label])
+            ms = [s * 1000 for s in samples]
+            quantiles = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+            endpoints[label] = {
+                "count": len(ms),
+                "rps": round(len(ms) / elapsed, 2),
+                "p50_ms": round(quantiles[49], 2),
+                "p95_ms": round(quantiles[94], 2),
+                "p99_ms": round(quantiles[98], 2),
+                "max_ms": round(ms[-1], 2),
+                "errors": self.errors[label],
+            }
+        total = sum(e["count"] for e in endpoints.values())
+        return {
+            "endpoints": endpoints,
+            "total_requests": total,
+            "total_rps": round(total / elapsed, 2),
+            "total_errors": sum(self.errors.values()),
+            "error_samples": self.error_samples,
+        }
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, rnd: random.Random,
+                 username: str, fixtures: dict):
+        self.client = client
+        self.recorder = recorder
+        self.rnd = rnd
+        self.username = username
+        self.fixtures = fixtures
+        self.access_token = None
+        self.refresh_token = None
+        self.catalog_etag = None
+
+    async def call(self, label: str, method: str, url: str, ok=(200,), **kwargs) -> Optional[httpx.Response]:
+        if self.access_token:
+            kwargs.setdefault("headers", {})["Authorization"] = f"Bearer {self.access_token}"
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.add(label, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+            return None
+        elapsed = time.perf_counter() - started
+        if response.status_code not in ok:
+            self.recorder.add(label, elapsed, f"{response.status_code}: {response.text[:200]}")
+            return None
+        self.recorder.add(label, elapsed)
+        return response
+
+    async def login(self) -> bool:
+        saved, self.access_token = self.access_token, None
+        response = await self.call("POST /token", "POST", "/token",
+                                   data={"username": self.username, "password": BENCH_PASSWORD})
+        if response is None:
+            self.access_token = saved
+            return False
+        tokens = response.json()
+        self.access_token, self.refresh_token = tokens["access_token"], tokens["refresh_token"]
+        return True
+
+    async def browse(self):
+        headers = {"If-None-Match": self.catalog_etag} if self.catalog_etag else {}
+        response = await self.call("GET /flowers/", "GET", "/flowers/", ok=(200, 304), headers=headers)
+        if response is not None and response.status_code == 200:
+            self.catalog_etag = response.headers.get("ETag")
+        flower_id = self.rnd.choice(self.fixtures["flower_ids"])
+        await self.call("GET /flowers/{flower_id}", "GET", f"/flowers/{flower_id}", ok=(200, 304))
+        await self.call("GET /flowers/paginated/", "GET", "/flowers/paginated/",
+                        params={"keyset": "true", "per_page": 20})
+
+    async def auth(self):
+        if not await self.login():
+            return
+        response = await self.call("POST /token/refresh", "POST", "/token/refresh",
+                                   json={"refresh_token": self.refresh_token})
+        if response is not None:
+            tokens = response.json()
+            self.access_token, self.refresh_token = tokens["access_token"], tokens["refresh_token"]
+
+    async def checkout(self):
+        order = {
+            "customer_comment": "load test",
+            "items": [{"flower_batch_id": self.fixtures["stock_flower_id"], "quantity": CHECKOUT_QUANTITY}],
+        }
+        await self.call("POST /orders/", "POST", "/orders/", json=order,
+                        headers={"Idempotency-Key": str(uuid.uuid4())})
+        await self.call("GET /orders/me/", "GET", "/orders/me/", ok=(200, 304))
+
+    async def admin(self):
+        await self.call("GET /orders/paginated/", "GET", "/orders/paginated/",
+                        params={"keyset": "true", "per_page": 50, "with_total": "true"})
+        # The admin orders page: the first page, then the same filtered by a status
+        await self.call("GET /orders/summary/", "GET", "/orders/summary/",
+                        params={"per_page": 50, "with_total": "true"})
+        await self.call("GET /orders/summary/ [status]", "GET", "/orders/summary/",
+                        params={"per_page": 50, "status": self.rnd.choice(ORDER_STATUSES)})
+
+
+SCENARIOS = {
+    "browse": VirtualUser.browse,
+    "auth": VirtualUser.auth,
+    "checkout": VirtualUser.checkout,
+    "admin": VirtualUser.admin,
+}
+
+
+async def run_user(vu: VirtualUser, mix: dict, admin_token: str, delay: float, deadline: float, think: float):
+    names, weights = list(mix), list(mix.values())
+    await asyncio.sleep(delay)
+    if not await vu.login():
+        return
+    customer_token = vu.access_token
+    while time.monotonic() < deadline:
+        name = vu.rnd.choices(names, weights)[0]
+        if name == "admin":
+            vu.access_token = admin_token
+            await vu.admin()
+            vu.access_token = customer_token
+        else:
+            await SCENARIOS[name](vu)
+            customer_token = vu.access_token
+        if think:
+            await asyncio.sleep(vu.rnd.expovariate(1 / think))
+
+
+async def run_broadcasts(admin: VirtualUser, every: float, deadline: float):
+    while time.monotonic() + every < deadline:
+        await asyncio.sleep(every)
+        await admin.call("POST /api/notify_new_flowers", "POST", "/api/notify_new_flowers")
+
+
+async def prepare(client: httpx.AsyncClient, recorder: Recorder) -> tuple:
+    """Log in the admin, find the stock flower and upload a fresh batch for the broadcasts."""
+    admin = VirtualUser(client, recorder, random.Random(0), ADMIN_USERNAME, {})
+    if not await admin.login():
+        raise SystemExit(f"Cannot log in as {ADMIN_USERNAME}: {recorder.error_samples}. "
+                         "Fill the database with benchmarks.seed first.")
+    response = await client.get("/flowers/", params={"limit": 1000})
+    response.raise_for_status()
+    flowers = response.json()
+    stock = [f["id"] for f in flowers if f["name"] == STOCK_FLOWER_NAME]
+    if not stock:
+        raise SystemExit(f"Flower batch '{STOCK_FLOWER_NAME}' not found. Fill the database with benchmarks.seed first.")
+
+    response = await client.post(
+        "/flowers/",
+        data={"name": "Нагрузочный тест", "description": "Для рассылки", "price": "100", "quantity": "1"},
+        files={"image": (UPLOAD_NAME, PNG_BYTES, "image/png")},
+        headers={"Authorization": f"Bearer {admin.access_token}"},
+    )
+    response.raise_for_status()
+    fixtures = {
+        "flower_ids": [f["id"] for f in flowers],
+        "stock_flower_id": stock[0],
+        "broadcast_flower_id": response.json()["id"],
+    }
+    return admin, fixtures
+
+
+async def cleanup(admin: VirtualUser, fixtures: dict):
+    await admin.client.delete(
+        f"/flowers/{fixtures['broadcast_flower_id']}",
+        headers={"Authorization": f"Bearer {admin.access_token}"},
+    )
+
+
+async def run_load(base_url: str, args: argparse.Namespace, mix: dict) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users + 2, max_keepalive_connections=args.users + 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        admin, fixtures = await prepare(client, recorder)
+        # Setup requests are not part of the measurement
+        recorder = Recorder()
+        admin.recorder = recorder
+
+        rnd = random.Random(args.seed)
+        users = [
+            VirtualUser(client, recorder, random.Random(rnd.random()), f"{CUSTOMER_PREFIX}{i + 1}", fixtures)
+            for i in range(args.users)
+        ]
+        started = time.monotonic()
+        deadline = started + args.duration
+        tasks = [
+            run_user(vu, mix, admin.access_token, i * args.ramp_up / args.users, deadline, args.think_ms / 1000)
+            for i, vu in enumerate(users)
+        ]
+        if args.broadcast_every > 0:
+            tasks.append(run_broadcasts(admin, args.broadcast_every, deadline))
+        await asyncio.gather(*tasks)
+        elapsed = time.monotonic() - started
+
+        await cleanup(admin, fixtures)
+    return recorder.report(elapsed) | {"elapsed_s": round(elapsed, 2)}
+
+
+async def browse_until(vu: VirtualUser, delay: float, deadline: float, think: float):
+    """Anonymous catalog browsing; no login, so no bcrypt in this user's requests."""
+    await asyncio.sleep(delay)
+    while time.monotonic() < deadline:
+        await vu.browse()
+        if think:
+            await asyncio.sleep(vu.rnd.expovariate(1 / think))
+
+
+async def login_until(vu: VirtualUser, deadline: float):
+    while time.monotonic() < deadline:
+        await vu.login()
+
+
+async def run_storm_phase(client: httpx.AsyncClient, args: argparse.Namespace, fixtures: dict,
+                          logins: int) -> dict:
+    """Browse users for --duration seconds, with `logins` users logging in at the same time."""
+    recorder = Recorder()
+    rnd = random.Random(args.seed)
+    started = time.monotonic()
+    deadline = started + args.duration
+    tasks = [
+        browse_until(VirtualUser(client, recorder, random.Random(rnd.random()), "", fixtures),
+                     i * args.ramp_up / args.users, deadline, args.think_ms / 1000)
+        for i in range(args.users)
+    ]
+    tasks += [
+        login_until(VirtualUser(client, recorder, random.Random(rnd.random()), f"{CUSTOMER_PREFIX}{i + 1}", fixtures),
+                    deadline)
+        for i in range(logins)
+    ]
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+    return recorder.report(elapsed) | {"elapsed_s": round(elapsed, 2)}
+
+
+async def run_login_storm(base_url: str, args: argparse.Namespace, mix: dict) -> dict:
+    """The catalog without and then with concurrent logins; `mix` is unused."""
+    connections = args.users + args.login_storm + 2
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        admin, fixtures = await prepare(client, Recorder())
+        try:
+            baseline = await run_storm_phase(client, args, fixtures, logins=0)
+            storm = await run_storm_phase(client, args, fixtures, logins=args.login_storm)
+        finally:
+            await cleanup(admin, fixtures)
+
+    before = baseline["endpoints"]["GET /flowers/"]["p95_ms"]
+    during = storm["endpoints"]["GET /flowers/"]["p95_ms"]
+    increase = during / before - 1 if before else 0.0
+    return storm | {
+        "baseline": baseline,
+        "login_storm": {
+            "login_users": args.login_storm,
+            "catalog_p95_ms_without_logins": before,
+            "catalog_p95_ms_with_logins": during,
+            "increase": round(increase, 3),
+            "max_increase": args.max_p95_increase,
+            "passed": increase <= args.max_p95_increase,
+        },
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def database_urls() -> dict:
+    """DATABASE_URL with the sync driver and with the async driver of the same database."""
+    url = make_url(os.environ.get("DATABASE_URL", "sqlite:///./flowers.db"))
+    if url.drivername in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+    async_driver = next(
+        (a for a, sync in ASYNC_DRIVERS.items() if make_url(f"{sync}://").get_backend_name() == url.get_backend_name()),
+        None
+    )
+    if async_driver is None:
+        raise SystemExit(f"No async driver known for {url.get_backend_name()}.")
+    return {
+        "sync": url.render_as_string(hide_password=False),
+        "async": url.set(drivername=async_driver).render_as_string(hide_password=False),
+    }
+
+
+def start_server(port: int, stub_url: str, workers: int, log, env: Optional[dict] = None) -> subprocess.Popen:
+    env = os.environ | {"TOKEN": LOAD_TOKEN, "CHAT_ID": "1", "TELEGRAM_API_URL": stub_url} | (env or {})
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--no-access-log",
+         # Don't wait for order notifications still running in the background
+         "--timeout-graceful-shutdown", "5"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+def start_bot(stub_url: str, log, env: Optional[dict] = None) -> subprocess.Popen:
+    """run_bot.py: the bot polling the stub and the broadcast worker, as deployed next to the app."""
+    env = (os.environ | {"TOKEN": LOAD_TOKEN, "CHAT_ID": "1", "TELEGRAM_API_URL": stub_url,
+                         "BROADCAST_POLL_INTERVAL": str(BOT_POLL_INTERVAL)} | (env or {}))
+    return subprocess.Popen([sys.executable, "run_bot.py"], cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"The server exited with code {server.returncode}, see its log above.")
+        try:
+            if httpx.get(f"{base_url}/flowers/", params={"limit": 1}, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"The server did not start in {timeout:.0f}s.")
+
+
+def print_report(report: dict):
+    header = f"{'endpoint':<32} {'count':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    for label, e in report["endpoints"].items():
+        print(f"{label:<32} {e['count']:>7} {e['rps']:>8.1f} {e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f} "
+              f"{e['p99_ms']:>8.1f} {e['max_ms']:>8.1f} {e['errors']:>7}")
+    print("-" * len(header))
+    print(f"{'total':<32} {report['total_requests']:>7} {report['total_rps']:>8.1f}"
+          f"{'':>36} {report['total_errors']:>7}")
+    print("(latencies in ms)")
+    for label, sample in report["error_samples"].items():
+        print(f"  first error on {label}: {sample}")
+    if "telegram_stub" in report:
+        calls = report["telegram_stub"]["calls"]
+        print(f"\nTelegram stub: {calls.get('sendMediaGroup', 0)} sendMediaGroup (broadcasts), "
+              f"{calls.get('sendMessage', 0)} sendMessage (order notifications), "
+              f"{report['telegram_stub']['distinct_chats']} chats")
+        print(f"  all calls: {calls}")
+
+
+def run_with_server(args: argparse.Namespace, mix: dict, env: Optional[dict] = None, runner=None) -> dict:
+    """
+    Start the stub, a server and the bot (with extra environment `env`), run
+    the load (run_load, or `runner` with the same arguments) and stop them.
+    """
+    runner = runner or run_load
+    stub = TelegramStubServer(latency_ms=args.stub_latency_ms)
+    stub.start_in_thread()
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.NamedTemporaryFile("w+", prefix="load-server-", suffix=".log", delete=False) as log:
+        server = start_server(port, stub.url, args.workers, log, env)
+        bot = start_bot(stub.url, log, env)
+        try:
+            wait_until_ready(base_url, server)
+            if bot.poll() is not None:
+                raise SystemExit(f"The bot exited with code {bot.returncode}, see the log {log.name}.")
+            report = asyncio.run(runner(base_url, args, mix))
+        finally:
+            stop(server)
+            stop(bot)
+            stub.shutdown()
+            log.seek(0)
+            errors = [line for line in log if "ERROR" in line or "Traceback" in line]
+        print(f"Server log: {log.name} ({len(errors)} error lines)")
+    report["telegram_stub"] = stub.stats.snapshot()
+    return report
+
+
+def print_comparison(reports: dict):
+    """Throughput and p95 per endpoint, sync driver against async driver."""
+    sync, async_ = reports["sync"], reports["async"]
+    header = (f"{'endpoint':<32} {'sync rps':>9} {'async rps':>9} {'change':>7} "
+              f"{'sync p95':>9} {'async p95':>9}")
+    print(header)
+    print("-" * len(header))
+    for label in sorted(set(sync["endpoints"]) | set(async_["endpoints"])):
+        s, a = sync["endpoints"].get(label), async_["endpoints"].get(label)
+        if s is None or a is None:
+            continue
+        change = a["rps"] / s["rps"] - 1 if s["rps"] else 0.0
+        print(f"{label:<32} {s['rps']:>9.1f} {a['rps']:>9.1f} {change:>+7.0%} "
+              f"{s['p95_ms']:>9.1f} {a['p95_ms']:>9.1f}")
+    print("-" * len(header))
+    change = async_["total_rps"] / sync["total_rps"] - 1 if sync["total_rps"] else 0.0
+    print(f"{'total':<32} {sync['total_rps']:>9.1f} {async_['total_rps']:>9.1f} {change:>+7.0%}")
+    print("(p95 in ms)")
+
+
+def main():
+    args = parse_args()
+    mix = parse_mix(args.mix)
+    print("=" * 60)
+    if args.login_storm:
+        print(f"Login storm: {args.users} browsing users for {args.duration:.0f}s, "
+              f"then again with {args.login_storm} users logging in")
+    else:
+        print(f"Load test: {args.users} users for {args.duration:.0f}s, mix {args.mix}")
+    print("=" * 60)
+
+    settings = {
+        "users": args.users, "duration_s": args.duration, "ramp_up_s": args.ramp_up, "mix": mix, "think_ms": args.think_ms,
+        "broadcast_every_s": args.broadcast_every, "stub_latency_ms": args.stub_latency_ms,
+        "workers": args.workers, "python": platform.python_version(),
+    }
+    if args.login_storm:
+        settings |= {"mix": {"browse": 1}, "login_storm": args.login_storm, "max_p95_increase": args.max_p95_increase}
+
+    if args.compare_async:
+        urls = database_urls()
+        reports = {}
+        for mode, url in urls.items():
+            print(f"\n--- {mode} driver: {url.split(':', 1)[0]} ---")
+            reports[mode] = run_with_server(args, mix, {"DATABASE_URL": url})
+            print_report(reports[mode])
+        print("\nSync vs async database driver:")
+        print_comparison(reports)
+        shown_urls = {mode: make_url(url).render_as_string() for mode, url in urls.items()}  # Password masked
+        result = {"settings": settings | {"database_urls": shown_urls}, **reports}
+        if args.output:
+            Path(args.output).write_text(json.dumps(result, indent=2, ensure_ascii=False))
+            print(f"\nResults written to {args.output}")
+        if any(report["total_errors"] for report in reports.values()):
+            sys.exit(1)
+        return
+
+    runner = run_login_storm if args.login_storm else run_load
+    if args.url:
+        report = asyncio.run(runner(args.url.rstrip("/"), args, mix))
+    else:
+        report = run_with_server(args, mix, runner=runner)
+
+    report["settings"] = settings
+    print()
+    if args.login_storm:
+        print("Without logins:")
+        print_report(report["baseline"])
+        print(f"\nWith {args.login_storm} users logging in:")
+    print_report(report)
+    if args.login_storm:
+        storm = report["login_storm"]
+        print(f"\nGET /flowers/ p95: {storm['catalog_p95_ms_without_logins']:.1f} ms without logins, "
+              f"{storm['catalog_p95_ms_with_logins']:.1f} ms with logins ({storm['increase']:+.0%}, "
+              f"allowed {storm['max_increase']:+.0%})")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"\nResults written to {args.output}")
+    if report["total_errors"]:
+        sys.exit(1)
+    if args.login_storm and not report["login_storm"]["passed"]:
+        print("Catalog p95 rose more than allowed during the logins.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
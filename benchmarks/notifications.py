@@ -0,0 +1,138 @@
+"""
+Per-notification latency of order notifications against the local Telegram Bot API stub.
+
+Sends order notifications (app.telegram.send_new_order_notification) one
+after another and in bursts of concurrent orders, through the shared bot
+client that the app opens in its lifespan (app.telegram.shared_bot). The
+stub (benchmarks.telegram_stub) adds --stub-latency-ms to every request and
+--connect-latency-ms to every new connection, the cost of the TCP and TLS
+handshakes with api.telegram.org. Reports p50/p95/max latency per
+notification and the number of connections the stub accepted.
+
+--per-call sends every notification through a new Bot client instead, like
+before the shared client, for comparison.
+
+Run with:
+    python -m benchmarks.notifications
+    python -m benchmarks.notifications --per-call
+    python -m benchmarks.notifications --notifications 200 --burst 20 --connect-latency-ms 300
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import telegram
+from app.config import settings
+from app.metrics import registry
+from benchmarks.telegram_stub import TelegramStubServer
+
+ORDER_DETAILS = {
+    "order_id": 1,
+    "customer_name": "Bench Customer",
+    "customer_username": "bench_user",
+    "customer_address": "Bench street 1",
+    "comment": None,
+    "items": [{"flower_batch_id": 1, "quantity": 10, "name": "Роза", "description": "Красная"}],
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure order notification latency against the Bot API stub.")
+    parser.add_argument("--notifications", type=int, default=100, help="notifications per scenario (default 100)")
+    parser.add_argument("--burst", type=int, default=10, help="concurrent notifications in a burst (default 10)")
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0, help="stub delay per request (default 50)")
+    parser.add_argument("--connect-latency-ms", type=float, default=150.0,
+                        help="stub delay per new connection (default 150)")
+    parser.add_argument("--per-call", action="store_true", help="a new Bot client for every notification")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    return parser.parse_args()
+
+
+async def send_per_call(order_details: dict):
+    """The notification as sent before the shared client: a new Bot (and httpx client) every time."""
+    bot = telegram.make_bot(settings.TOKEN)
+    await bot.send_message(chat_id=settings.CHAT_ID, text=f"Order {order_details['order_id']}")
+
+
+async def timed(send, order_details: dict) -> float:
+    started = time.perf_counter()
+    await send(order_details)
+    return (time.perf_counter() - started) * 1000
+
+
+def summary(latencies: list) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "n": len(ordered),
+        "p50_ms": round(statistics.median(ordered), 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max_ms": round(ordered[-1], 1),
+    }
+
+
+async def run(args: argparse.Namespace, stub: TelegramStubServer) -> dict:
+    send = send_per_call if args.per_call else telegram.send_new_order_notification
+    if not args.per_call:
+        await telegram.shared_bot.start()
+    try:
+        report = {}
+        connections = stub.stats.snapshot()["connections"]
+        report["sequential"] = summary([await timed(send, ORDER_DETAILS) for _ in range(args.notifications)])
+
+        burst = []
+        for _ in range(max(1, args.notifications // args.burst)):
+            burst += await asyncio.gather(*(timed(send, ORDER_DETAILS) for _ in range(args.burst)))
+        report["burst"] = summary(burst)
+        report["connections"] = stub.stats.snapshot()["connections"] - connections
+    finally:
+        await telegram.shared_bot.stop()
+    return report
+
+
+def main():
+    args = parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    stub = TelegramStubServer(latency_ms=args.stub_latency_ms, connect_latency_ms=args.connect_latency_ms)
+    stub.start_in_thread()
+    settings.TELEGRAM_API_URL = stub.url
+    settings.TOKEN = "bench-token"
+    settings.CHAT_ID = "1"
+
+    print("=" * 60)
+    print(f"Order notifications ({'new client per call' if args.per_call else 'shared client'})")
+    print(f"Stub: {args.stub_latency_ms:g} ms per request, {args.connect_latency_ms:g} ms per new connection")
+    print("=" * 60)
+    try:
+        report = asyncio.run(run(args, stub))
+    finally:
+        stub.shutdown()
+    report["mode"] = "per-call" if args.per_call else "shared"
+    if not args.per_call:
+        report["failed"] = sum(h.count for (kind, outcome), h in registry.notifications.items() if outcome == "failed")
+
+    for scenario in ("sequential", "burst"):
+        stats = report[scenario]
+        print(f"  {scenario:<11} n={stats['n']:<5} p50 {stats['p50_ms']:>7} ms  "
+              f"p95 {stats['p95_ms']:>7} ms  max {stats['max_ms']:>7} ms")
+    print(f"  {'connections':<11} {report['connections']}")
+    if "failed" in report:
+        print(f"  {'failed':<11} {report['failed']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,637 @@
+"""
+Benchmark suite for the CRUD layer and the HTTP endpoints.
+
+Times every public function of app/crud.py and every route of the app against
+a database filled by benchmarks.seed, writes the results as JSON and compares
+them with a stored baseline (benchmarks/baseline.json by default).
+
+Each iteration runs inside a transaction that is rolled back afterwards
+(commits inside CRUD functions only flush), so the seeded data is the same
+for every case and every run. Endpoints go through the real ASGI
+app with FastAPI's TestClient; their DB dependencies are pointed at the same
+rolled-back transaction. Telegram notifications are disabled. Every case also
+records how many SQL statements one call sends ("statements").
+
+Run with:
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.run
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.run --output results.json
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.run --save-baseline
+
+Exits with status 1 when a case fails, sends more statements than in the
+baseline, or when both its median and its fastest iteration are slower than
+the baseline by more than --tolerance (and the median by at least --min-delta-ms).
+"""
+
+import argparse
+import datetime
+import gc
+import inspect
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+
+from app import auth, crud, models, schemas
+from app.catalog_cache import catalog_cache
+from app.config import settings
+from app.database import (
+    ASYNC_MODE, SQLITE_PROFILE, configure_sqlite_profile, engine_options,
+    get_db, get_write_db, sync_database_url,
+)
+from app.main import app, UPLOADS_DIR
+from app.principal_cache import principal_cache
+from benchmarks.seed import ADMIN_USERNAME, BENCH_PASSWORD, STOCK_FLOWER_NAME
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+UPLOAD_NAME = "bench-upload.png"
+# The large order: this many lines of ORDER_LINE_QUANTITY units each
+ORDER_LINES = 30
+ORDER_LINE_QUANTITY = 10
+# Smallest valid PNG, for the multipart upload endpoints
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the CRUD and endpoint benchmarks.")
+    parser.add_argument("--repeat", type=int, default=20, help="timed iterations per case (default 20)")
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.50,
+                        help="allowed slowdown of the median and the minimum, as a fraction (default 0.50)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="ignore slowdowns smaller than this many ms (default 2.0)")
+    parser.add_argument("--no-fail", action="store_true", help="exit with 0 even on regressions")
+    return parser.parse_args()
+
+
+# --- Sandbox: every iteration in its own rolled-back transaction ---
+
+bench_engine = create_engine(sync_database_url, **engine_options())
+if SQLITE_PROFILE:
+    configure_sqlite_profile(bench_engine)
+
+
+class StatementCounter:
+    """Statements sent through bench_engine so far."""
+
+    count = 0
+
+
+@event.listens_for(bench_engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    StatementCounter.count += 1
+
+
+class Sandbox:
+    """One connection whose outer transaction is rolled back on exit."""
+
+    current: Optional["Sandbox"] = None
+
+    def __enter__(self):
+        self.connection = bench_engine.connect()
+        self.transaction = self.connection.begin()
+        Sandbox.current = self
+        return self
+
+    def session(self) -> Session:
+        # commit() inside CRUD functions flushes but leaves the outer transaction
+        # open; a request may hold several sessions on this connection at once
+        return Session(bind=self.connection, join_transaction_mode="rollback_only", autoflush=False)
+
+    def __exit__(self, *exc):
+        Sandbox.current = None
+        self.transaction.rollback()
+        self.connection.close()
+
+
+def sandbox_db():
+    """Replaces get_db / get_write_db for the endpoint benchmarks."""
+    db = Sandbox.current.session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# --- Fixtures: ids and credentials taken from the seeded data ---
+
+class Fixtures:
+    def __init__(self, db: Session):
+        now = datetime.datetime.utcnow()
+        admin = crud.get_user_by_username(db, ADMIN_USERNAME)
+        if admin is None:
+            raise SystemExit("No benchmark data found. Run `python -m benchmarks.seed` first.")
+        self.admin_id = admin.id
+
+        # The customer with the most orders: the heaviest "my orders" page
+        self.customer_id = db.execute(
+            select(models.Order.customer_id)
+            .group_by(models.Order.customer_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).scalar_one()
+        self.customer_username = crud.get_user(db, self.customer_id).username
+
+        self.stock_flower_id = db.execute(
+            select(models.FlowerBatch.id).where(models.FlowerBatch.name == STOCK_FLOWER_NAME)
+        ).scalar_one()
+        self.flower_ids = db.execute(
+            select(models.FlowerBatch.id)
+            .where(models.FlowerBatch.status == "available", models.FlowerBatch.id != self.stock_flower_id)
+            .order_by(models.FlowerBatch.id)
+            .limit(20)
+        ).scalars().all()
+        self.flower_id = self.flower_ids[0]
+        self.order_flower_ids = db.execute(
+            select(models.FlowerBatch.id)
+            .where(
+                models.FlowerBatch.status == "available",
+                models.FlowerBatch.quantity >= ORDER_LINE_QUANTITY,
+                models.FlowerBatch.id != self.stock_flower_id,
+            )
+            .order_by(models.FlowerBatch.id)
+            .limit(ORDER_LINES)
+        ).scalars().all()
+        self.order_id = db.execute(
+            select(func.max(models.Order.id)).where(models.Order.customer_id == self.customer_id)
+        ).scalar_one()
+        self.refresh_token = db.execute(
+            select(models.RefreshToken.token)
+            .where(models.RefreshToken.is_revoked == False, models.RefreshToken.expires_at > now)
+            .limit(1)
+        ).scalar_one()
+        self.subscriber_id = db.execute(select(models.TelegramSubscriber.chat_id).limit(1)).scalar()
+
+        self.admin_headers = {"Authorization": "Bearer " + auth.create_access_token({"sub": ADMIN_USERNAME})}
+        self.customer_headers = {"Authorization": "Bearer " + auth.create_access_token({"sub": self.customer_username})}
+
+        self.flower_cursor = crud.get_flowers_keyset(db, per_page=20)["next_cursor"]
+        self.order_cursor = crud.get_orders_keyset(db, per_page=20)["next_cursor"]
+        self.user_cursor = crud.get_users_keyset(db, per_page=20)["next_cursor"]
+        self.order_count = db.execute(select(func.count()).select_from(models.Order)).scalar_one()
+        # A month at the old end of the order history, deep in the created_at index
+        oldest = db.execute(select(func.min(models.Order.created_at))).scalar_one()
+        self.summary_from = oldest.date()
+        self.summary_to = self.summary_from + datetime.timedelta(days=30)
+
+
+# --- Cases ---
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[Session, Any], Any]
+    prepare: Optional[Callable[[Session], Any]] = None
+    writes: bool = False  # Clear the in-process caches after each iteration
+    repeat: Optional[int] = None  # Fewer iterations for bcrypt-bound cases
+
+
+def new_user(db: Session) -> int:
+    user = models.User(username=f"bench_tmp_{time.perf_counter_ns()}", hashed_password="x", role="customer")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def new_flower(db: Session) -> int:
+    flower = crud.create_flower_batch(db, schemas.FlowerBatchCreate(
+        name="bench_tmp", price=100, quantity=10, image_url="/static/uploads/bench-missing.jpg"
+    ))
+    return flower.id
+
+
+def clear_broadcast_jobs(db: Session):
+    """Otherwise every call after the first just returns the job still waiting for the bot."""
+    db.query(models.BroadcastDelivery).delete()
+    db.query(models.BroadcastJob).delete()
+    db.commit()
+
+
+def new_refresh_token(db: Session, user_id: int) -> str:
+    token = auth.generate_refresh_token()
+    crud.create_refresh_token(db, token, user_id, auth.get_refresh_token_expires())
+    return token
+
+
+def claim_key(db: Session, user_id: int):
+    now = datetime.datetime.utcnow()
+    record, _ = crud.claim_idempotency_key(
+        db, user_id, f"bench-{time.perf_counter_ns()}", "hash",
+        now + datetime.timedelta(hours=24), now - datetime.timedelta(minutes=5)
+    )
+    return record
+
+
+def large_order(f: Fixtures) -> dict:
+    return {"items": [
+        {"flower_batch_id": flower_id, "quantity": ORDER_LINE_QUANTITY} for flower_id in f.order_flower_ids
+    ]}
+
+
+def placed(result):
+    """create_order returns a message instead of raising; a rejected order must not pass as a fast one."""
+    if isinstance(result, str):
+        raise RuntimeError(result)
+    return result
+
+
+def crud_cases(f: Fixtures) -> list:
+    checkout = schemas.OrderCreate(items=[{"flower_batch_id": f.stock_flower_id, "quantity": 5}])
+    large_checkout = schemas.OrderCreate(**large_order(f))
+    return [
+        Case("crud.get_catalog_version", lambda db, _: crud.get_catalog_version(db)),
+        Case("crud.bump_catalog_version", lambda db, _: (crud.bump_catalog_version(db), db.commit()), writes=True),
+        Case("crud.get_flower", lambda db, _: crud.get_flower(db, f.flower_id)),
+        Case("crud.get_flower_updated_at", lambda db, _: crud.get_flower_updated_at(db, f.flower_id)),
+        Case("crud.get_flowers_by_ids", lambda db, _: crud.get_flowers_by_ids(db, f.flower_ids)),
+        Case("crud.reserve_stock", lambda db, _: (crud.reserve_stock(db, f.stock_flower_id, 1), db.commit()), writes=True),
+        Case("crud.get_flowers", lambda db, _: crud.get_flowers(db)),
+        Case("crud.get_flowers_paginated", lambda db, _: crud.get_flowers_paginated(db, page=50)),
+        Case("crud.get_flowers_keyset", lambda db, _: crud.get_flowers_keyset(db, cursor=f.flower_cursor)),
+        Case("crud.get_users_paginated", lambda db, _: crud.get_users_paginated(db, page=50)),
+        Case("crud.get_users_keyset", lambda db, _: crud.get_users_keyset(db, cursor=f.user_cursor)),
+        Case("crud.get_orders_paginated", lambda db, _: crud.get_orders_paginated(db, page=1000)),
+        Case("crud.get_orders_keyset", lambda db, _: crud.get_orders_keyset(db, cursor=f.order_cursor)),
+        Case("crud.get_order_summaries", lambda db, _: crud.get_order_summaries(
+            db, status=schemas.OrderStatus.new, created_from=f.summary_from, created_to=f.summary_to)),
+        Case("crud.get_user", lambda db, _: crud.get_user(db, f.customer_id)),
+        Case("crud.get_user_by_username", lambda db, _: crud.get_user_by_username(db, f.customer_username)),
+        Case("crud.get_users", lambda db, _: crud.get_users(db)),
+        Case("crud.create_user", lambda db, _: crud.create_user(db, schemas.UserCreate(
+            username=f"bench_new_{time.perf_counter_ns()}", password=BENCH_PASSWORD
+        )), writes=True, repeat=5),
+        Case("crud.update_user", lambda db, _: crud.update_user(db, f.customer_id, schemas.UserUpdate(
+            username=f.customer_username, contact_name="Клиент (изменён)"
+        )), writes=True),
+        Case("crud.update_user_self", lambda db, _: crud.update_user_self(
+            db, f.customer_id, schemas.UserSelfUpdate(address="ул. Новая, 1")
+        ), writes=True),
+        Case("crud.delete_user", lambda db, user_id: crud.delete_user(db, user_id), prepare=new_user, writes=True),
+        Case("crud.get_order", lambda db, _: crud.get_order(db, f.order_id)),
+        Case("crud.get_orders", lambda db, _: crud.get_orders(db)),
+        Case("crud.get_orders_by_customer", lambda db, _: crud.get_orders_by_customer(db, f.customer_id)),
+        Case("crud.get_customer_orders_state", lambda db, _: crud.get_customer_orders_state(db, f.customer_id)),
+        Case("crud.update_order_status", lambda db, _: crud.update_order_status(
+            db, f.order_id, schemas.OrderStatus.processing
+        ), writes=True),
+        Case("crud.create_order", lambda db, _: placed(crud.create_order(db, checkout, f.customer_id)), writes=True),
+        Case(f"crud.create_order [{ORDER_LINES} lines]", lambda db, _: placed(
+            crud.create_order(db, large_checkout, f.customer_id)
+        ), writes=True),
+        Case("crud.create_flower_batch", lambda db, _: new_flower(db), writes=True),
+        Case("crud.update_flower", lambda db, _: crud.update_flower(
+            db, f.flower_id, schemas.FlowerBatchUpdate(price=123.0)
+        ), writes=True),
+        Case("crud.sell_flowers", lambda db, _: crud.sell_flowers(db, f.stock_flower_id, 1), writes=True),
+        Case("crud.delete_flower", lambda db, flower_id: crud.delete_flower(db, flower_id),
+             prepare=new_flower, writes=True),
+        Case("crud.add_quantity", lambda db, _: crud.add_quantity(db, f.flower_id, 1), writes=True),
+        Case("crud.delete_old_flowers", lambda db, _: crud.delete_old_flowers(db), writes=True, repeat=5),
+        Case("crud.get_idempotency_key", lambda db, _: crud.get_idempotency_key(db, f.customer_id, "missing")),
+        Case("crud.claim_idempotency_key", lambda db, _: claim_key(db, f.customer_id), writes=True),
+        Case("crud.complete_idempotency_key", lambda db, record_id: crud.complete_idempotency_key(
+            db, record_id, 200, "{}"
+        ), prepare=lambda db: claim_key(db, f.customer_id).id, writes=True),
+        Case("crud.release_idempotency_key", lambda db, record_id: crud.release_idempotency_key(db, record_id),
+             prepare=lambda db: claim_key(db, f.customer_id).id, writes=True),
+        Case("crud.cleanup_expired_idempotency_keys",
+             lambda db, _: crud.cleanup_expired_idempotency_keys(db), writes=True),
+        Case("crud.get_subscriber", lambda db, _: crud.get_subscriber(db, f.subscriber_id or 0)),
+        Case("crud.create_or_update_subscriber", lambda db, _: crud.create_or_update_subscriber(
+            db, f.subscriber_id or 1, is_active=True
+        ), writes=True),
+        Case("crud.get_active_subscribers", lambda db, _: crud.get_active_subscribers(db)),
+        Case("crud.create_refresh_token", lambda db, _: new_refresh_token(db, f.customer_id), writes=True),
+        Case("crud.get_refresh_token", lambda db, _: crud.get_refresh_token(db, f.refresh_token)),
+        Case("crud.get_valid_refresh_token", lambda db, _: crud.get_valid_refresh_token(db, f.refresh_token)),
+        Case("crud.revoke_refresh_token", lambda db, token: crud.revoke_refresh_token(db, token),
+             prepare=lambda db: new_refresh_token(db, f.customer_id), writes=True),
+        Case("crud.revoke_all_user_tokens", lambda db, _: crud.revoke_all_user_tokens(db, f.customer_id),
+             writes=True),
+        Case("crud.get_user_refresh_tokens", lambda db, _: crud.get_user_refresh_tokens(db, f.customer_id)),
+        Case("crud.cleanup_expired_tokens", lambda db, _: crud.cleanup_expired_tokens(db), writes=True, repeat=5),
+        Case("crud.rotate_refresh_token", lambda db, token: crud.rotate_refresh_token(
+            db, token, auth.generate_refresh_token(), auth.get_refresh_token_expires()
+        ), prepare=lambda db: new_refresh_token(db, f.customer_id), writes=True),
+    ]
+
+
+def endpoint_cases(f: Fixtures, client: TestClient) -> list:
+    admin, customer = f.admin_headers, f.customer_headers
+
+    def call(method, url, headers=None, expect=200, **kwargs):
+        def run(db, _):
+            response = client.request(method, url, headers=headers, **kwargs)
+            client.cookies.clear()
+            if response.status_code != expect:
+                raise RuntimeError(f"{method} {url}: {response.status_code} {response.text[:200]}")
+            return response
+        return run
+
+    def with_token(method, url, headers=None):
+        def run(db, token):
+            return call(method, url, headers=headers, json={"refresh_token": token})(db, None)
+        return run
+
+    def upload():
+        return {"image": (UPLOAD_NAME, PNG_BYTES, "image/png")}
+
+    checkout = {"items": [{"flower_batch_id": f.stock_flower_id, "quantity": 5}]}
+    customer_token = lambda db: new_refresh_token(db, f.customer_id)
+    flower_form = {"name": "bench_tmp", "description": "d", "price": "100", "quantity": "10"}
+    last_page = max(1, f.order_count // 20)
+
+    return [
+        Case("POST /token", call("POST", "/token", data={
+            "username": f.customer_username, "password": BENCH_PASSWORD
+        }), writes=True, repeat=5),
+        Case("POST /token/refresh", with_token("POST", "/token/refresh"), prepare=customer_token, writes=True),
+        Case("POST /token/logout", with_token("POST", "/token/logout"), prepare=customer_token, writes=True),
+        Case("POST /token/logout-all", call("POST", "/token/logout-all", customer), writes=True),
+        Case("GET /token/sessions", call("GET", "/token/sessions", customer)),
+
+        Case("GET /flowers/", call("GET", "/flowers/")),
+        Case("GET /flowers/ [uncached]", call("GET", "/flowers/"), prepare=lambda db: catalog_cache.clear()),
+        Case("GET /flowers/paginated/", call("GET", "/flowers/paginated/?page=50")),
+        Case("GET /flowers/paginated/ [keyset]", call("GET", f"/flowers/paginated/?cursor={f.flower_cursor}")),
+        Case("GET /flowers/{flower_id}", call("GET", f"/flowers/{f.flower_id}")),
+        Case("POST /flowers/", call("POST", "/flowers/", admin, data=flower_form, files=upload()), writes=True),
+        Case("PUT /flowers/{flower_id}", call("PUT", f"/flowers/{f.flower_id}", admin, json={"price": 123.0}),
+             writes=True),
+        Case("PATCH /flowers/{flower_id}/sell", call("PATCH", f"/flowers/{f.stock_flower_id}/sell", admin,
+                                                     json={"quantity": 1}), writes=True),
+        Case("PATCH /flowers/{flower_id}/add", call("PATCH", f"/flowers/{f.flower_id}/add", admin,
+                                                    json={"quantity": 1}), writes=True),
+        Case("DELETE /flowers/{flower_id}", lambda db, flower_id: call(
+            "DELETE", f"/flowers/{flower_id}", admin)(db, None), prepare=new_flower, writes=True),
+        Case("POST /flowers/cleanup", call("POST", "/flowers/cleanup", admin), writes=True, repeat=5),
+
+        Case("POST /api/notify_new_flowers", call("POST", "/api/notify_new_flowers", admin),
+             prepare=clear_broadcast_jobs, writes=True),
+
+        Case("GET /orders/me/", call("GET", "/orders/me/", customer)),
+        Case("POST /orders/", call("POST", "/orders/", customer, json=checkout), writes=True),
+        Case(f"POST /orders/ [{ORDER_LINES} lines]", call("POST", "/orders/", customer, json=large_order(f)),
+             writes=True),
+        Case("GET /orders/", call("GET", "/orders/", admin)),
+        Case("GET /orders/paginated/", call("GET", "/orders/paginated/?page=1000", admin)),
+        Case("GET /orders/paginated/ [last page]", call("GET", f"/orders/paginated/?page={last_page}", admin)),
+        Case("GET /orders/paginated/ [keyset]", call("GET", f"/orders/paginated/?cursor={f.order_cursor}", admin)),
+        Case("GET /orders/summary/", call("GET", "/orders/summary/?with_total=true", admin)),
+        Case("GET /orders/summary/ [filtered]", call(
+            "GET", f"/orders/summary/?status=new&created_from={f.summary_from}&created_to={f.summary_to}", admin)),
+        Case("GET /orders/statuses/list", call("GET", "/orders/statuses/list", admin)),
+        Case("GET /orders/{order_id}", call("GET", f"/orders/{f.order_id}", customer)),
+        Case("PATCH /orders/{order_id}/status", call("PATCH", f"/orders/{f.order_id}/status", admin,
+                                                     json={"status": "processing"}), writes=True),
+
+        Case("POST /users/", lambda db, _: call("POST", "/users/", admin, data={
+            "username": f"bench_new_{time.perf_counter_ns()}", "password": BENCH_PASSWORD,
+            "contact_name": "Новый клиент",
+        })(db, None), writes=True, repeat=5),
+        Case("GET /users/", call("GET", "/users/", admin)),
+        Case("GET /users/paginated/", call("GET", "/users/paginated/?page=50", admin)),
+        Case("GET /users/paginated/ [keyset]", call("GET", f"/users/paginated/?cursor={f.user_cursor}", admin)),
+        Case("GET /users/me/", call("GET", "/users/me/", customer)),
+        Case("PATCH /users/me/", call("PATCH", "/users/me/", customer, json={"address": "ул. Новая, 1"}),
+             writes=True),
+        Case("GET /users/me/admin/", call("GET", "/users/me/admin/", admin)),
+        Case("GET /users/{user_id}", call("GET", f"/users/{f.customer_id}", admin)),
+        Case("PUT /users/{user_id}", call("PUT", f"/users/{f.customer_id}", admin, json={
+            "username": f.customer_username, "contact_name": "Клиент (изменён)"
+        }), writes=True),
+        Case("DELETE /users/{user_id}", lambda db, user_id: call(
+            "DELETE", f"/users/{user_id}", admin)(db, None), prepare=new_user, writes=True),
+
+        Case("GET /", call("GET", "/")),
+        Case("GET /admin", call("GET", "/admin")),
+        Case("GET /wedding", call("GET", "/wedding")),
+        Case("GET /metrics", call("GET", "/metrics")),
+        Case("GET /monitoring/slow-queries", call("GET", "/monitoring/slow-queries", admin)),
+        Case("DELETE /monitoring/slow-queries", call("DELETE", "/monitoring/slow-queries", admin)),
+    ]
+
+
+def uncovered(cases: list, app) -> list:
+    """Public CRUD functions and routes that have no benchmark case."""
+    names = {case.name.split(" [")[0] for case in cases}
+    missing = [
+        f"crud.{name}" for name, obj in vars(crud).items()
+        if inspect.isfunction(obj) and obj.__module__ == crud.__name__
+        and not name.startswith("_") and f"crud.{name}" not in names
+    ]
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            for method in sorted(route.methods):
+                if f"{method} {route.path}" not in names:
+                    missing.append(f"{method} {route.path}")
+    return missing
+
+
+# --- Running and reporting ---
+
+def measure(case: Case, repeat: int) -> dict:
+    timings = []
+    cpu_timings = []
+    statements = []
+    for i in range(repeat + 1):  # The first iteration warms up and is not counted
+        with Sandbox() as sandbox:
+            arg = None
+            if case.prepare:
+                db = sandbox.session()
+                arg = case.prepare(db)
+                db.close()
+            db = sandbox.session()
+            # As timeit does: no garbage collection pauses inside the measurement
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                cpu_started = time.process_time()
+                statements_before = StatementCounter.count
+                case.run(db, arg)
+                elapsed = time.perf_counter() - started
+                cpu_elapsed = time.process_time() - cpu_started
+                sent = StatementCounter.count - statements_before
+            finally:
+                gc.enable()
+            db.close()
+        if case.writes:
+            # Rolled-back writes must not stay in the per-process caches
+            catalog_cache.clear()
+            principal_cache.clear()
+        if i:
+            timings.append(elapsed * 1000)
+            cpu_timings.append(cpu_elapsed * 1000)
+            statements.append(sent)
+
+    timings.sort()
+    return {
+        "n": len(timings),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[max(0, int(len(timings) * 0.95) - 1)], 3),
+        "min_ms": round(timings[0], 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        # CPU time of the whole process (all threads), which excludes waiting on I/O
+        "cpu_median_ms": round(statistics.median(cpu_timings), 3),
+        # SQL statements per call; the same in every iteration unless a cache is involved
+        "statements": statistics.median_low(statements),
+    }
+
+
+def data_volume() -> dict:
+    tables = [models.User, models.FlowerBatch, models.Order, models.OrderItem,
+              models.RefreshToken, models.TelegramSubscriber]
+    with bench_engine.connect() as conn:
+        return {
+            model.__tablename__: conn.execute(select(func.count()).select_from(model)).scalar_one()
+            for model in tables
+        }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    """Print the comparison table and return the names of regressed cases."""
+    if baseline["meta"].get("rows") != results["meta"]["rows"]:
+        print("\nWarning: the baseline was measured on a different data volume:")
+        print(f"  baseline: {baseline['meta'].get('rows')}")
+        print(f"  current:  {results['meta']['rows']}")
+
+    regressions = []
+    print(f"\n{'case':<48} {'baseline':>10} {'current':>10} {'change':>8} {'statements':>12}")
+    for name, current in results["cases"].items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            print(f"{name:<48} {'-':>10} {current['median_ms']:>10.2f} {'new':>8} {current['statements']:>12}")
+            continue
+        delta = current["median_ms"] - base["median_ms"]
+        change = delta / base["median_ms"] if base["median_ms"] else 0.0
+        # The fastest iteration must be slower too: a noisy run moves the median, not the floor
+        min_change = current["min_ms"] / base["min_ms"] - 1 if base["min_ms"] else 0.0
+        # Baselines saved before the count was recorded have no "statements"
+        base_statements = base.get("statements", current["statements"])
+        flag = ""
+        if change > tolerance and min_change > tolerance and delta >= min_delta_ms:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif current["statements"] > base_statements:
+            # The count does not depend on the machine, so any increase is a new query
+            regressions.append(name)
+            flag = "  MORE STATEMENTS"
+        statements = f"{base_statements}->{current['statements']}" if base_statements != current["statements"] \
+            else str(current["statements"])
+        print(f"{name:<48} {base['median_ms']:>10.2f} {current['median_ms']:>10.2f} {change:>+8.0%}"
+              f" {statements:>12}{flag}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    if ASYNC_MODE:
+        raise SystemExit("Benchmarks use the sync app; set DATABASE_URL without an async driver. "
+                         "To compare the sync and async modes run `python -m benchmarks.load --compare-async`.")
+
+    # No real Telegram requests from the benchmark
+    settings.TOKEN = None
+    settings.CHAT_ID = None
+    for name in ("httpx", "app.telegram"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    app.dependency_overrides[get_db] = sandbox_db
+    app.dependency_overrides[get_write_db] = sandbox_db
+    client = TestClient(app)
+
+    with Sandbox() as sandbox:
+        fixtures = Fixtures(sandbox.session())
+
+    cases = crud_cases(fixtures) + endpoint_cases(fixtures, client)
+    for name in uncovered(cases, app):
+        print(f"Warning: no benchmark case for {name}")
+    if args.only:
+        cases = [case for case in cases if args.only in case.name]
+
+    results = {
+        "meta": {
+            "created_at": datetime.datetime.utcnow().isoformat(timespec="seconds"),
+            "database": sync_database_url.get_backend_name(),
+            "sqlite_profile": SQLITE_PROFILE,
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "repeat": args.repeat,
+            "rows": data_volume(),
+        },
+        "cases": {},
+    }
+
+    failed = []
+    try:
+        for case in cases:
+            try:
+                stats = measure(case, case.repeat or args.repeat)
+            except Exception as e:
+                failed.append(case.name)
+                print(f"  {case.name:<48} FAILED: {e}")
+                continue
+            results["cases"][case.name] = stats
+            print(f"  {case.name:<48} median {stats['median_ms']:>9.2f} ms   p95 {stats['p95_ms']:>9.2f} ms"
+                  f"   cpu {stats['cpu_median_ms']:>9.2f} ms   statements {stats['statements']:>4}")
+    finally:
+        (UPLOADS_DIR / UPLOAD_NAME).unlink(missing_ok=True)
+
+    if failed:
+        # A broken case must not be mistaken for a fast one, or saved as the baseline
+        print(f"\n{len(failed)} case(s) failed: {', '.join(failed)}")
+        sys.exit(1)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, ensure_ascii=False))
+        print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    baseline_path = Path(args.baseline)
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path}; run with --save-baseline to create one.")
+        return
+
+    regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}"
+              " or sending more statements:")
+        for name in regressions:
+            print(f"  {name}")
+        if not args.no_fail:
+            sys.exit(1)
+    else:
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Running benchmarks")
+    print("=" * 60)
+    main()
@@ -0,0 +1,210 @@
+"""
+Synthetic data generator for benchmarks.
+
+Fills the database from DATABASE_URL with configurable volumes of users,
+flower batches, orders, order items, refresh tokens and Telegram subscribers.
+Rows are written with bulk INSERTs in chunks, so production-sized volumes
+take seconds to minutes.
+
+Point DATABASE_URL at a separate database, never at production. The script
+applies the Alembic migrations first and refuses to run on a database that
+already has users, unless --force is given.
+
+Run with:
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.seed --orders 100000 --tokens 1000000
+"""
+
+import argparse
+import os
+import random
+import secrets
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from app import auth, models
+from app.database import engine
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+BENCH_PASSWORD = "benchpass"
+ADMIN_USERNAME = "bench_admin"
+CUSTOMER_PREFIX = "bench_user_"
+# Flower batch with unlimited stock, used by the checkout benchmarks
+STOCK_FLOWER_NAME = "bench_stock"
+
+FLOWER_NAMES = ["Роза", "Тюльпан", "Пион", "Хризантема", "Гортензия", "Эустома", "Гвоздика", "Лилия"]
+ORDER_STATUSES = ["new", "processing", "ready", "completed", "cancelled"]
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Seed a database with synthetic data for benchmarks.")
+    parser.add_argument("--users", type=int, default=2000, help="customers (default 2000)")
+    parser.add_argument("--flowers", type=int, default=5000, help="flower batches (default 5000)")
+    parser.add_argument("--orders", type=int, default=100_000, help="orders (default 100000)")
+    parser.add_argument("--items-per-order", type=int, default=3,
+                        help="maximum items per order, 1..N each (default 3)")
+    parser.add_argument("--tokens", type=int, default=1_000_000, help="refresh tokens (default 1000000)")
+    parser.add_argument("--subscribers", type=int, default=1000, help="Telegram subscribers (default 1000)")
+    parser.add_argument("--days", type=int, default=365, help="spread created_at over this many days")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="rows per INSERT batch")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="seed even if the database already has users")
+    return parser.parse_args(argv)
+
+
+def insert_chunked(table, rows, chunk_size: int) -> int:
+    """
+    Insert an iterable of row dicts in chunks, one transaction per chunk.
+    All rows must have the same keys: executemany takes the columns from the first row.
+    """
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            with engine.begin() as conn:
+                conn.execute(table.insert(), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        with engine.begin() as conn:
+            conn.execute(table.insert(), chunk)
+        total += len(chunk)
+    return total
+
+
+def seed(args: argparse.Namespace) -> dict:
+    rnd = random.Random(args.random_seed)
+    now = datetime.utcnow()
+
+    def past(days: int) -> datetime:
+        return now - timedelta(seconds=rnd.randint(0, days * 86400))
+
+    # One bcrypt hash for everybody: hashing 2000 passwords would dominate the run
+    hashed_password = auth.get_password_hash(BENCH_PASSWORD)
+    counts = {}
+
+    users = [{
+        "id": 1, "username": ADMIN_USERNAME, "hashed_password": hashed_password,
+        "role": "admin", "contact_name": "Администратор", "address": None,
+    }]
+    users += [{
+        "id": i + 2,
+        "username": f"{CUSTOMER_PREFIX}{i + 1}",
+        "hashed_password": hashed_password,
+        "role": "customer",
+        "contact_name": f"Клиент {i + 1}",
+        "address": f"ул. Цветочная, д. {i + 1}",
+    } for i in range(args.users)]
+    counts["users"] = insert_chunked(models.User.__table__, users, args.chunk_size)
+    customer_ids = [u["id"] for u in users[1:]]
+
+    def flower_rows():
+        yield {
+            "id": 1, "name": STOCK_FLOWER_NAME, "description": "Партия для бенчмарков",
+            "price": 1000.0, "quantity": 10 ** 9, "status": "available",
+            "image_url": "/static/uploads/bench-missing-1.jpg",
+            "created_at": now, "sold_at": None, "updated_at": now,
+        }
+        for i in range(2, args.flowers + 1):
+            created = past(args.days)
+            sold = rnd.random() < 0.3
+            yield {
+                "id": i,
+                "name": f"{rnd.choice(FLOWER_NAMES)} {i}",
+                "description": "Сгенерировано для бенчмарка",
+                "price": float(rnd.randint(50, 500)),
+                "quantity": 0 if sold else rnd.randint(10, 1000),
+                # Never points at a real file: delete_old_flowers removes images from disk
+                "image_url": f"/static/uploads/bench-missing-{i}.jpg",
+                "status": "sold" if sold else "available",
+                "created_at": created,
+                "sold_at": created + timedelta(days=rnd.randint(0, 14)) if sold else None,
+                "updated_at": created,
+            }
+    counts["flower_batches"] = insert_chunked(models.FlowerBatch.__table__, flower_rows(), args.chunk_size)
+
+    order_items = []
+
+    def order_rows():
+        item_id = 1
+        for order_id in range(1, args.orders + 1):
+            customer_id = rnd.choice(customer_ids)
+            created = past(args.days)
+            yield {
+                "id": order_id,
+                "customer_id": customer_id,
+                "customer_name": f"Клиент {customer_id - 1}",
+                "created_at": created,
+                "updated_at": created,
+                "status": rnd.choice(ORDER_STATUSES),
+            }
+            for _ in range(rnd.randint(1, args.items_per_order)):
+                flower_id = rnd.randint(1, args.flowers)
+                order_items.append({
+                    "id": item_id,
+                    "order_id": order_id,
+                    "flower_batch_id": flower_id,
+                    "quantity": rnd.randint(1, 50),
+                    "price_at_time_of_order": float(rnd.randint(50, 500)),
+                    "flower_name": f"Цветок {flower_id}",
+                })
+                item_id += 1
+    counts["orders"] = insert_chunked(models.Order.__table__, order_rows(), args.chunk_size)
+    counts["order_items"] = insert_chunked(models.OrderItem.__table__, order_items, args.chunk_size)
+
+    def token_rows():
+        for i in range(1, args.tokens + 1):
+            created = past(90)
+            yield {
+                "id": i,
+                "token": f"bench-{i}-{secrets.token_hex(8)}",
+                "user_id": rnd.choice(customer_ids),
+                "device_info": "benchmark",
+                "created_at": created,
+                "expires_at": created + timedelta(days=auth.REFRESH_TOKEN_EXPIRE_DAYS),
+                "is_revoked": rnd.random() < 0.2,
+            }
+    counts["refresh_tokens"] = insert_chunked(models.RefreshToken.__table__, token_rows(), args.chunk_size)
+
+    subscribers = ({
+        "chat_id": 100_000_000 + i,
+        "is_active": rnd.random() < 0.9,
+    } for i in range(args.subscribers))
+    counts["telegram_subscribers"] = insert_chunked(
+        models.TelegramSubscriber.__table__, subscribers, args.chunk_size
+    )
+
+    return counts
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("=" * 60)
+    print("Seeding benchmark data")
+    print("=" * 60)
+
+    from alembic import command
+    from alembic.config import Config
+    command.upgrade(Config(str(ROOT / "alembic.ini")), "head")
+
+    with engine.connect() as conn:
+        existing_users = conn.execute(select(func.count()).select_from(models.User.__table__)).scalar()
+    if existing_users and not args.force:
+        print(f"The database already has {existing_users} users. "
+              "Seed an empty database or pass --force.")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    counts = seed(args)
+    for table, count in counts.items():
+        print(f"  {table}: {count} rows")
+    print(f"\nSeeding complete in {time.perf_counter() - started:.1f}s.")
@@ -0,0 +1,269 @@
+"""
+Local stand-in for the Telegram Bot API (api.telegram.org).
+
+Answers every Bot API method with a successful, minimal response, so the
+app's notifications and broadcasts can run offline and under load. Sent
+photos come back with file_ids, as from Telegram. Requests
+are counted per method; an optional delay imitates the round trip to Telegram,
+and --connect-latency-ms adds a delay to every new connection, like the TCP
+and TLS handshakes with api.telegram.org. getUpdates never has updates and
+holds the request for its long-polling timeout (up to LONG_POLL_MAX seconds),
+so a polling bot (run_bot.py) waits instead of spinning.
+Point the app at it with TELEGRAM_API_URL=http://127.0.0.1:<port>.
+
+Optionally it enforces flood limits like the real API: more than
+--rate-limit requests in a second, or two requests to one chat within
+--per-chat-interval seconds, get HTTP 429 with retry_after. With
+--blocked-every N, chats whose id is a multiple of N answer 403, as if they
+had blocked the bot.
+
+Used in-process by benchmarks.load and benchmarks.broadcast, or standalone:
+    python -m benchmarks.telegram_stub --port 8081 --latency-ms 50 --rate-limit 30
+Counters are available at GET /stats.
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+BOT_METHOD_PATH = re.compile(r"^/(?:file/)?bot[^/]+/(\w+)")
+# chat_id from a urlencoded, JSON or multipart body
+CHAT_ID = re.compile(rb'chat_id"?(?:=|:\s*|"\r\n\r\n)"?(-?\d+)')
+# Photos of a sendMediaGroup; the media list is urlencoded when no file is uploaded
+PHOTO_MEDIA = re.compile(rb'"type":\s*"photo"|%22type%22%3A\+?%22photo%22')
+# Long-polling timeout of a getUpdates, urlencoded or JSON
+POLL_TIMEOUT = re.compile(rb'timeout"?(?:=|:\s*)(\d+)')
+LONG_POLL_MAX = 10
+
+
+class StubStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.calls = Counter()
+        self.chats = set()
+        self.bytes_received = 0
+        self.connections = 0
+        self.rate_limited = 0
+        self.peak_per_second = 0
+        self._recent = deque()  # Times of accepted requests in the last second
+
+    def record(self, method: str, chat_id: Optional[int], size: int):
+        with self._lock:
+            now = time.monotonic()
+            self._recent.append(now)
+            while self._recent[0] <= now - 1:
+                self._recent.popleft()
+            self.peak_per_second = max(self.peak_per_second, len(self._recent))
+            self.calls[method] += 1
+            self.bytes_received += size
+            if chat_id is not None:
+                self.chats.add(chat_id)
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def record_rate_limited(self):
+        with self._lock:
+            self.rate_limited += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            total = sum(self.calls.values())
+            return {
+                "calls": dict(self.calls),
+                "total_calls": total,
+                "calls_per_second": round(total / elapsed, 2) if elapsed else 0.0,
+                "peak_calls_per_second": self.peak_per_second,
+                "rate_limited": self.rate_limited,
+                "distinct_chats": len(self.chats),
+                "connections": self.connections,
+                "bytes_received": self.bytes_received,
+            }
+
+
+def _message(message_id: int, chat_id: int) -> dict:
+    return {"message_id": message_id, "date": int(time.time()), "chat": {"id": chat_id, "type": "private"}}
+
+
+def _photo_message(message_id: int, chat_id: int) -> dict:
+    # Like Telegram: a thumbnail and the original, each with a file_id to send it again by
+    sizes = [
+        {"file_id": f"stub-photo-{message_id}-{size}", "file_unique_id": f"stub-{message_id}-{size}",
+         "width": size, "height": size}
+        for size in (90, 1280)
+    ]
+    return {**_message(message_id, chat_id), "photo": sizes}
+
+
+class TelegramStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    # Headers and body are written separately; with Nagle's algorithm the body would wait
+    # for the client's delayed ACK (40 ms) on a kept-alive connection
+    disable_nagle_algorithm = True
+
+    server: "TelegramStubServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.stats.record_connection()
+        if self.server.connect_latency:
+            time.sleep(self.server.connect_latency)
+
+    def _reply(self, payload, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(self.server.stats.snapshot())
+        else:
+            self._handle(b"")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._handle(self.rfile.read(length) if length else b"")
+
+    def _handle(self, body: bytes):
+        match = BOT_METHOD_PATH.match(self.path)
+        if not match:
+            self._reply({"ok": False, "error_code": 404, "description": "Not Found"}, status=404)
+            return
+        method = match.group(1)
+        chat_match = CHAT_ID.search(body)
+        chat_id = int(chat_match.group(1)) if chat_match else None
+        retry_after = self.server.flood_check(chat_id)
+        if retry_after:
+            self._reply({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            }, status=429)
+            return
+        self.server.stats.record(method, chat_id, len(body))
+        if self.server.is_blocked(chat_id):
+            self._reply({
+                "ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user",
+            }, status=403)
+            return
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self._reply({"ok": True, "result": self.server.result_for(method, chat_id or 0, body)})
+
+
+class TelegramStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 rate_limit: Optional[int] = None, per_chat_interval: float = 0.0, blocked_every: int = 0,
+                 connect_latency_ms: float = 0.0):
+        super().__init__((host, port), TelegramStubHandler)
+        self.latency = latency_ms / 1000
+        self.connect_latency = connect_latency_ms / 1000
+        self.rate_limit = rate_limit
+        self.per_chat_interval = per_chat_interval
+        self.blocked_every = blocked_every
+        self.stats = StubStats()
+        self._flood_lock = threading.Lock()
+        self._window = deque()  # Times of requests accepted in the last second
+        self._last_by_chat = {}
+        self._message_ids = iter(range(1, 1 << 62))
+        self._ids_lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # The app may be stopped in the middle of a request; that's not worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def flood_check(self, chat_id: Optional[int]) -> int:
+        """Seconds to wait if this request breaks a flood limit, otherwise 0 (and it is counted)."""
+        if not self.rate_limit and not self.per_chat_interval:
+            return 0
+        with self._flood_lock:
+            now = time.monotonic()
+            while self._window and self._window[0] <= now - 1:
+                self._window.popleft()
+            last = self._last_by_chat.get(chat_id)
+            if self.rate_limit and len(self._window) >= self.rate_limit:
+                retry_after = 1
+            elif chat_id is not None and last is not None and now - last < self.per_chat_interval:
+                retry_after = max(1, round(self.per_chat_interval - (now - last)))
+            else:
+                self._window.append(now)
+                if chat_id is not None:
+                    self._last_by_chat[chat_id] = now
+                return 0
+        self.stats.record_rate_limited()
+        return retry_after
+
+    def is_blocked(self, chat_id: Optional[int]) -> bool:
+        return bool(self.blocked_every) and chat_id is not None and chat_id % self.blocked_every == 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _next_id(self) -> int:
+        with self._ids_lock:
+            return next(self._message_ids)
+
+    def result_for(self, method: str, chat_id: int, body: bytes):
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "Stub", "username": "stub_bot"}
+        if method == "getUpdates":
+            timeout = POLL_TIMEOUT.search(body)
+            time.sleep(min(int(timeout.group(1)), LONG_POLL_MAX) if timeout else 0)
+            return []
+        if method == "sendMediaGroup":
+            photos = max(1, len(PHOTO_MEDIA.findall(body)))
+            return [_photo_message(self._next_id(), chat_id) for _ in range(photos)]
+        if method == "sendPhoto":
+            return _photo_message(self._next_id(), chat_id)
+        if method.startswith("send") or method.startswith("edit"):
+            return _message(self._next_id(), chat_id)
+        return True
+
+    def start_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="telegram-stub", daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Telegram Bot API stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay before every response")
+    parser.add_argument("--connect-latency-ms", type=float, default=0.0, help="delay for every new connection")
+    parser.add_argument("--rate-limit", type=int, help="answer 429 above this many requests per second")
+    parser.add_argument("--per-chat-interval", type=float, default=0.0,
+                        help="answer 429 to a second request to a chat within this many seconds")
+    parser.add_argument("--blocked-every", type=int, default=0,
+                        help="answer 403 (bot blocked) to chats whose id is a multiple of this")
+    args = parser.parse_args()
+
+    server = TelegramStubServer(args.host, args.port, args.latency_ms, args.rate_limit, args.per_chat_interval,
+                                args.blocked_every, args.connect_latency_ms)
+    print(f"Telegram stub listening on {server.url} (TELEGRAM_API_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats.snapshot(), indent=2))
@@ -1,11 +1,10 @@
 import argparse
-from app.database import SessionLocal, engine
-from app import models, schemas
+from app.database import SessionLocal
+from app import schemas
 from app.crud import create_user
 
 def main():
-    print("Creating database tables...")
-    models.Base.metadata.create_all(bind=engine)
+    # Tables are created by `alembic upgrade head`, run it before this script
     parser = argparse.ArgumentParser(description="Create a new admin user.")
     parser.add_argument("username", type=str, help="The username for the admin.")
     parser.add_argument("password", type=str, help="The password for the admin.")
@@ -0,0 +1,119 @@
+"""
+Batched, resumable data backfills.
+
+A backfill walks a table in primary-key order, `chunk_size` rows at a time.
+Each chunk is updated and committed in its own short transaction together
+with its progress row in `data_migrations`, so:
+
+- the database is never locked for the whole run, the app keeps serving
+  requests between chunks;
+- an interrupted run continues from the last committed chunk.
+
+The schema itself (tables, columns, indexes) is managed by Alembic;
+run `alembic upgrade head` before any backfill.
+"""
+
+import argparse
+import datetime
+import time
+
+from sqlalchemy import bindparam, select, text
+
+from app import models
+from app.database import engine
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+progress_table = models.DataMigration.__table__
+
+
+def backfill_args(description: str) -> argparse.Namespace:
+    """Command-line options shared by the backfill scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"rows per transaction (default {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--pause", type=float, default=0.0,
+                        help="seconds to sleep between chunks to leave room for the app")
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore saved progress and walk the table from the start")
+    return parser.parse_args()
+
+
+def _load_progress(conn, name: str):
+    return conn.execute(
+        select(progress_table).where(progress_table.c.name == name)
+    ).mappings().first()
+
+
+def _save_progress(conn, name: str, last_id: int, rows_updated: int, completed: bool) -> None:
+    now = datetime.datetime.utcnow()
+    values = {
+        "last_id": last_id,
+        "rows_updated": rows_updated,
+        "completed_at": now if completed else None,
+        "updated_at": now,
+    }
+    if _load_progress(conn, name) is None:
+        conn.execute(progress_table.insert().values(name=name, **values))
+    else:
+        conn.execute(progress_table.update().where(progress_table.c.name == name).values(**values))
+
+
+def run_backfill(
+    name: str,
+    table: str,
+    pending: str,
+    updates: list,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    pause: float = 0.0,
+    restart: bool = False,
+) -> int:
+    """
+    Apply `updates` to every row of `table` matching `pending`, chunk by chunk.
+
+    name: key of the progress row in data_migrations.
+    table: table with an integer `id` primary key.
+    pending: SQL condition selecting the rows that still need the backfill.
+    updates: UPDATE statements limited to the current chunk with `id IN :ids`.
+
+    Returns the number of rows processed by this run.
+    """
+    with engine.begin() as conn:
+        progress = _load_progress(conn, name)
+
+    last_id, total = 0, 0
+    if progress is not None and not restart:
+        if progress["completed_at"] is not None:
+            print(f"  {name}: already completed at {progress['completed_at']}, "
+                  f"{progress['rows_updated']} rows (use --restart to run again)")
+            return 0
+        last_id, total = progress["last_id"], progress["rows_updated"]
+        if last_id:
+            print(f"  {name}: resuming after id {last_id} ({total} rows already done)")
+
+    select_chunk = text(
+        f"SELECT id FROM {table} WHERE id > :last_id AND ({pending}) ORDER BY id LIMIT :limit"
+    )
+    statements = [text(sql).bindparams(bindparam("ids", expanding=True)) for sql in updates]
+
+    processed = 0
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(select_chunk, {"last_id": last_id, "limit": chunk_size}).scalars().all()
+            if not ids:
+                _save_progress(conn, name, last_id, total, completed=True)
+                break
+            for statement in statements:
+                conn.execute(statement, {"ids": ids})
+            last_id = ids[-1]
+            total += len(ids)
+            processed += len(ids)
+            _save_progress(conn, name, last_id, total, completed=False)
+
+        print(f"  {name}: {processed} rows, up to id {last_id}")
+        if pause:
+            time.sleep(pause)
+
+    print(f"  {name}: done, {processed} rows in this run")
+    return processed
@@ -2,9 +2,12 @@
 Migration script to populate customer_name field for existing orders.
 
 This denormalizes customer names into orders to preserve them even if
-the customer is deleted.
+the customer is deleted. Orders are updated in chunks (see
+migrations/backfill.py), so the script can run while the app is serving
+and resumes where it stopped if interrupted.
 
-Run with: python -m migrations.populate_customer_names
+Run `alembic upgrade head` first (it adds the column), then:
+    python -m migrations.populate_customer_names [--chunk-size N] [--pause S] [--restart]
 """
 
 import sys
@@ -13,64 +16,33 @@ import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import Column, String, text
-from sqlalchemy.exc import OperationalError
-from app.database import SessionLocal, engine
+from migrations.backfill import backfill_args, run_backfill
 
 
-def run_migration():
+def run_migration(chunk_size: int, pause: float = 0.0, restart: bool = False):
     """Populate customer_name for all existing orders."""
-    db = SessionLocal()
-    
-    try:
-        # First, check if the column exists by trying to add it
-        try:
-            with engine.connect() as conn:
-                conn.execute(text("ALTER TABLE orders ADD COLUMN customer_name VARCHAR"))
-                conn.commit()
-                print("Added customer_name column to orders table")
-        except OperationalError as e:
-            if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
-                print("Column customer_name already exists, skipping ALTER TABLE")
-            else:
-                raise
-        
-        # Get all orders with their customer data
-        result = db.execute(text("""
-            SELECT o.id, u.contact_name
-            FROM orders o
-            LEFT JOIN users u ON o.customer_id = u.id
-            WHERE o.customer_name IS NULL
-        """))
-        
-        orders_to_update = result.fetchall()
-        print(f"Found {len(orders_to_update)} orders to update")
-        
-        updated_count = 0
-        for order_id, contact_name in orders_to_update:
-            if contact_name:
-                db.execute(
-                    text("UPDATE orders SET customer_name = :name WHERE id = :order_id"),
-                    {"name": contact_name, "order_id": order_id}
-                )
-                updated_count += 1
-                print(f"  Order #{order_id}: set customer_name = '{contact_name}'")
-            else:
-                print(f"  Order #{order_id}: customer not found, skipping")
-        
-        db.commit()
-        print(f"\nMigration complete. Updated {updated_count} orders.")
-        
-    except Exception as e:
-        db.rollback()
-        print(f"Migration failed: {e}")
-        raise
-    finally:
-        db.close()
+    # Orders whose customer has no contact_name stay NULL, as before
+    updated = run_backfill(
+        "populate_customer_names",
+        table="orders",
+        pending="customer_name IS NULL",
+        updates=["""
+            UPDATE orders
+            SET customer_name = (
+                SELECT contact_name FROM users WHERE users.id = orders.customer_id
+            )
+            WHERE id IN :ids
+        """],
+        chunk_size=chunk_size,
+        pause=pause,
+        restart=restart,
+    )
+    print(f"\nMigration complete. Processed {updated} orders.")
 
 
 if __name__ == "__main__":
+    args = backfill_args("Populate orders.customer_name")
     print("=" * 60)
     print("Starting customer_name migration for orders")
     print("=" * 60)
-    run_migration()
+    run_migration(args.chunk_size, args.pause, args.restart)
@@ -5,10 +5,11 @@ This script fills in the flower_name field for existing order items by:
 1. Looking up the flower name from flower_batches table if the flower still exists
 2. Setting a placeholder "Удалённый товар" if the flower has been deleted
 
-Run this script once after adding the flower_name column to the database.
+Items are updated in chunks (see migrations/backfill.py), so the script can
+run while the app is serving and resumes where it stopped if interrupted.
 
-Usage:
-    python -m migrations.populate_flower_names
+Run `alembic upgrade head` first (it adds the column), then:
+    python -m migrations.populate_flower_names [--chunk-size N] [--pause S] [--restart]
 """
 
 import sys
@@ -18,68 +19,55 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy import text
-from app.database import SessionLocal, engine
+from app.database import engine
+from migrations.backfill import backfill_args, run_backfill
 
 
-def run_migration():
+def run_migration(chunk_size: int, pause: float = 0.0, restart: bool = False):
     """Populate flower_name for all existing order_items."""
-    db = SessionLocal()
-    
-    try:
-        # First, add the column if it doesn't exist (SQLite doesn't support IF NOT EXISTS for columns)
-        # This is safe to run multiple times on SQLite
-        try:
-            db.execute(text("ALTER TABLE order_items ADD COLUMN flower_name VARCHAR"))
-            db.commit()
-            print("Added flower_name column to order_items table")
-        except Exception as e:
-            db.rollback()
-            # Column likely already exists
-            print(f"Column flower_name may already exist: {e}")
-        
-        # Update order_items where flower still exists in flower_batches
-        result = db.execute(text("""
-            UPDATE order_items 
+    run_backfill(
+        "populate_flower_names",
+        table="order_items",
+        pending="flower_name IS NULL",
+        updates=[
+            # Flower still exists in flower_batches
+            """
+            UPDATE order_items
             SET flower_name = (
-                SELECT name FROM flower_batches 
+                SELECT name FROM flower_batches
                 WHERE flower_batches.id = order_items.flower_batch_id
             )
-            WHERE flower_name IS NULL 
+            WHERE id IN :ids
             AND flower_batch_id IN (SELECT id FROM flower_batches)
-        """))
-        db.commit()
-        print(f"Updated {result.rowcount} order items with existing flower names")
-        
-        # Update order_items where flower has been deleted
-        result = db.execute(text("""
-            UPDATE order_items 
+            """,
+            # Flower has been deleted
+            """
+            UPDATE order_items
             SET flower_name = 'Удалённый товар'
-            WHERE flower_name IS NULL 
+            WHERE id IN :ids
+            AND flower_name IS NULL
             AND flower_batch_id NOT IN (SELECT id FROM flower_batches)
-        """))
-        db.commit()
-        print(f"Updated {result.rowcount} order items with deleted flower placeholder")
-        
-        # Count remaining nulls (should be 0)
-        result = db.execute(text("SELECT COUNT(*) FROM order_items WHERE flower_name IS NULL"))
-        remaining = result.scalar()
-        
-        if remaining > 0:
-            print(f"Warning: {remaining} order items still have NULL flower_name")
-        else:
-            print("Migration completed successfully! All order items have flower_name populated.")
-            
-    except Exception as e:
-        db.rollback()
-        print(f"Error during migration: {e}")
-        raise
-    finally:
-        db.close()
+            """,
+        ],
+        chunk_size=chunk_size,
+        pause=pause,
+        restart=restart,
+    )
+
+    # Count remaining nulls (should be 0)
+    with engine.connect() as conn:
+        remaining = conn.execute(text("SELECT COUNT(*) FROM order_items WHERE flower_name IS NULL")).scalar()
+
+    if remaining > 0:
+        print(f"Warning: {remaining} order items still have NULL flower_name")
+    else:
+        print("Migration completed successfully! All order items have flower_name populated.")
 
 
 if __name__ == "__main__":
+    args = backfill_args("Populate order_items.flower_name")
     print("Starting migration: populate_flower_names")
     print("-" * 50)
-    run_migration()
+    run_migration(args.chunk_size, args.pause, args.restart)
     print("-" * 50)
     print("Migration finished")
@@ -0,0 +1,44 @@
+"""
+Migration script to fill the updated_at columns used as ETag sources.
+
+Sets flower_batches.updated_at and orders.updated_at to created_at for
+existing rows, in chunks (see migrations/backfill.py).
+
+Run `alembic upgrade head` first (it adds the columns), then:
+    python -m migrations.populate_updated_at [--chunk-size N] [--pause S] [--restart]
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations.backfill import backfill_args, run_backfill
+
+
+TABLES = ["flower_batches", "orders"]
+
+
+def run_migration(chunk_size: int, pause: float = 0.0, restart: bool = False):
+    """Backfill updated_at for flower_batches and orders."""
+    for table in TABLES:
+        run_backfill(
+            f"populate_updated_at.{table}",
+            table=table,
+            pending="updated_at IS NULL",
+            updates=[f"UPDATE {table} SET updated_at = created_at WHERE id IN :ids"],
+            chunk_size=chunk_size,
+            pause=pause,
+            restart=restart,
+        )
+
+    print("\nMigration complete.")
+
+
+if __name__ == "__main__":
+    args = backfill_args("Populate updated_at for flower_batches and orders")
+    print("=" * 60)
+    print("Starting updated_at migration")
+    print("=" * 60)
+    run_migration(args.chunk_size, args.pause, args.restart)
@@ -6,9 +6,8 @@ from pathlib import Path
 # Add project root to path to allow imports
 sys.path.append(str(Path(__file__).resolve().parent))
 
+from app.broadcast_jobs import run_worker
 from app.telegram import initialize_bot, start_bot, stop_bot
-from app.database import engine, Base
-from app import models
 
 # Configure logging
 logging.basicConfig(
@@ -17,27 +16,25 @@ logging.basicConfig(
 )
 
 async def main():
-    """Initializes and runs the bot, ensuring graceful shutdown."""
+    """Initializes and runs the bot and the broadcast worker, ensuring graceful shutdown."""
     logging.info("Starting bot script...")
     
-    # 1. Create DB tables
-    logging.info("Creating database tables if they don't exist...")
-    Base.metadata.create_all(bind=engine)
+    # The schema is managed by Alembic (`alembic upgrade head` runs on deploy)
 
-    # 2. Initialize Bot
+    # 1. Initialize Bot
     try:
         application = initialize_bot()
     except ValueError as e:
         logging.error(f"Initialization failed: {e}")
         return
 
-    # 3. Run bot with graceful shutdown
+    # 2. Run bot with graceful shutdown
     try:
         await start_bot(application)
-        # Keep the script running until interrupted
-        while True:
-            await asyncio.sleep(3600)
-    except (KeyboardInterrupt, SystemExit):
+        # Sends queued broadcasts (and resumes an interrupted one) until interrupted.
+        # Uses the Application's bot: one pooled client for the whole process.
+        await run_worker(application.bot)
+    except (KeyboardInterrupt, SystemExit, asyncio.CancelledError):
         logging.info("Shutdown signal received.")
     finally:
         await stop_bot(application)
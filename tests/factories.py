@@ -0,0 +1,32 @@
+"""Rows and credentials for tests."""
+from app import auth, models
+
+
+def make_user(db, username: str, role: str = "customer") -> models.User:
+    user = models.User(
+        username=username,
+        # Never checked by these tests; hashing with bcrypt would only slow them down
+        hashed_password="not-a-bcrypt-hash",
+        role=role,
+        contact_name=f"Contact {username}",
+        address="Test street 1",
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def make_flower(db, quantity: int = 100, price: float = 100.0, name: str = "Роза") -> models.FlowerBatch:
+    flower = models.FlowerBatch(
+        name=name, description="Тест", price=price, quantity=quantity,
+        image_url="/static/uploads/test-missing.jpg", status="available",
+    )
+    db.add(flower)
+    db.commit()
+    db.refresh(flower)
+    return flower
+
+
+def auth_headers(username: str) -> dict:
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': username})}"}
@@ -0,0 +1,22 @@
+"""Broadcast jobs that fail before sending anything."""
+import asyncio
+import json
+
+from app import broadcast_jobs, crud, models
+
+
+def test_job_without_photos_fails_its_pending_deliveries(db, tmp_path):
+    for chat_id in (101, 102, 103):
+        crud.create_or_update_subscriber(db, chat_id, is_active=True)
+    payload = [{"name": "Роза", "price": 100.0, "file_path": str(tmp_path / "deleted.jpg")}]
+    job_id = crud.create_broadcast_job(db, json.dumps(payload)).id
+
+    # The photo is gone, so neither the bot nor the broadcaster is reached
+    assert asyncio.run(broadcast_jobs.run_job(None, job_id, None)) is None
+
+    db.expire_all()
+    job = crud.get_broadcast_job(db, job_id)
+    assert (job.status, job.error) == ("failed", "No photos to send")
+    assert crud.get_broadcast_delivery_counts(db, job_id) == {"failed": 3}
+    errors = db.query(models.BroadcastDelivery.error).filter(models.BroadcastDelivery.job_id == job_id).all()
+    assert {error for error, in errors} == {"No photos to send"}
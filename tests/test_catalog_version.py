@@ -0,0 +1,26 @@
+"""The catalog version changes only with what GET /flowers/ returns."""
+from datetime import datetime, timedelta
+
+from app import crud
+from factories import make_flower
+
+
+def test_cleanup_without_old_flowers_keeps_the_version(db):
+    make_flower(db)
+    version = crud.get_catalog_version(db)
+
+    crud.delete_old_flowers(db)
+
+    assert crud.get_catalog_version(db) == version
+
+
+def test_cleanup_of_old_flowers_bumps_the_version(db):
+    flower = make_flower(db)
+    flower.created_at = datetime.utcnow() - timedelta(weeks=4)
+    db.commit()
+    version = crud.get_catalog_version(db)
+
+    crud.delete_old_flowers(db)
+
+    assert crud.get_flower(db, flower.id) is None
+    assert crud.get_catalog_version(db) == version + 1
@@ -0,0 +1,120 @@
+"""Migrations, row locks and connection pool settings on every backend."""
+import pytest
+from alembic import command
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from app import crud, database, schemas
+from conftest import alembic_config
+from factories import make_flower, make_user
+
+REVISIONS = ["0001", "0002", "0003", "0004", "0005", "0006"]
+
+
+def current_revision(engine):
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def test_revisions_form_a_single_chain():
+    script = ScriptDirectory.from_config(alembic_config())
+    assert [rev.revision for rev in reversed(list(script.walk_revisions()))] == REVISIONS
+    assert script.get_heads() == [REVISIONS[-1]]
+
+
+def test_upgrade_and_downgrade_through_every_revision(empty_engine):
+    config = alembic_config()
+    for revision in REVISIONS:
+        command.upgrade(config, revision)
+        assert current_revision(empty_engine) == revision
+
+    tables = set(inspect(empty_engine).get_table_names())
+    assert {"users", "orders", "order_items", "flower_batches", "refresh_tokens",
+            "telegram_files", "broadcast_jobs", "broadcast_deliveries"} <= tables
+    job_columns = {c["name"] for c in inspect(empty_engine).get_columns("broadcast_jobs")}
+    assert "deactivated" in job_columns
+
+    for revision in reversed(REVISIONS[:-1]):
+        command.downgrade(config, "-1")
+        assert current_revision(empty_engine) == revision
+    command.downgrade(config, "base")
+    assert current_revision(empty_engine) is None
+
+    command.upgrade(config, "head")
+    assert current_revision(empty_engine) == REVISIONS[-1]
+
+
+def test_create_order_locks_the_batches(backend, db_engine, db):
+    customer_id = make_user(db, "locker").id
+    roses = make_flower(db, quantity=100, price=100.0).id
+    tulips = make_flower(db, quantity=100, price=100.0, name="Тюльпан").id
+
+    statements = []
+
+    @event.listens_for(db_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    order = schemas.OrderCreate(items=[
+        {"flower_batch_id": tulips, "quantity": 30},
+        {"flower_batch_id": roses, "quantity": 20},
+    ])
+    try:
+        result = crud.create_order(db, order, customer_id=customer_id)
+    finally:
+        event.remove(db_engine, "before_cursor_execute", record)
+
+    assert not isinstance(result, str), result
+    assert {(item.flower_batch_id, item.quantity) for item in result.items} == {(tulips, 30), (roses, 20)}
+    db.expire_all()
+    assert crud.get_flower(db, roses).quantity == 80
+    assert crud.get_flower(db, tulips).quantity == 70
+
+    batch_select = next(s for s in statements if "FROM flower_batches" in s and " IN " in s)
+    # Row locks where the backend has them, in id order against deadlocks
+    assert ("FOR UPDATE" in batch_select) == (backend == "postgresql")
+    assert "ORDER BY flower_batches.id" in batch_select
+
+
+def test_pool_settings_apply_to_server_databases(monkeypatch):
+    monkeypatch.setattr(database.settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(database.settings, "DB_MAX_OVERFLOW", 3)
+    monkeypatch.setattr(database.settings, "DB_POOL_PRE_PING", True)
+    monkeypatch.setattr(database.settings, "DB_POOL_RECYCLE", 600)
+
+    assert database.engine_options(make_url("postgresql://user@localhost/flowers")) == {
+        "pool_size": 7, "max_overflow": 3, "pool_pre_ping": True, "pool_recycle": 600,
+    }
+    # SQLite gets no pool settings, only the thread check switched off
+    assert database.engine_options(make_url("sqlite:///./flowers.db")) == {
+        "connect_args": {"check_same_thread": False}
+    }
+
+
+def test_engine_uses_the_pool_settings(backend, db_engine):
+    if backend == "sqlite":
+        pytest.skip("SQLite takes no pool settings")
+    pool = db_engine.pool
+    assert pool.size() == database.settings.DB_POOL_SIZE
+    assert pool._max_overflow == database.settings.DB_MAX_OVERFLOW
+    assert pool._pre_ping == database.settings.DB_POOL_PRE_PING
+    assert pool._recycle == database.settings.DB_POOL_RECYCLE
+
+
+def test_pre_ping_replaces_a_dropped_connection(backend, db_engine):
+    if backend == "sqlite":
+        pytest.skip("SQLite connections are never dropped by a server")
+    with db_engine.connect() as conn:
+        pid = conn.execute(text("SELECT pg_backend_pid()")).scalar()
+
+    # The pooled connection dies on the server side, as on a restart or idle timeout
+    killer = create_engine(db_engine.url, poolclass=NullPool)
+    with killer.begin() as conn:
+        conn.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid})
+    killer.dispose()
+
+    with db_engine.connect() as conn:
+        assert conn.execute(text("SELECT pg_backend_pid()")).scalar() != pid
@@ -0,0 +1,61 @@
+"""Idempotency-Key claims when a concurrent request takes and releases the key."""
+from datetime import datetime, timedelta
+
+from app import crud, database, idempotency, models
+from factories import auth_headers, make_flower, make_user
+
+KEY = "checkout-1"
+
+
+def claim(db, user_id: int, request_hash: str):
+    now = datetime.utcnow()
+    return crud.claim_idempotency_key(
+        db, user_id, KEY, request_hash, now + timedelta(hours=1), now - timedelta(minutes=5)
+    )
+
+
+def test_claim_retries_when_the_winner_released_the_key(db, monkeypatch):
+    user_id = make_user(db, "racer").id
+    winner_db = database.SessionLocal()
+    real_get = crud.get_idempotency_key
+    reads = []
+
+    def racing_get(session, user_id, key):
+        reads.append(key)
+        if len(reads) == 1:
+            # The winner commits its claim right after our existence check...
+            winner_db.add(models.IdempotencyKey(
+                key=key, user_id=user_id, request_hash="winner-hash",
+                expires_at=datetime.utcnow() + timedelta(hours=1)
+            ))
+            winner_db.commit()
+            return None
+        if len(reads) == 2:
+            # ...and releases it (its order failed) before we read it back
+            crud.release_idempotency_key(winner_db, real_get(winner_db, user_id, key).id)
+        return real_get(session, user_id, key)
+
+    monkeypatch.setattr(crud, "get_idempotency_key", racing_get)
+    try:
+        record, claimed = claim(db, user_id, "our-hash")
+    finally:
+        winner_db.close()
+
+    assert claimed
+    assert record.request_hash == "our-hash"
+
+
+def test_order_gets_409_when_the_key_cannot_be_read_back(client, db, monkeypatch):
+    make_user(db, "racer")
+    flower_id = make_flower(db, price=5000.0).id
+    # The key changed hands again during the retried claim
+    monkeypatch.setattr(idempotency, "claim", lambda *args: (None, False))
+
+    response = client.post(
+        "/orders/",
+        json={"items": [{"flower_batch_id": flower_id, "quantity": 1}]},
+        headers=auth_headers("racer") | {"Idempotency-Key": KEY},
+    )
+
+    assert response.status_code == 409, response.text
+    assert crud.get_orders(db) == []
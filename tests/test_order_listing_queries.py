@@ -0,0 +1,60 @@
+"""Order listings send the same number of statements for 1 order as for many."""
+import pytest
+from sqlalchemy import event
+
+from app import models
+from app.principal_cache import principal_cache
+from factories import auth_headers, make_flower, make_user
+
+MANY = 25
+ITEMS_PER_ORDER = 3
+
+LISTINGS = [
+    ("/orders/", "admin"),
+    ("/orders/paginated/?per_page=50", "admin"),
+    ("/orders/paginated/?keyset=true&per_page=50", "admin"),
+    ("/orders/me/", "customer"),
+]
+
+
+def add_orders(db, customer_id: int, flower_ids: list, count: int):
+    for _ in range(count):
+        order = models.Order(customer_id=customer_id, customer_name="Contact customer")
+        order.items = [
+            models.OrderItem(flower_batch_id=flower_id, quantity=1, price_at_time_of_order=100.0, flower_name="Роза")
+            for flower_id in flower_ids
+        ]
+        db.add(order)
+    db.commit()
+
+
+def count_statements(client, engine, path: str, username: str) -> int:
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # The user lookup of get_current_user counts too, whether cached or not
+    principal_cache.clear()
+    try:
+        response = client.get(path, headers=auth_headers(username))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+@pytest.mark.parametrize("path, username", LISTINGS)
+def test_statements_do_not_grow_with_orders(client, db_engine, db, path, username):
+    make_user(db, "admin", role="admin")
+    customer_id = make_user(db, "customer").id
+    flower_ids = [make_flower(db).id for _ in range(ITEMS_PER_ORDER)]
+
+    add_orders(db, customer_id, flower_ids, 1)
+    one = count_statements(client, db_engine, path, username)
+
+    add_orders(db, customer_id, flower_ids, MANY - 1)
+    many = count_statements(client, db_engine, path, username)
+
+    assert many == one, f"{path}: {one} statements for 1 order, {many} for {MANY}"
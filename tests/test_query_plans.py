@@ -0,0 +1,153 @@
+"""
+EXPLAIN QUERY PLAN for the CRUD queries on a seeded SQLite database.
+
+Every crud function below runs against data from benchmarks.seed while the
+statements it sends are recorded; SQLite is then asked for the plan of each.
+A plan step that reads orders, order_items, flower_batches or refresh_tokens
+with a bare SCAN (no index) fails the test: on production volumes that is a
+read of the whole table. The only exception is an unfiltered, unsorted page
+(`SELECT ... FROM flower_batches LIMIT ? OFFSET ?`), which SQLite reads in
+rowid order and stops after LIMIT + OFFSET rows.
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from alembic import command
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from app import crud, database, models, schemas
+from benchmarks import seed
+from conftest import alembic_config, installed_engine
+
+INDEXED_TABLES = {"orders", "order_items", "flower_batches", "refresh_tokens"}
+
+SEED_ARGS = [
+    "--users", "500", "--flowers", "2000", "--orders", "20000",
+    "--tokens", "50000", "--subscribers", "100",
+]
+
+# "SCAN orders", "SCAN orders AS o", "SCAN TABLE orders" on SQLite < 3.36; not "SCAN orders USING INDEX ..."
+BARE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$")
+ALIAS = re.compile(r"\b(\w+) AS (\w+)\b")
+
+
+def second_page(get_page):
+    return lambda db, token: get_page(db, cursor=get_page(db)["next_cursor"])
+
+
+CRUD_CALLS = {
+    "get_flower": lambda db, token: crud.get_flower(db, 2),
+    "get_flower_updated_at": lambda db, token: crud.get_flower_updated_at(db, 2),
+    "get_flowers_by_ids": lambda db, token: crud.get_flowers_by_ids(db, [2, 3, 4], for_update=True),
+    "get_flowers": lambda db, token: crud.get_flowers(db),
+    "get_flowers_paginated": lambda db, token: crud.get_flowers_paginated(db, page=50),
+    "get_flowers_keyset": second_page(crud.get_flowers_keyset),
+    "get_orders": lambda db, token: crud.get_orders(db),
+    "get_order": lambda db, token: crud.get_order(db, 1000),
+    "get_orders_by_customer": lambda db, token: crud.get_orders_by_customer(db, 2),
+    "get_customer_orders_state": lambda db, token: crud.get_customer_orders_state(db, 2),
+    "get_orders_paginated": lambda db, token: crud.get_orders_paginated(db, page=100),
+    "get_orders_keyset": second_page(crud.get_orders_keyset),
+    "get_order_summaries": lambda db, token: crud.get_order_summaries(
+        db, status=schemas.OrderStatus("new"),
+        created_from=(datetime.utcnow() - timedelta(days=30)).date(), with_total=True
+    ),
+    "update_order_status": lambda db, token: crud.update_order_status(db, 1000, schemas.OrderStatus("ready")),
+    "reserve_stock": lambda db, token: crud.reserve_stock(db, 1, 1),
+    "create_order": lambda db, token: crud.create_order(
+        db, schemas.OrderCreate(items=[{"flower_batch_id": 1, "quantity": 5}]), customer_id=2
+    ),
+    "get_refresh_token": lambda db, token: crud.get_refresh_token(db, token),
+    "get_valid_refresh_token": lambda db, token: crud.get_valid_refresh_token(db, token),
+    "get_user_refresh_tokens": lambda db, token: crud.get_user_refresh_tokens(db, 2),
+    "rotate_refresh_token": lambda db, token: crud.rotate_refresh_token(
+        db, token, "rotated-token", datetime.utcnow() + timedelta(days=30)
+    ),
+    "revoke_refresh_token": lambda db, token: crud.revoke_refresh_token(db, token),
+    "revoke_all_user_tokens": lambda db, token: crud.revoke_all_user_tokens(db, 3),
+    "cleanup_expired_tokens": lambda db, token: crud.cleanup_expired_tokens(db),
+    # Deletes rows the other calls read, so it goes last
+    "delete_old_flowers": lambda db, token: crud.delete_old_flowers(db),
+}
+
+
+@pytest.fixture(scope="module")
+def seeded_engine(tmp_path_factory):
+    url = make_url(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'seeded.db'}")
+    with installed_engine(url) as engine, pytest.MonkeyPatch.context() as patch:
+        command.upgrade(alembic_config(), "head")
+        patch.setattr(seed, "engine", engine)
+        seed.seed(seed.parse_args(SEED_ARGS))
+        yield engine
+
+
+@pytest.fixture(scope="module")
+def token(seeded_engine) -> str:
+    """A refresh token that is neither revoked nor expired."""
+    db = database.SessionLocal()
+    try:
+        return db.query(models.RefreshToken.token).filter(
+            models.RefreshToken.is_revoked == False,
+            models.RefreshToken.expires_at > datetime.utcnow()
+        ).order_by(models.RefreshToken.id).limit(1).scalar()
+    finally:
+        db.close()
+
+
+def recorded_statements(engine, call, token: str) -> list:
+    """Distinct (statement, parameters) sent by `call`, except INSERTs and executemany batches."""
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith("INSERT"):
+            if (statement, parameters) not in statements:
+                statements.append((statement, parameters))
+
+    db = database.SessionLocal()
+    try:
+        call(db, token)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        db.rollback()
+        db.close()
+    return statements
+
+
+def stops_at_limit(statement: str, plan: list) -> bool:
+    """
+    Whether a scan stops after LIMIT + OFFSET rows: no WHERE to filter on and
+    no sort of the whole table (USE TEMP B-TREE), so rows come in rowid order.
+    """
+    return " LIMIT " in f" {statement} " and "WHERE" not in statement and not any("TEMP B-TREE" in step for step in plan)
+
+
+def bare_scans(engine, statement: str, parameters) -> list:
+    """Tables of INDEXED_TABLES that the plan of `statement` reads without an index."""
+    aliases = {alias: table for table, alias in ALIAS.findall(statement)}
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    if stops_at_limit(statement, [row.detail for row in plan]):
+        return []
+    scans = []
+    for row in plan:
+        match = BARE_SCAN.match(row.detail)
+        if match:
+            table = aliases.get(match.group(1), match.group(1))
+            if table in INDEXED_TABLES:
+                scans.append(row.detail)
+    return scans
+
+
+@pytest.mark.parametrize("name", list(CRUD_CALLS))
+def test_query_uses_an_index(seeded_engine, token, name):
+    statements = recorded_statements(seeded_engine, CRUD_CALLS[name], token)
+    assert statements, f"{name} sent no statements"
+
+    problems = []
+    for statement, parameters in statements:
+        for scan in bare_scans(seeded_engine, statement, parameters):
+            problems.append(f"{scan}\n    in: {' '.join(statement.split())}")
+    assert not problems, f"{name} reads whole tables:\n" + "\n".join(problems)
@@ -0,0 +1,63 @@
+"""Concurrent orders for one flower batch never sell more than its stock."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import pytest
+from sqlalchemy import func
+
+from app import crud, database, models, schemas
+from factories import make_flower, make_user
+
+STOCK = 100
+ATTEMPTS = 300
+THREADS = 32
+
+
+def place_order(customer_id: int, flower_id: int, start: threading.Event, snapshot: Optional[dict]):
+    """
+    One checkout in its own write session, as POST /orders/ does it; with
+    `snapshot` the batches read before the race are used instead of locked rows.
+    """
+    order = schemas.OrderCreate(items=[{"flower_batch_id": flower_id, "quantity": 1}])
+    db = database.WriteSessionLocal()
+    try:
+        start.wait()
+        batches = snapshot or crud.get_flowers_by_ids(db, [flower_id], for_update=True)
+        result = crud.create_order(db, order, customer_id=customer_id, flower_batches=batches)
+        return not isinstance(result, str)
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("stale_snapshot", [False, True], ids=["locked-rows", "stale-snapshot"])
+def test_concurrent_orders_do_not_oversell(db, stale_snapshot):
+    customer_id = make_user(db, "rush").id
+    # A single unit costs the minimum order sum
+    flower_id = make_flower(db, quantity=STOCK, price=5000.0).id
+
+    snapshot = None
+    if stale_snapshot:
+        # Every checkout validates against full stock; only the conditional UPDATE stops the oversell
+        snapshot = crud.get_flowers_by_ids(db, [flower_id])
+        db.expunge_all()
+
+    start = threading.Event()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        futures = [
+            pool.submit(place_order, customer_id, flower_id, start, snapshot) for _ in range(ATTEMPTS)
+        ]
+        start.set()
+        results = [future.result() for future in futures]
+
+    db.expire_all()
+    flower = crud.get_flower(db, flower_id)
+    sold = db.query(func.coalesce(func.sum(models.OrderItem.quantity), 0)).filter(
+        models.OrderItem.flower_batch_id == flower_id
+    ).scalar()
+
+    assert sum(results) == STOCK
+    assert sold == STOCK
+    assert flower.quantity == 0
+    assert flower.status == "sold"
+    assert db.query(models.Order).count() == STOCK